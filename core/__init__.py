@@ -1,2 +1,7 @@
 from .kiwoom import Kiwoom
 from .database import Database
+from .tick_archive import TickArchive, TickArchiveReader
+from .trade_export import TradeBatchWriter, iter_trade_batches
+from .position_book import PositionBook, normalize_code
+from .latency import LatencyTracer, LatencyHistogram, tracer
+from .journal import TradeJournal, JournalState
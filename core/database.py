@@ -2,9 +2,52 @@
 데이터베이스 모듈 (Database)
 SQLite를 사용하여 매매 기록 및 일일 리포트를 저장합니다.
 """
+import os
+import csv
+import json
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime, date
-from typing import List, Dict, Optional
+from functools import wraps
+from typing import List, Dict, Optional, Callable, Iterable, Iterator
+
+
+# 대량 가져오기/내보내기 컬럼 (trade_log 순서, id 제외)
+BULK_COLUMNS = ("timestamp", "stock_code", "stock_name", "trade_type", "price", "quantity",
+                "total_amount", "order_number", "created_at", "strategy", "realized_profit")
+
+# 롤업 테이블 묶음 (매매 저장 시 함께 변경됨)
+PNL_TABLES = ("pnl_daily", "pnl_stock", "pnl_strategy")
+TRADE_TABLES = ("trade_log",) + PNL_TABLES
+
+
+def _clone(value):
+    """캐시 결과 복사 (호출자가 수정해도 캐시 원본은 유지)"""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def cached_query(*tables: str):
+    """
+    조회 메서드 결과 캐시 데코레이터
+    
+    (메서드명, 인자) 단위로 결과를 저장하며, 지정한 테이블에 쓰기가 발생하면
+    _invalidate()로 해당 항목만 정확히 무효화됩니다.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            return self._cache_lookup(key, tables, lambda: func(self, *args, **kwargs))
+        wrapper.cache_tables = tables
+        return wrapper
+    return decorator
 
 
 class Database:
@@ -15,27 +58,153 @@ class Database:
     - 매매 기록 저장 및 조회
     - 일일 요약 저장 및 조회
     - 거래 내역 통계
+    
+    연결 구조:
+    - self.conn: 쓰기 전용 연결 (체결 저장 등, 소유 스레드에서만 사용)
+    - 읽기 전용 연결: 조회 스레드마다 1개 (WAL 모드로 쓰기와 동시 실행)
+    - submit_read(): 조회를 백그라운드 스레드 풀에서 실행 (메모리 DB는 연결 공유가 안 되므로 호출 스레드에서 실행)
+    
+    조회 캐시:
+    - @cached_query 메서드는 (메서드, 인자) 단위로 결과를 캐시
+    - 쓰기 메서드가 변경한 테이블의 캐시 항목만 무효화
+    - cache_stats()로 적중/실패 횟수 확인
     """
     
-    def __init__(self, db_file: str = "trading.db"):
+    def __init__(self, db_file: str = "trading.db", read_workers: int = 2,
+                 query_cache: bool = True):
         """
         Args:
             db_file: 데이터베이스 파일 경로
+            read_workers: 백그라운드 조회 스레드 수 (읽기 전용 연결 풀 크기)
+            query_cache: 조회 결과 캐시 사용 여부
         """
         self.db_file = db_file
         self.conn = None
+        
+        # 조회 캐시: {key: (tables, value)}, 테이블별 세대 번호로 갱신 중 무효화 감지
+        self.query_cache = query_cache
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._table_gen = {}
+        self._cache_epoch = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        self._local = threading.local()
+        self._read_conns = []
+        self._read_conns_lock = threading.Lock()
+        self._read_executor = ThreadPoolExecutor(max_workers=max(1, read_workers),
+                                                 thread_name_prefix="DatabaseReader")
         self._connect()
         self._create_tables()
     
     def _connect(self):
-        """데이터베이스 연결"""
+        """데이터베이스 연결 (쓰기 전용)"""
         try:
-            self.conn = sqlite3.connect(self.db_file)
+            # 작업 스레드(가져오기 등)가 잠시 쓰기 잠금을 잡아도 체결 저장이 실패하지 않도록 대기
+            self.conn = sqlite3.connect(self.db_file, timeout=30)
             self.conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
+            if self.db_file != ":memory:":
+                # WAL: 읽기 연결이 쓰기를 막지 않고, 쓰기도 읽기를 막지 않음
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")
             print(f"✅ 데이터베이스 연결: {self.db_file}")
         except Exception as e:
             print(f"❌ 데이터베이스 연결 실패: {e}")
     
+    def _read_conn(self) -> sqlite3.Connection:
+        """현재 스레드 전용 읽기 연결 반환 (없으면 생성)"""
+        if self.db_file == ":memory:":
+            return self.conn  # 메모리 DB는 연결 간 공유 불가 (submit_read도 호출 스레드에서 실행)
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=1")
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+    
+    def submit_read(self, method: Callable, *args, **kwargs) -> Future:
+        """
+        조회 메서드를 백그라운드 스레드에서 실행
+        
+        Args:
+            method: 조회 함수 (예: db.get_trade_history)
+        
+        Returns:
+            결과를 담은 Future (add_done_callback은 작업 스레드에서 호출됨)
+            메모리 DB는 쓰기 연결로만 조회할 수 있으므로 호출 스레드에서 바로 실행한 완료 Future
+        """
+        if self.db_file == ":memory:":
+            future = Future()
+            try:
+                future.set_result(method(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._read_executor.submit(method, *args, **kwargs)
+    
+    # ========== 조회 캐시 ==========
+    
+    def _cache_lookup(self, key, tables, loader):
+        """캐시 조회, 없으면 loader 실행 후 저장 (복사본 반환)"""
+        if not self.query_cache:
+            return loader()
+        
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache_hits += 1
+                return _clone(entry[1])
+            self._cache_misses += 1
+            gens = self._table_gens(tables)
+        
+        value = loader()
+        
+        with self._cache_lock:
+            # 조회 도중 해당 테이블에 쓰기가 있었으면 저장하지 않음 (오래된 결과 방지)
+            if gens == self._table_gens(tables):
+                self._cache[key] = (tables, value)
+        return _clone(value)
+    
+    def _table_gens(self, tables) -> tuple:
+        """테이블별 세대 번호 스냅샷 (전체 무효화 세대 포함, 락 보유 상태에서 호출)"""
+        return (self._cache_epoch,) + tuple(self._table_gen.get(t, 0) for t in tables)
+    
+    def _invalidate(self, *tables: str):
+        """
+        테이블 변경에 따른 캐시 무효화
+        
+        Args:
+            tables: 변경된 테이블 (생략 시 전체 무효화)
+        """
+        with self._cache_lock:
+            if not tables:
+                self._cache.clear()
+                self._cache_epoch += 1
+                return
+            
+            changed = set(tables)
+            for t in changed:
+                self._table_gen[t] = self._table_gen.get(t, 0) + 1
+            stale = [k for k, (deps, _) in self._cache.items() if changed.intersection(deps)]
+            for k in stale:
+                del self._cache[k]
+    
+    def cache_stats(self) -> Dict:
+        """조회 캐시 통계 (적중/실패 횟수, 항목 수)"""
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'entries': len(self._cache),
+                'hit_rate': (self._cache_hits / total * 100) if total else 0.0,
+            }
+    
     def _create_tables(self):
         """테이블 생성"""
         cursor = self.conn.cursor()
@@ -91,15 +260,119 @@ class Database:
             )
         ''')
         
+        # 5. 실현손익 롤업 테이블 (save_trade에서 증분 갱신)
+        rollup_columns = '''
+                trade_count INTEGER DEFAULT 0,
+                buy_count INTEGER DEFAULT 0,
+                sell_count INTEGER DEFAULT 0,
+                buy_amount INTEGER DEFAULT 0,
+                sell_amount INTEGER DEFAULT 0,
+                realized_profit INTEGER DEFAULT 0,
+                updated_at TEXT
+        '''
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS pnl_daily (
+                date TEXT PRIMARY KEY,{rollup_columns}
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS pnl_stock (
+                stock_code TEXT PRIMARY KEY,
+                stock_name TEXT,
+                last_strategy TEXT,{rollup_columns}
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS pnl_strategy (
+                strategy TEXT PRIMARY KEY,{rollup_columns}
+            )
+        ''')
+        
+        # trade_log 컬럼 마이그레이션 (전략 프로필, 실현손익)
+        existing = {row['name'] for row in cursor.execute("PRAGMA table_info(trade_log)")}
+        if 'strategy' not in existing:
+            cursor.execute("ALTER TABLE trade_log ADD COLUMN strategy TEXT DEFAULT ''")
+        if 'realized_profit' not in existing:
+            cursor.execute("ALTER TABLE trade_log ADD COLUMN realized_profit INTEGER DEFAULT 0")
+        
+        # 6. 월별 아카이브 목록 (trade_log_YYYYMM 테이블)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trade_log_archive (
+                month TEXT PRIMARY KEY,
+                table_name TEXT,
+                row_count INTEGER,
+                first_timestamp TEXT,
+                last_timestamp TEXT,
+                archived_at TEXT
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_trade_log_timestamp ON trade_log(timestamp)")
+        
+        # 7. 일봉 캐시 (TR 재조회 방지, 장전 목표가 일괄 계산용)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_bars (
+                stock_code TEXT,
+                date TEXT,
+                open INTEGER,
+                high INTEGER,
+                low INTEGER,
+                close INTEGER,
+                volume INTEGER,
+                PRIMARY KEY (stock_code, date)
+            )
+        ''')
+        
+        # 8. 변동성 돌파 목표가 (거래일별, 시가는 장 시작 후 반영)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS target_prices (
+                trade_date TEXT,
+                stock_code TEXT,
+                prev_date TEXT,
+                prev_high INTEGER,
+                prev_low INTEGER,
+                prev_close INTEGER,
+                k REAL,
+                breakout_range INTEGER,
+                open_price INTEGER,
+                target_price INTEGER,
+                updated_at TEXT,
+                PRIMARY KEY (trade_date, stock_code)
+            )
+        ''')
+        
+        # 9. 보유 로트 장부 (종목별 FIFO 매수 로트 + 실현손익, 체결마다 증분 갱신 후 일괄 저장)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS position_lots (
+                stock_code TEXT PRIMARY KEY,
+                lots TEXT,
+                quantity INTEGER,
+                cost INTEGER,
+                realized_profit INTEGER,
+                updated_at TEXT
+            )
+        ''')
+        
         self.conn.commit()
+        
+        # 롤업 테이블이 비어 있는데 기존 매매 기록이 있으면 1회 재구축
+        cursor.execute("SELECT COUNT(*) AS count FROM pnl_daily")
+        if cursor.fetchone()['count'] == 0:
+            cursor.execute(f"SELECT COUNT(*) AS count FROM {self._trade_log_source(conn=self.conn)}")
+            if cursor.fetchone()['count'] > 0:
+                self.rebuild_rollups()
+        
+        # 지난 달 기록은 아카이브로 이동 (당월 테이블만 작게 유지)
+        self.rollover_trade_log()
+        
         print("✅ 테이블 생성 완료")
 
     # ========== 자산 설정 관리(Migration) ==========
 
+    @cached_query("asset_config")
     def get_asset_config(self, user_id: str) -> Optional[Dict]:
         """자산 설정 조회"""
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute("SELECT * FROM asset_config WHERE user_id=?", (user_id,))
             row = cursor.fetchone()
             if row:
@@ -129,13 +402,15 @@ class Database:
                 updated_at
             ))
             self.conn.commit()
+            self._invalidate("asset_config")
         except Exception as e:
             print(f"❌ 자산 설정 저장 실패: {e}")
     
+    @cached_query("strategy_config")
     def get_strategy_config(self, user_id: str) -> Optional[Dict]:
         """전략 설정 조회"""
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute("SELECT * FROM strategy_config WHERE user_id=?", (user_id,))
             row = cursor.fetchone()
             if row:
@@ -163,15 +438,17 @@ class Database:
                 VALUES (?, ?, ?, ?)
             ''', (user_id, params_json, universe_json, now))
             self.conn.commit()
+            self._invalidate("strategy_config")
         except Exception as e:
             print(f"❌ 전략 설정 저장 실패: {e}")
 
     # ========== 매매 기록 관리 ==========
     
     def save_trade(self, stock_code: str, stock_name: str, trade_type: str,
-                   price: int, quantity: int, order_number: str = "") -> int:
+                   price: int, quantity: int, order_number: str = "",
+                   realized_profit: int = 0, strategy: str = None) -> int:
         """
-        매매 기록 저장
+        매매 기록 저장 (실현손익 롤업 테이블도 같은 트랜잭션에서 갱신)
         
         Args:
             stock_code: 종목코드
@@ -180,6 +457,8 @@ class Database:
             price: 단가
             quantity: 수량
             order_number: 주문번호
+            realized_profit: 실현손익 (매도 시)
+            strategy: 전략 프로필 (매도 시 생략하면 마지막 매수 프로필 사용)
         
         Returns:
             저장된 레코드 ID
@@ -189,22 +468,87 @@ class Database:
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         total_amount = price * quantity
         created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        is_buy = trade_type.startswith("매수")
         
-        cursor.execute('''
-            INSERT INTO trade_log 
-            (timestamp, stock_code, stock_name, trade_type, price, quantity, 
-             total_amount, order_number, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, stock_code, stock_name, trade_type, price, quantity,
-              total_amount, order_number, created_at))
-        
-        self.conn.commit()
+        try:
+            if strategy is None:
+                strategy = ""
+                if not is_buy:
+                    cursor.execute("SELECT last_strategy FROM pnl_stock WHERE stock_code = ?", (stock_code,))
+                    row = cursor.fetchone()
+                    if row and row['last_strategy']:
+                        strategy = row['last_strategy']
+            
+            cursor.execute('''
+                INSERT INTO trade_log 
+                (timestamp, stock_code, stock_name, trade_type, price, quantity, 
+                 total_amount, order_number, created_at, strategy, realized_profit)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (timestamp, stock_code, stock_name, trade_type, price, quantity,
+                  total_amount, order_number, created_at, strategy, realized_profit))
+            record_id = cursor.lastrowid
+            
+            self._apply_rollup(cursor, timestamp[:10], stock_code, stock_name, strategy,
+                               is_buy, total_amount, realized_profit, created_at)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._invalidate(*TRADE_TABLES)
         
-        record_id = cursor.lastrowid
         print(f"✅ 매매 기록 저장: {stock_name}({stock_code}) {trade_type} {quantity}주 @ {price:,}원")
         
         return record_id
     
+    def _apply_rollup(self, cursor, trade_date: str, stock_code: str, stock_name: str,
+                      strategy: str, is_buy: bool, amount: int, realized_profit: int,
+                      updated_at: str):
+        """롤업 테이블 증분 갱신 (호출자가 커밋)"""
+        values = (
+            1 if is_buy else 0,
+            0 if is_buy else 1,
+            amount if is_buy else 0,
+            0 if is_buy else amount,
+            0 if is_buy else realized_profit,
+            updated_at
+        )
+        increment = '''
+            trade_count = trade_count + 1,
+            buy_count = buy_count + excluded.buy_count,
+            sell_count = sell_count + excluded.sell_count,
+            buy_amount = buy_amount + excluded.buy_amount,
+            sell_amount = sell_amount + excluded.sell_amount,
+            realized_profit = realized_profit + excluded.realized_profit,
+            updated_at = excluded.updated_at
+        '''
+        
+        cursor.execute(f'''
+            INSERT INTO pnl_daily
+            (date, trade_count, buy_count, sell_count, buy_amount, sell_amount, realized_profit, updated_at)
+            VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET {increment}
+        ''', (trade_date,) + values)
+        
+        cursor.execute(f'''
+            INSERT INTO pnl_stock
+            (stock_code, stock_name, last_strategy, trade_count, buy_count, sell_count,
+             buy_amount, sell_amount, realized_profit, updated_at)
+            VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(stock_code) DO UPDATE SET {increment},
+                stock_name = excluded.stock_name,
+                last_strategy = CASE WHEN excluded.buy_count > 0 THEN excluded.last_strategy
+                                     ELSE last_strategy END
+        ''', (stock_code, stock_name, strategy) + values)
+        
+        cursor.execute(f'''
+            INSERT INTO pnl_strategy
+            (strategy, trade_count, buy_count, sell_count, buy_amount, sell_amount, realized_profit, updated_at)
+            VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(strategy) DO UPDATE SET {increment}
+        ''', (strategy,) + values)
+    
+    @cached_query("trade_log", "trade_log_archive")
     def get_trade_history(self, start_date: str = None, end_date: str = None,
                           stock_code: str = None, trade_type: str = None) -> List[Dict]:
         """
@@ -219,17 +563,20 @@ class Database:
         Returns:
             매매 내역 리스트
         """
-        cursor = self.conn.cursor()
+        conn = self._read_conn()
+        cursor = conn.cursor()
         
-        query = "SELECT * FROM trade_log WHERE 1=1"
+        # 기간이 아카이브 월에 걸칠 때만 해당 월 테이블을 합쳐서 조회
+        source = self._trade_log_source(start_date, end_date, conn)
+        query = f"SELECT * FROM {source} WHERE 1=1"
         params = []
         
         if start_date:
-            query += " AND date(timestamp) >= ?"
+            query += " AND timestamp >= ?"
             params.append(start_date)
         
         if end_date:
-            query += " AND date(timestamp) <= ?"
+            query += " AND timestamp < date(?, '+1 day')"
             params.append(end_date)
         
         if stock_code:
@@ -252,19 +599,22 @@ class Database:
         today = date.today().strftime('%Y-%m-%d')
         return self.get_trade_history(start_date=today, end_date=today)
     
+    @cached_query("trade_log", "trade_log_archive")
     def get_trade_count(self, start_date: str = None, end_date: str = None) -> int:
         """매매 횟수 조회"""
-        cursor = self.conn.cursor()
+        conn = self._read_conn()
+        cursor = conn.cursor()
         
-        query = "SELECT COUNT(*) as count FROM trade_log WHERE 1=1"
+        source = self._trade_log_source(start_date, end_date, conn)
+        query = f"SELECT COUNT(*) as count FROM {source} WHERE 1=1"
         params = []
         
         if start_date:
-            query += " AND date(timestamp) >= ?"
+            query += " AND timestamp >= ?"
             params.append(start_date)
         
         if end_date:
-            query += " AND date(timestamp) <= ?"
+            query += " AND timestamp < date(?, '+1 day')"
             params.append(end_date)
         
         cursor.execute(query, params)
@@ -272,6 +622,452 @@ class Database:
         
         return result['count'] if result else 0
     
+    # ========== 매매 기록 아카이브 (월별 파티션) ==========
+    
+    def rollover_trade_log(self, keep_months: int = 1, conn: sqlite3.Connection = None) -> int:
+        """
+        지난 달 매매 기록을 월별 아카이브 테이블(trade_log_YYYYMM)로 이동
+        
+        당월 기록만 trade_log에 남겨 장중 저장/조회 경로를 가볍게 유지합니다.
+        롤업 테이블은 누적값이므로 영향을 받지 않습니다.
+        
+        Args:
+            keep_months: trade_log에 남길 최근 개월 수 (당월 포함)
+            conn: 사용할 쓰기 연결 (작업 스레드에서 호출 시, 기본: self.conn)
+        
+        Returns:
+            이동한 레코드 수
+        """
+        first_of_month = date.today().replace(day=1)
+        year, month = first_of_month.year, first_of_month.month - (max(1, keep_months) - 1)
+        while month < 1:
+            year, month = year - 1, month + 12
+        cutoff = f"{year:04d}-{month:02d}-01"
+        
+        conn = conn or self.conn
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT substr(timestamp, 1, 7) AS month FROM trade_log
+            WHERE timestamp < ? ORDER BY month
+        ''', (cutoff,))
+        months = [row['month'] for row in cursor.fetchall() if row['month']]
+        if not months:
+            return 0
+        
+        moved = 0
+        done = []
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            # 월 단위 커밋 (쓰기 잠금을 월 1개 이동 시간만 유지)
+            for ym in months:
+                table = f"trade_log_{ym.replace('-', '')}"
+                lo = f"{ym}-01"
+                y, m = int(ym[:4]), int(ym[5:7])
+                hi = f"{y + m // 12:04d}-{m % 12 + 1:02d}-01"
+                
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM trade_log WHERE 0")
+                columns = self._table_columns(table, conn)
+                column_list = ", ".join(columns)
+                cursor.execute(f'''
+                    INSERT INTO {table} ({column_list})
+                    SELECT {column_list} FROM trade_log WHERE timestamp >= ? AND timestamp < ?
+                ''', (lo, hi))
+                cursor.execute("DELETE FROM trade_log WHERE timestamp >= ? AND timestamp < ?", (lo, hi))
+                month_moved = cursor.rowcount
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+                
+                cursor.execute(f"SELECT COUNT(*) AS count, MIN(timestamp) AS first, MAX(timestamp) AS last FROM {table}")
+                row = cursor.fetchone()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO trade_log_archive
+                    (month, table_name, row_count, first_timestamp, last_timestamp, archived_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (ym, table, row['count'], row['first'], row['last'], now))
+                conn.commit()
+                moved += month_moved
+                done.append(ym)
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 매매 기록 아카이브 실패 ({len(done)}개월 완료): {e}")
+            return moved
+        finally:
+            self._invalidate("trade_log", "trade_log_archive")
+        
+        print(f"✅ 매매 기록 아카이브: {len(done)}개월 {moved}건 이동 ({', '.join(done)})")
+        return moved
+    
+    def get_archive_months(self) -> List[Dict]:
+        """아카이브된 월 목록 (오래된 순)"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT * FROM trade_log_archive ORDER BY month")
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def _table_columns(self, table: str, conn: sqlite3.Connection) -> List[str]:
+        """테이블 컬럼 이름 목록"""
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    
+    def _trade_log_source(self, start_date: str = None, end_date: str = None,
+                          conn: sqlite3.Connection = None) -> str:
+        """
+        조회 기간에 해당하는 매매 기록 FROM 절 생성
+        
+        기간이 아카이브 월에 걸치지 않으면 trade_log 그대로 반환하고,
+        걸치면 해당 월 테이블만 UNION ALL 한 서브쿼리를 반환합니다.
+        """
+        conn = conn or self._read_conn()
+        query = "SELECT month, table_name FROM trade_log_archive WHERE 1=1"
+        params = []
+        if start_date:
+            query += " AND month >= ?"
+            params.append(start_date[:7])
+        if end_date:
+            query += " AND month <= ?"
+            params.append(end_date[:7])
+        try:
+            tables = [row[1] for row in conn.execute(query + " ORDER BY month", params)]
+        except sqlite3.OperationalError:
+            tables = []  # 아카이브 테이블 생성 이전
+        if not tables:
+            return "trade_log"
+        
+        # 아카이브 이후 trade_log에 추가된 컬럼은 NULL로 채움
+        columns = self._table_columns("trade_log", conn)
+        selects = [f"SELECT {', '.join(columns)} FROM trade_log"]
+        for table in tables:
+            existing = set(self._table_columns(table, conn))
+            select_list = ", ".join(c if c in existing else f"NULL AS {c}" for c in columns)
+            selects.append(f"SELECT {select_list} FROM {table}")
+        return "(" + " UNION ALL ".join(selects) + ")"
+    
+    # ========== 대량 가져오기/내보내기 ==========
+    
+    def iter_trades(self, start_date: str = None, end_date: str = None,
+                    chunk_size: int = 5000) -> Iterator[List[Dict]]:
+        """
+        매매 기록을 chunk_size 단위로 스트리밍 조회 (오래된 순, 아카이브 포함)
+        
+        전체를 메모리에 올리지 않으므로 내보내기/외부 분석용으로 사용합니다.
+        """
+        conn = self._read_conn()
+        source = self._trade_log_source(start_date, end_date, conn)
+        query = f"SELECT * FROM {source} WHERE 1=1"
+        params = []
+        if start_date:
+            query += " AND timestamp >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND timestamp < date(?, '+1 day')"
+            params.append(end_date)
+        query += " ORDER BY timestamp, id"
+        
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+    
+    def export_trades(self, dest_path: str, start_date: str = None, end_date: str = None,
+                      chunk_size: int = 5000,
+                      progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        매매 기록 내보내기 (확장자로 형식 결정: .csv 또는 .ddtl 컬럼형)
+        
+        chunk_size 단위로 읽고 써서 메모리 사용량이 기록 수와 무관합니다.
+        임시 파일에 기록한 뒤 완료 시 교체합니다.
+        
+        Args:
+            dest_path: 저장 경로
+            progress: 진행률 콜백 (기록한 건수, 전체 건수)
+        
+        Returns:
+            내보낸 레코드 수
+        """
+        total = self.get_trade_count(start_date, end_date)
+        tmp_path = dest_path + ".part"
+        written = 0
+        
+        try:
+            if dest_path.lower().endswith(".csv"):
+                # utf-8-sig: 엑셀에서 한글 깨짐 방지
+                with open(tmp_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.DictWriter(f, fieldnames=("id",) + BULK_COLUMNS, extrasaction='ignore')
+                    writer.writeheader()
+                    for rows in self.iter_trades(start_date, end_date, chunk_size):
+                        writer.writerows(rows)
+                        written += len(rows)
+                        if progress: progress(written, total)
+            else:
+                from .trade_export import TradeBatchWriter
+                with TradeBatchWriter(tmp_path) as writer:
+                    for rows in self.iter_trades(start_date, end_date, chunk_size):
+                        writer.write_batch(rows)
+                        written += len(rows)
+                        if progress: progress(written, total)
+            os.replace(tmp_path, dest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        print(f"✅ 매매 기록 내보내기: {written:,}건 → {dest_path}")
+        return written
+    
+    def import_trades(self, rows: Iterable[Dict], batch_size: int = 5000,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      conn: sqlite3.Connection = None) -> int:
+        """
+        매매 기록 대량 가져오기 (executemany, batch_size 단위 트랜잭션)
+        
+        배치마다 커밋하므로 장중 체결 저장이 오래 대기하지 않습니다.
+        완료 후 롤업 테이블을 재구축하고 지난 달 기록은 아카이브로 이동합니다.
+        
+        Args:
+            rows: 레코드 딕셔너리 (timestamp, stock_code, trade_type, price, quantity 필수)
+            progress: 진행률 콜백 (가져온 건수, 0)
+            conn: 사용할 쓰기 연결 (작업 스레드에서 호출 시, 기본: self.conn)
+        
+        Returns:
+            가져온 레코드 수
+        """
+        conn = conn or self.conn
+        cursor = conn.cursor()
+        query = f"INSERT INTO trade_log ({', '.join(BULK_COLUMNS)}) VALUES ({', '.join('?' * len(BULK_COLUMNS))})"
+        
+        imported = 0
+        batch = []
+        try:
+            for row in rows:
+                batch.append(self._bulk_row(row))
+                if len(batch) >= batch_size:
+                    cursor.executemany(query, batch)
+                    conn.commit()
+                    imported += len(batch)
+                    batch = []
+                    if progress: progress(imported, 0)
+            if batch:
+                cursor.executemany(query, batch)
+                conn.commit()
+                imported += len(batch)
+                if progress: progress(imported, 0)
+        except Exception:
+            conn.rollback()
+            print(f"❌ 매매 기록 가져오기 중단: {imported:,}건까지 반영")
+            raise
+        finally:
+            self._invalidate("trade_log")
+            if imported:
+                self.rebuild_rollups(conn)
+                self.rollover_trade_log(conn=conn)
+        
+        print(f"✅ 매매 기록 가져오기: {imported:,}건")
+        return imported
+    
+    def import_trades_file(self, src_path: str, batch_size: int = 5000,
+                           progress: Optional[Callable[[int, int], None]] = None,
+                           conn: sqlite3.Connection = None) -> int:
+        """파일에서 매매 기록 가져오기 (.csv 또는 .ddtl, 스트리밍)"""
+        if src_path.lower().endswith(".csv"):
+            with open(src_path, 'r', newline='', encoding='utf-8-sig') as f:
+                return self.import_trades(csv.DictReader(f), batch_size, progress, conn)
+        
+        from .trade_export import iter_trade_rows
+        return self.import_trades(iter_trade_rows(src_path), batch_size, progress, conn)
+    
+    def _bulk_row(self, row: Dict) -> tuple:
+        """가져오기 레코드 정규화 (문자열 숫자, 누락 컬럼 처리)"""
+        def to_int(value):
+            if value is None or value == "":
+                return 0
+            return int(float(str(value).replace(",", "")))
+        
+        if not row.get("timestamp") or not row.get("stock_code") or not row.get("trade_type"):
+            raise ValueError(f"필수 컬럼 누락: {row}")
+        
+        price = to_int(row.get("price"))
+        quantity = to_int(row.get("quantity"))
+        total_amount = to_int(row.get("total_amount")) or price * quantity
+        return (
+            str(row["timestamp"]), str(row["stock_code"]).zfill(6), row.get("stock_name") or "",
+            str(row["trade_type"]), price, quantity, total_amount,
+            row.get("order_number") or "", row.get("created_at") or str(row["timestamp"]),
+            row.get("strategy") or "", to_int(row.get("realized_profit")),
+        )
+    
+    def start_export(self, dest_path: str, start_date: str = None, end_date: str = None,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     done: Optional[Callable[[bool, str], None]] = None):
+        """
+        내보내기를 조회 스레드 풀에서 실행 (GUI 스레드 비차단)
+        
+        Args:
+            done: 완료 콜백 (성공 여부, 결과 메시지) - 작업 스레드에서 호출됨
+        """
+        def _on_done(future):
+            try:
+                count = future.result()
+                if done: done(True, f"{count:,}건 → {dest_path}")
+            except Exception as e:
+                print(f"❌ 매매 기록 내보내기 실패: {e}")
+                if done: done(False, str(e))
+        
+        future = self.submit_read(self.export_trades, dest_path, start_date, end_date, 5000, progress)
+        future.add_done_callback(_on_done)
+        return future
+    
+    def start_import(self, src_path: str,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     done: Optional[Callable[[bool, str], None]] = None) -> threading.Thread:
+        """
+        가져오기를 작업 스레드에서 실행 (전용 쓰기 연결 사용)
+        
+        Args:
+            done: 완료 콜백 (성공 여부, 결과 메시지) - 작업 스레드에서 호출됨
+        """
+        def _worker():
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            try:
+                count = self.import_trades_file(src_path, progress=progress, conn=conn)
+                if done: done(True, f"{count:,}건 ← {src_path}")
+            except Exception as e:
+                print(f"❌ 매매 기록 가져오기 실패: {e}")
+                if done: done(False, str(e))
+            finally:
+                conn.close()
+        
+        thread = threading.Thread(target=_worker, name="DatabaseImport", daemon=True)
+        thread.start()
+        return thread
+    
+    # ========== 일봉 캐시 / 목표가 ==========
+    
+    def save_daily_bars(self, stock_code: str, bars: List[Dict], keep: int = 120):
+        """
+        일봉 캐시 저장 (Kiwoom 일봉 데이터, 최신 → 과거)
+        
+        Args:
+            keep: 저장할 최근 봉 수
+        """
+        rows = [(stock_code, b['일자'], b['시가'], b['고가'], b['저가'], b['종가'], b.get('거래량', 0))
+                for b in bars[:keep] if b.get('일자')]
+        if not rows:
+            return
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO daily_bars (stock_code, date, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.commit()
+    
+    def get_daily_bars(self, stock_code: str, limit: int = 120) -> List[Dict]:
+        """캐시된 일봉 조회 (Kiwoom 형식, 최신 → 과거)"""
+        cursor = self._read_conn().cursor()
+        cursor.execute('''
+            SELECT date, open, high, low, close, volume FROM daily_bars
+            WHERE stock_code = ? ORDER BY date DESC LIMIT ?
+        ''', (stock_code, limit))
+        return [{'일자': r['date'], '시가': r['open'], '고가': r['high'], '저가': r['low'],
+                 '종가': r['close'], '거래량': r['volume']} for r in cursor.fetchall()]
+    
+    def get_prev_daily_bars(self, codes: List[str], before_date: str) -> Dict[str, Dict]:
+        """
+        종목별로 before_date 직전 일봉 1개씩 일괄 조회
+        
+        Args:
+            codes: 종목코드 리스트
+            before_date: 기준 거래일 (YYYYMMDD, 해당일 미포함)
+        
+        Returns:
+            {종목코드: 일봉 딕셔너리}
+        """
+        result = {}
+        if not codes:
+            return result
+        cursor = self._read_conn().cursor()
+        for i in range(0, len(codes), 500):  # SQLite 변수 개수 제한
+            chunk = codes[i:i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT b.* FROM daily_bars b
+                JOIN (SELECT stock_code, MAX(date) AS date FROM daily_bars
+                      WHERE date < ? AND stock_code IN ({placeholders})
+                      GROUP BY stock_code) last
+                ON b.stock_code = last.stock_code AND b.date = last.date
+            ''', [before_date] + list(chunk))
+            for r in cursor.fetchall():
+                result[r['stock_code']] = {'일자': r['date'], '시가': r['open'], '고가': r['high'],
+                                           '저가': r['low'], '종가': r['close'], '거래량': r['volume']}
+        return result
+    
+    def save_target_prices(self, trade_date: str, plans: Dict[str, Dict]):
+        """
+        거래일 목표가 일괄 저장
+        
+        Args:
+            trade_date: 거래일 (YYYYMMDD)
+            plans: {종목코드: {prev_date, prev_high, prev_low, prev_close, k, breakout_range,
+                              open_price, target_price}}
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(trade_date, code, p.get('prev_date'), p.get('prev_high'), p.get('prev_low'),
+                 p.get('prev_close'), p.get('k'), p.get('breakout_range'), p.get('open_price'),
+                 p.get('target_price'), now) for code, p in plans.items()]
+        if not rows:
+            return
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO target_prices
+            (trade_date, stock_code, prev_date, prev_high, prev_low, prev_close, k,
+             breakout_range, open_price, target_price, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.commit()
+    
+    def get_target_prices(self, trade_date: str) -> Dict[str, Dict]:
+        """거래일 목표가 조회 {종목코드: 목표가 정보}"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT * FROM target_prices WHERE trade_date = ?", (trade_date,))
+        return {r['stock_code']: dict(r) for r in cursor.fetchall()}
+    
+    def update_target_open(self, trade_date: str, stock_code: str, open_price: int, target_price: int):
+        """장 시작 후 시가 반영"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.conn.execute('''
+            UPDATE target_prices SET open_price = ?, target_price = ?, updated_at = ?
+            WHERE trade_date = ? AND stock_code = ?
+        ''', (open_price, target_price, now, trade_date, stock_code))
+        self.conn.commit()
+    
+    # ========== 보유 로트 장부 ==========
+    
+    def get_position_lots(self) -> Dict[str, Dict]:
+        """로트 장부 전체 조회 {종목코드: {'lots': [[수량, 매입가], ...], 'realized_profit': 실현손익}}"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT stock_code, lots, realized_profit FROM position_lots")
+        return {r['stock_code']: {'lots': json.loads(r['lots'] or '[]'),
+                                  'realized_profit': r['realized_profit'] or 0}
+                for r in cursor.fetchall()}
+    
+    def save_position_lots(self, rows: Dict[str, Dict]):
+        """
+        변경된 종목의 로트 장부 일괄 저장 (트랜잭션 1회)
+        
+        Args:
+            rows: {종목코드: {'lots': [[수량, 매입가], ...], 'realized_profit': 실현손익}}
+        """
+        if not rows:
+            return
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        params = [(code, json.dumps(r['lots']), sum(q for q, _ in r['lots']),
+                   sum(q * p for q, p in r['lots']), r['realized_profit'], now)
+                  for code, r in rows.items()]
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO position_lots
+            (stock_code, lots, quantity, cost, realized_profit, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', params)
+        self.conn.commit()
+    
     # ========== 일일 요약 관리 ==========
     
     def save_daily_summary(self, target_date: str, initial_capital: int,
@@ -301,8 +1097,10 @@ class Database:
               trade_count, created_at))
         
         self.conn.commit()
+        self._invalidate("daily_summary")
         print(f"✅ 일일 요약 저장: {target_date} (수익: {profit:,}원, {profit_rate:.2f}%)")
     
+    @cached_query("daily_summary")
     def get_daily_summary(self, target_date: str) -> Optional[Dict]:
         """
         특정 날짜의 일일 요약 조회
@@ -313,7 +1111,7 @@ class Database:
         Returns:
             일일 요약 딕셔너리 또는 None
         """
-        cursor = self.conn.cursor()
+        cursor = self._read_conn().cursor()
         
         cursor.execute('''
             SELECT * FROM daily_summary WHERE date = ?
@@ -322,6 +1120,7 @@ class Database:
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    @cached_query("daily_summary")
     def get_summary_history(self, start_date: str = None, end_date: str = None) -> List[Dict]:
         """
         일일 요약 내역 조회
@@ -333,7 +1132,7 @@ class Database:
         Returns:
             일일 요약 리스트
         """
-        cursor = self.conn.cursor()
+        cursor = self._read_conn().cursor()
         
         query = "SELECT * FROM daily_summary WHERE 1=1"
         params = []
@@ -371,14 +1170,16 @@ class Database:
         
         cursor.execute(query, values)
         self.conn.commit()
+        self._invalidate("daily_summary")
         
         print(f"✅ 일일 요약 업데이트: {target_date}")
     
     # ========== 통계 ==========
     
+    @cached_query("daily_summary")
     def get_total_profit(self) -> int:
         """전체 누적 수익금 조회"""
-        cursor = self.conn.cursor()
+        cursor = self._read_conn().cursor()
         
         cursor.execute('''
             SELECT SUM(profit) as total_profit FROM daily_summary
@@ -387,27 +1188,241 @@ class Database:
         result = cursor.fetchone()
         return result['total_profit'] if result and result['total_profit'] else 0
     
+    @cached_query("pnl_strategy")
     def get_total_trades(self) -> int:
-        """전체 거래 횟수 조회"""
-        return self.get_trade_count()
+        """전체 거래 횟수 조회 (롤업 테이블 기준)"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT SUM(trade_count) AS total FROM pnl_strategy")
+        result = cursor.fetchone()
+        return result['total'] if result and result['total'] else 0
+    
+    @cached_query("pnl_strategy")
+    def get_total_realized_profit(self) -> int:
+        """전체 누적 실현손익 조회 (롤업 테이블 기준)"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT SUM(realized_profit) AS total FROM pnl_strategy")
+        result = cursor.fetchone()
+        return result['total'] if result and result['total'] else 0
+    
+    @cached_query("pnl_daily")
+    def get_daily_pnl(self, target_date: str) -> Optional[Dict]:
+        """
+        특정 날짜의 실현손익 롤업 조회
+        
+        Args:
+            target_date: 날짜 (YYYY-MM-DD)
+        """
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT * FROM pnl_daily WHERE date = ?", (target_date,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_daily_trade_count(self, target_date: str) -> int:
+        """특정 날짜의 거래 횟수 (롤업 테이블 기준)"""
+        pnl = self.get_daily_pnl(target_date)
+        return pnl['trade_count'] if pnl else 0
+    
+    @cached_query("pnl_stock")
+    def get_stock_pnl(self, stock_code: str = None) -> List[Dict]:
+        """종목별 실현손익 롤업 조회 (stock_code 지정 시 해당 종목만)"""
+        cursor = self._read_conn().cursor()
+        if stock_code:
+            cursor.execute("SELECT * FROM pnl_stock WHERE stock_code = ?", (stock_code,))
+        else:
+            cursor.execute("SELECT * FROM pnl_stock ORDER BY realized_profit DESC")
+        return [dict(row) for row in cursor.fetchall()]
+    
+    @cached_query("pnl_strategy")
+    def get_strategy_pnl(self) -> List[Dict]:
+        """전략 프로필별 실현손익 롤업 조회"""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT * FROM pnl_strategy ORDER BY realized_profit DESC")
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def rebuild_rollups(self, conn: sqlite3.Connection = None):
+        """
+        trade_log 전체에서 롤업 테이블 재구축 (마이그레이션/복구/대량 가져오기용)
+        
+        집계는 읽기 트랜잭션에서 계산하고(WAL: 쓰기 잠금 없음) 쓰기 잠금은 결과 교체에만 사용합니다.
+        집계 이후 저장된 기록(id > 집계 시점 마지막 id)은 교체 트랜잭션에서 증분 반영합니다.
+        """
+        conn = conn or self.conn
+        cursor = conn.cursor()
+        source = self._trade_log_source(conn=conn)  # 아카이브 포함 전체 기록
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        aggregate = '''
+            COUNT(*),
+            SUM(CASE WHEN trade_type LIKE '매수%' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN trade_type LIKE '매수%' THEN 0 ELSE 1 END),
+            SUM(CASE WHEN trade_type LIKE '매수%' THEN total_amount ELSE 0 END),
+            SUM(CASE WHEN trade_type LIKE '매수%' THEN 0 ELSE total_amount END),
+            SUM(CASE WHEN trade_type LIKE '매수%' THEN 0 ELSE IFNULL(realized_profit, 0) END),
+            ?
+        '''
+        try:
+            # 1. 집계 (같은 시점 기준의 읽기 트랜잭션)
+            if conn.in_transaction:
+                conn.commit()
+            cursor.execute("BEGIN")
+            row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'trade_log'").fetchone()
+            last_id = row[0] if row else 0
+            daily = cursor.execute(f'''
+                SELECT date(timestamp), {aggregate} FROM {source} GROUP BY date(timestamp)
+            ''', (now,)).fetchall()
+            stocks = cursor.execute(f'''
+                SELECT stock_code, MAX(stock_name),
+                       (SELECT t2.strategy FROM {source} t2
+                        WHERE t2.stock_code = t.stock_code AND t2.trade_type LIKE '매수%'
+                        ORDER BY t2.id DESC LIMIT 1),
+                       {aggregate}
+                FROM {source} t GROUP BY stock_code
+            ''', (now,)).fetchall()
+            strategies = cursor.execute(f'''
+                SELECT IFNULL(strategy, ''), {aggregate} FROM {source} GROUP BY IFNULL(strategy, '')
+            ''', (now,)).fetchall()
+            conn.commit()
+            
+            # 2. 교체 (짧은 쓰기 트랜잭션)
+            cursor.execute("DELETE FROM pnl_daily")
+            cursor.execute("DELETE FROM pnl_stock")
+            cursor.execute("DELETE FROM pnl_strategy")
+            cursor.executemany("INSERT INTO pnl_daily VALUES (?, ?, ?, ?, ?, ?, ?, ?)", daily)
+            cursor.executemany("INSERT INTO pnl_stock VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", stocks)
+            cursor.executemany("INSERT INTO pnl_strategy VALUES (?, ?, ?, ?, ?, ?, ?, ?)", strategies)
+            cursor.execute("SELECT * FROM trade_log WHERE id > ? ORDER BY id", (last_id,))
+            for r in cursor.fetchall():
+                self._apply_rollup(cursor, r['timestamp'][:10], r['stock_code'], r['stock_name'],
+                                   r['strategy'] or "", r['trade_type'].startswith("매수"),
+                                   r['total_amount'], r['realized_profit'] or 0, now)
+            conn.commit()
+            print("✅ 실현손익 롤업 재구축 완료")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 실현손익 롤업 재구축 실패: {e}")
+        finally:
+            self._invalidate(*PNL_TABLES)
     
     # ========== 유틸리티 ==========
     
     def close(self):
         """데이터베이스 연결 종료"""
+        self._read_executor.shutdown(wait=True)
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                try: conn.close()
+                except Exception: pass
+            self._read_conns.clear()
         if self.conn:
             self.conn.close()
             print("✅ 데이터베이스 연결 종료")
     
+    # ========== 백업/복원 (SQLite Online Backup API) ==========
+    
+    def backup_to(self, dest_path: str, pages: int = 256,
+                  progress: Callable[[int, int], None] = None):
+        """
+        온라인 백업 (호출 스레드에서 실행)
+        
+        별도 연결로 page 단위 증분 복사하므로 복사 중에도 기존 연결의 쓰기가 가능하며,
+        복사 도중 원본이 변경되면 SQLite가 자동으로 재시작하여 일관된 스냅샷을 보장합니다.
+        
+        Args:
+            dest_path: 백업 파일 경로
+            pages: 1회 step당 복사할 페이지 수
+            progress: 진행률 콜백 (복사한 페이지 수, 전체 페이지 수)
+        """
+        tmp_path = dest_path + ".part"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        
+        src = sqlite3.connect(self.db_file)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            def _on_progress(status, remaining, total):
+                if progress:
+                    progress(total - remaining, total)
+            
+            src.backup(dst, pages=pages, progress=_on_progress)
+            
+            result = dst.execute("PRAGMA integrity_check").fetchone()
+            if not result or result[0] != 'ok':
+                raise sqlite3.DatabaseError(f"백업 무결성 검사 실패: {result}")
+        finally:
+            dst.close()
+            src.close()
+        
+        os.replace(tmp_path, dest_path)
+        print(f"✅ 데이터베이스 백업 완료: {dest_path}")
+    
+    def start_backup(self, dest_path: str, pages: int = 256,
+                     progress: Callable[[int, int], None] = None,
+                     done: Callable[[bool, str], None] = None) -> threading.Thread:
+        """
+        백그라운드 스레드에서 온라인 백업 실행
+        
+        Args:
+            dest_path: 백업 파일 경로
+            pages: 1회 step당 복사할 페이지 수
+            progress: 진행률 콜백 (작업 스레드에서 호출됨)
+            done: 완료 콜백 (성공 여부, 경로 또는 오류 메시지) - 작업 스레드에서 호출됨
+        
+        Returns:
+            실행 중인 백업 스레드
+        """
+        def _worker():
+            try:
+                self.backup_to(dest_path, pages=pages, progress=progress)
+                if done: done(True, dest_path)
+            except Exception as e:
+                print(f"❌ 데이터베이스 백업 실패: {e}")
+                if done: done(False, str(e))
+        
+        thread = threading.Thread(target=_worker, name="DatabaseBackup", daemon=True)
+        thread.start()
+        return thread
+    
+    def restore_from(self, src_path: str):
+        """
+        백업 파일로 복원
+        
+        무결성 검사를 통과한 백업만 현재 연결로 단일 step 복사하므로
+        복원은 하나의 트랜잭션으로 원자적으로 반영됩니다 (중간 상태 노출 없음).
+        
+        Args:
+            src_path: 백업 파일 경로
+        """
+        if not os.path.exists(src_path):
+            raise FileNotFoundError(src_path)
+        
+        src = sqlite3.connect(f"file:{src_path}?mode=ro", uri=True)
+        try:
+            result = src.execute("PRAGMA integrity_check").fetchone()
+            if not result or result[0] != 'ok':
+                raise sqlite3.DatabaseError(f"백업 파일 무결성 검사 실패: {result}")
+            tables = {row[0] for row in src.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if 'trade_log' not in tables:
+                raise sqlite3.DatabaseError("매매 기록 테이블이 없는 파일입니다.")
+            
+            self.conn.commit()
+            src.backup(self.conn, pages=-1)
+        finally:
+            src.close()
+        
+        # 구버전 백업일 수 있으므로 스키마 마이그레이션 재실행
+        self._create_tables()
+        self._invalidate()
+        print(f"✅ 데이터베이스 복원 완료: {src_path}")
+    
+    @cached_query("pnl_stock")
     def get_bot_stock_codes(self) -> set:
         """
         봇이 매수한 기록이 있는 종목 코드 집합 반환
         (사용자 직접 매수 종목과 구분하기 위함)
         """
         try:
-            cursor = self.conn.cursor()
-            # 매수 기록이 있는 종목만 중복 제거하여 조회
-            cursor.execute("SELECT DISTINCT stock_code FROM trade_log WHERE trade_type='매수'")
+            cursor = self._read_conn().cursor()
+            # 매수 기록이 있는 종목만 조회 (종목별 롤업 테이블 사용)
+            cursor.execute("SELECT stock_code FROM pnl_stock WHERE buy_count > 0")
             rows = cursor.fetchall()
             return {row['stock_code'] for row in rows}
         except Exception as e:
@@ -417,9 +1432,17 @@ class Database:
     def clear_all(self):
         """모든 데이터 삭제 (주의!)"""
         cursor = self.conn.cursor()
+        for row in cursor.execute("SELECT table_name FROM trade_log_archive").fetchall():
+            cursor.execute(f"DROP TABLE IF EXISTS {row['table_name']}")
+        cursor.execute("DELETE FROM trade_log_archive")
         cursor.execute("DELETE FROM trade_log")
         cursor.execute("DELETE FROM daily_summary")
+        cursor.execute("DELETE FROM pnl_daily")
+        cursor.execute("DELETE FROM pnl_stock")
+        cursor.execute("DELETE FROM pnl_strategy")
+        cursor.execute("DELETE FROM position_lots")
         self.conn.commit()
+        self._invalidate()
         print("✅ 모든 데이터 삭제 완료")
 
 
@@ -440,7 +1463,7 @@ if __name__ == "__main__":
     print("\n[1] 매매 기록 저장")
     db.save_trade("005930", "삼성전자", "매수", 70000, 10, "ORD001")
     db.save_trade("000660", "SK하이닉스", "매수", 130000, 5, "ORD002")
-    db.save_trade("005930", "삼성전자", "매도", 72000, 5, "ORD003")
+    db.save_trade("005930", "삼성전자", "매도", 72000, 5, "ORD003", realized_profit=10000)
     
     # 2. 오늘의 매매 내역 조회
     print("\n[2] 오늘의 매매 내역")
@@ -476,6 +1499,19 @@ if __name__ == "__main__":
     print("\n[5] 통계")
     print(f"  전체 거래 횟수: {db.get_total_trades()}회")
     print(f"  전체 누적 수익: {db.get_total_profit():,}원")
+    print(f"  전체 실현 손익: {db.get_total_realized_profit():,}원")
+    for row in db.get_stock_pnl():
+        print(f"  - {row['stock_name']}: 매수 {row['buy_count']}회 / 매도 {row['sell_count']}회 / 실현 {row['realized_profit']:,}원")
+    
+    # 6. 조회 캐시
+    print("\n[6] 조회 캐시")
+    for _ in range(100):
+        db.get_trade_history()
+        db.get_summary_history()
+    db.save_trade("000660", "SK하이닉스", "매도", 131000, 5, "ORD004", realized_profit=5000)
+    print(f"  매도 후 거래 내역: {len(db.get_trade_history())}건 (무효화 확인)")
+    stats = db.cache_stats()
+    print(f"  적중 {stats['hits']}회 / 실패 {stats['misses']}회 / 항목 {stats['entries']}개 ({stats['hit_rate']:.1f}%)")
     
     # 데이터베이스 종료
     db.close()
@@ -0,0 +1,437 @@
+"""
+주문/포지션 저널 모듈 (Trade Journal)
+주문 의도, 접수, 체결, 현금 예약을 추가 전용(append-only) 파일에 기록해
+프로그램이 비정상 종료되어도 재시작 시 매매 상태를 즉시 복원합니다.
+
+저장 구조:
+    {root}/{name}.jnl   레코드 1건 = JSON 1줄 (seq 증가), 주문 전송 전에 기록 (write-ahead)
+    {root}/{name}.snap  압축(compaction) 시점의 상태 전체 (임시 파일 기록 → fsync → 원자적 교체)
+    {root}/{name}.jnl.old  스냅샷 기록 중인 이전 저널 (스냅샷 교체 후 삭제, 남아 있으면 복원 시 함께 재적용)
+
+- 기록: write + flush(OS 버퍼까지, 프로세스가 죽어도 보존) 후 fsync는 작업 스레드가 fsync_ms 단위로 묶어서 수행
+- 복원: 스냅샷 로드 → seq가 더 큰 저널 레코드만 재적용 (기록 도중 잘린 마지막 줄은 파일에서 잘라낸 뒤 이어서 기록)
+- 압축: 레코드가 compact_every건을 넘거나 snapshot() 호출 시 상태를 스냅샷으로 쓰고 저널을 비움
+  (잠금 안에서는 직렬화와 저널 교체만, 파일 기록/fsync는 잠금 밖 → 압축 중에도 append()가 막히지 않음)
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+
+class JournalState:
+    """
+    저널 재적용 결과 (메모리 상태)
+
+    orders:  미완료 주문 {oid: {oid, code, side, qty, price, held, strategy, reserved, filled, order_no, date}}
+             (oid = intent 레코드의 seq, 같은 종목/구분의 주문이 여러 건이어도 각각 추적)
+    ordered: 당일 매수 주문을 낸 종목 {전략명: {종목코드}} (재시작 후 중복 매수 방지)
+    owners:  종목별 매수 전략 {종목코드: 전략명}
+    prices:  마지막 스냅샷 시점의 실시간 시세 캐시 {종목코드: 데이터}
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.date = datetime.now().strftime('%Y%m%d')
+        self.orders: Dict[str, Dict] = {}
+        self.ordered: Dict[str, set] = {}
+        self.owners: Dict[str, str] = {}
+        self.prices: Dict[str, Dict] = {}
+        self._open: Dict[tuple, List[str]] = {}  # {(구분, 종목코드): [oid, ...]} 주문 순서
+        self._by_no: Dict[str, str] = {}         # {주문번호: oid}
+
+    def _index(self, oid: str, order: Dict):
+        self._open.setdefault((order['side'], order['code']), []).append(oid)
+        if order['order_no']:
+            self._by_no[order['order_no']] = oid
+
+    def _pop(self, oid: str) -> Dict:
+        """미완료 주문 제거 (색인 포함)"""
+        order = self.orders.pop(oid, None)
+        if order is not None:
+            key = (order['side'], order['code'])
+            same = self._open.get(key, [])
+            if oid in same:
+                same.remove(oid)
+            if not same:
+                self._open.pop(key, None)
+            if self._by_no.get(order['order_no']) == oid:
+                del self._by_no[order['order_no']]
+        return order
+
+    def find(self, rec: Dict) -> str:
+        """
+        레코드가 가리키는 주문 oid (없으면 '')
+
+        1) oid (intent를 기록한 호출부가 아는 경우: reject/close/대사 체결)
+        2) 주문번호 (접수 이후 체결 통보)
+        3) 같은 종목/구분의 가장 오래된 주문 (접수 통보는 주문 순서대로 도착, 주문번호 미접수 주문 우선)
+        """
+        oid = rec.get('oid')
+        if oid is not None:
+            return str(oid) if str(oid) in self.orders else ''
+        order_no = rec.get('order_no')
+        if order_no and order_no in self._by_no:
+            return self._by_no[order_no]
+        same = self._open.get((rec.get('side'), rec.get('code')), ())
+        if rec['k'] == 'ack':
+            return next((oid for oid in same if not self.orders[oid]['order_no']), '')
+        return same[0] if same else ''
+
+    def apply(self, rec: Dict):
+        """레코드 1건 반영"""
+        self.seq = rec['seq']
+        kind = rec['k']
+        code = rec.get('code')
+        side = rec.get('side')
+
+        if kind == 'intent':
+            oid = str(rec['seq'])
+            self.orders[oid] = {
+                'oid': oid, 'code': code, 'side': side, 'qty': rec['qty'], 'price': rec.get('price', 0),
+                'held': rec.get('held', 0), 'strategy': rec.get('strategy', ''),
+                'reserved': rec.get('reserve', 0), 'filled': 0, 'order_no': '',
+                'date': rec.get('date', self.date),
+            }
+            self._index(oid, self.orders[oid])
+            if side == 'buy':
+                self.ordered.setdefault(rec.get('strategy', ''), set()).add(code)
+                self.owners[code] = rec.get('strategy', '')
+        elif kind == 'reject':
+            order = self._pop(self.find(rec))
+            if order is not None and side == 'buy':
+                self.ordered.get(order['strategy'], set()).discard(code)
+        elif kind == 'ack':
+            order = self.orders.get(self.find(rec))
+            if order is not None and not order['order_no']:
+                order['order_no'] = rec.get('order_no', '')
+                if order['order_no']:
+                    self._by_no[order['order_no']] = order['oid']
+        elif kind == 'fill':
+            oid = self.find(rec)
+            order = self.orders.get(oid)
+            if order is not None:
+                order['filled'] += rec['qty']
+                if side == 'buy':
+                    order['reserved'] = max(0, order['qty'] - order['filled']) * order['price']
+                if order['filled'] >= order['qty']:
+                    self._pop(oid)
+                    if side == 'sell' and order['held'] <= order['filled']:
+                        self.owners.pop(code, None)  # 전량 매도 → 매수 전략 연결 해제
+        elif kind == 'close':
+            self._pop(self.find(rec))
+        elif kind == 'day':
+            # 거래일 변경: 당일 주문 종목 초기화 (미완료 주문은 대사 대상으로 유지)
+            self.date = rec['date']
+            self.ordered = {}
+
+    def reserved_total(self) -> int:
+        """미체결 매수 주문의 예약 현금 합계"""
+        return sum(o['reserved'] for o in self.orders.values() if o['side'] == 'buy')
+
+    def open_orders(self, side: str = None) -> List[Dict]:
+        return [o for o in self.orders.values() if side is None or o['side'] == side]
+
+    def to_dict(self) -> Dict:
+        return {
+            'seq': self.seq, 'date': self.date, 'orders': self.orders,
+            'ordered': {name: sorted(codes) for name, codes in self.ordered.items()},
+            'owners': self.owners, 'prices': self.prices,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'JournalState':
+        state = cls()
+        state.seq = data.get('seq', 0)
+        state.date = data.get('date', state.date)
+        state.orders = data.get('orders', {})
+        for oid, order in state.orders.items():
+            order.setdefault('oid', oid)  # 이전 형식("buy:005930" 키) 스냅샷 호환
+            state._index(oid, order)
+        state.ordered = {name: set(codes) for name, codes in data.get('ordered', {}).items()}
+        state.owners = data.get('owners', {})
+        state.prices = data.get('prices', {})
+        return state
+
+
+class TradeJournal:
+    """
+    주문/포지션 저널
+
+    사용 예:
+        journal = TradeJournal(name=user_id)      # 생성 시 스냅샷 + 저널 재적용으로 상태 복원
+        rec = journal.append('intent', code=code, side='buy', qty=qty, price=price, held=0, strategy=name, reserve=amt)
+        ret = kiwoom.send_order(...)
+        if ret != 0: journal.append('reject', oid=rec['seq'], code=code, side='buy')
+        ...
+        journal.request_snapshot(prices)          # 주기 스냅샷 (작업 스레드에서 기록)
+        journal.close()                           # 스냅샷 기록 후 종료
+    """
+
+    def __init__(self, root: str = "journal", name: str = "trading",
+                 fsync_ms: int = 50, compact_every: int = 5000):
+        """
+        Args:
+            root: 저널 디렉토리
+            name: 파일 이름 (사용자 ID 등)
+            fsync_ms: fsync 묶음 간격 (이 시간 안의 레코드는 fsync 1회로 디스크 반영)
+            compact_every: 저널 레코드가 이 건수를 넘으면 자동 압축
+        """
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, f"{name}.jnl")
+        self.snap_path = os.path.join(root, f"{name}.snap")
+        self.old_path = self.path + ".old"
+        self.fsync_sec = fsync_ms / 1000
+        self.compact_every = compact_every
+
+        self.stats = {'records': 0, 'fsyncs': 0, 'compactions': 0, 'replayed': 0,
+                      'torn': 0, 'recover_ms': 0.0}
+        self._lock = threading.Lock()       # 저널 파일/상태
+        self._snap_lock = threading.Lock()  # 스냅샷 1건씩 (직렬화 → 파일 기록 → 이전 저널 삭제)
+        self._snap_request = None           # 작업 스레드가 처리할 스냅샷 요청 (prices,)
+
+        self._good_offset = 0  # 마지막 정상 레코드 끝 위치 (잘린 줄 이후는 잘라냄)
+        t0 = time.perf_counter()
+        self.state = self._recover()
+        self.stats['recover_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+        self._pending = self.stats['replayed']  # 마지막 스냅샷 이후 레코드 수
+        if os.path.exists(self.old_path):
+            # 이전 실행이 스냅샷 기록 중 종료됨: 재적용한 상태를 먼저 스냅샷으로 남긴 뒤 이전 저널 삭제
+            self._write_snapshot(json.dumps(self.state.to_dict(), ensure_ascii=False))
+            os.remove(self.old_path)
+
+        self._file = open(self.path, 'ab')
+        if self._file.tell() != self._good_offset:
+            # 기록 도중 종료된 마지막 줄 제거 (다음 레코드가 조각 뒤에 붙으면 이후 복원에서 모두 유실)
+            self._file.truncate(self._good_offset)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._dirty = False
+        self._closed = False
+        self._wake = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="TradeJournalSync", daemon=True)
+        self._worker.start()
+
+        today = datetime.now().strftime('%Y%m%d')
+        if self.state.date != today:
+            self.append('day', date=today)
+
+    # ========== 기록 ==========
+
+    def append(self, kind: str, **fields) -> Dict:
+        """레코드 1건 기록 + 상태 반영 (호출 스레드 무관)"""
+        with self._lock:
+            rec = {'seq': self.state.seq + 1, 'k': kind, 'ts': round(time.time(), 3), **fields}
+            if kind == 'intent':
+                rec.setdefault('date', self.state.date)
+            self._file.write(json.dumps(rec, ensure_ascii=False).encode('utf-8') + b"\n")
+            self._file.flush()
+            self.state.apply(rec)
+            self._dirty = True
+            self._pending += 1
+            self.stats['records'] += 1
+            compact = self._pending >= self.compact_every
+            if compact and self._snap_request is None:
+                self._snap_request = (None,)  # 자동 압축은 작업 스레드에서
+        self._wake.set()
+        return rec
+
+    def request_snapshot(self, prices: Dict[str, Dict] = None):
+        """스냅샷 요청 (파일 기록은 작업 스레드가 수행, 엔진/GUI 스레드에서 호출)"""
+        with self._lock:
+            self._snap_request = (prices,)
+        self._wake.set()
+
+    def snapshot(self, prices: Dict[str, Dict] = None):
+        """상태 스냅샷 기록 후 저널 비우기 (prices: 실시간 시세 캐시, 재시작 시 복원)"""
+        with self._snap_lock:
+            with self._lock:
+                if prices is not None:
+                    self.state.prices = {code: {k: v for k, v in data.items() if k != 'recv_ns'}
+                                         for code, data in prices.items()}
+                payload = json.dumps(self.state.to_dict(), ensure_ascii=False)
+                self._snap_request = None
+                if not os.path.exists(self.old_path):
+                    # 지금까지의 저널은 .old로 넘기고 새 저널에 이어서 기록
+                    # (스냅샷 교체 전에 종료되어도 .old + 새 저널 재적용, seq 비교로 중복 없음)
+                    self._file.close()
+                    os.replace(self.path, self.old_path)
+                    self._file = open(self.path, 'wb')
+                    self._dirty = False
+                self._pending = 0
+            self._write_snapshot(payload)
+            if os.path.exists(self.old_path):
+                os.remove(self.old_path)
+            self.stats['compactions'] += 1
+
+    def _write_snapshot(self, payload: str):
+        """스냅샷 파일 기록 (임시 파일 → fsync → 원자적 교체)"""
+        tmp_path = self.snap_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snap_path)
+
+    def sync(self):
+        """즉시 fsync"""
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self.stats['fsyncs'] += 1
+
+    def close(self, prices: Dict[str, Dict] = None):
+        """스냅샷 기록 후 종료"""
+        if self._closed:
+            return
+        self.snapshot(prices)
+        self._closed = True
+        self._wake.set()
+        self._worker.join(timeout=2)
+        with self._lock:
+            self._file.close()
+
+    def _run(self):
+        """fsync 묶음 처리 (첫 레코드 후 fsync_ms 동안 모인 레코드를 1회로) + 스냅샷 요청 처리"""
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                break
+            time.sleep(self.fsync_sec)
+            try:
+                self.sync()
+                request = self._snap_request
+                if request is not None and not self._closed:
+                    self.snapshot(request[0])
+            except (OSError, ValueError) as e:
+                print(f"⚠️ [저널] 동기화/스냅샷 실패: {e}")
+
+    # ========== 복원 ==========
+
+    def _recover(self) -> JournalState:
+        """스냅샷 + 저널 재적용"""
+        state = JournalState()
+        if os.path.exists(self.snap_path):
+            try:
+                with open(self.snap_path, 'r', encoding='utf-8') as f:
+                    state = JournalState.from_dict(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ [저널] 스냅샷 로드 실패, 저널만 재적용: {e}")
+
+        # 스냅샷 기록 중 종료되었으면 이전 저널(.old)부터 재적용
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("줄바꿈 없음")
+                        rec = json.loads(line)
+                    except ValueError:
+                        self.stats['torn'] += 1  # 기록 도중 종료된 마지막 줄
+                        break
+                    if path == self.path:
+                        self._good_offset += len(line)
+                    if rec['seq'] <= state.seq:
+                        continue
+                    state.apply(rec)
+                    self.stats['replayed'] += 1
+        return state
+
+    def summary(self) -> str:
+        return (f"미완료 주문 {len(self.state.orders)}건 | 예약 현금 {self.state.reserved_total():,}원 | "
+                f"재적용 {self.stats['replayed']}건 ({self.stats['recover_ms']}ms)")
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    print("=" * 50)
+    print("주문 저널 벤치마크 (기록 / 비정상 종료 후 복원)")
+    print("=" * 50)
+
+    root = tempfile.mkdtemp()
+    try:
+        journal = TradeJournal(root=root, name="bench", compact_every=10 ** 9)
+        n = 20000
+        t0 = time.perf_counter()
+        for i in range(n):
+            code = f"{i % 500:06d}"
+            journal.append('intent', code=code, side='buy', qty=10, price=10000, held=0,
+                           strategy="변동성 돌파", reserve=100000)
+            journal.append('ack', code=code, side='buy', order_no=str(i))
+            journal.append('fill', code=code, side='buy', qty=10 if i % 7 else 4, price=10000)
+        elapsed = time.perf_counter() - t0
+        print(f"  레코드 {n * 3:,}건 기록: {elapsed * 1000:.1f}ms (건당 {elapsed / n / 3 * 1e6:.1f}us, fsync {journal.stats['fsyncs']}회)")
+
+        # 비정상 종료 흉내: close() 없이 마지막 줄을 잘라서 남김
+        journal.sync()
+        expected = journal.state.to_dict()
+        with open(journal.path, 'ab') as f:
+            f.write(b'{"seq": 99999999, "k": "fi')
+        restored = TradeJournal(root=root, name="bench")
+        print(f"  저널 재적용 복원: {restored.summary()} / 잘린 줄 {restored.stats['torn']}건")
+        assert restored.state.orders == expected['orders']
+
+        # 잘린 줄 제거 후 이어서 기록 → 다시 비정상 종료해도 새 레코드 유지
+        restored.append('intent', code="999999", side='buy', qty=1, price=1000, held=0,
+                        strategy="변동성 돌파", reserve=1000)
+        restored.sync()
+        expected = restored.state.to_dict()
+        second = TradeJournal(root=root, name="bench")
+        print(f"  연속 비정상 종료 후 복원: {second.summary()} / 잘린 줄 {second.stats['torn']}건")
+        assert second.state.orders == expected['orders'] and second.stats['torn'] == 0
+        second.close()
+
+        restored.snapshot()
+        again = TradeJournal(root=root, name="bench")
+        print(f"  스냅샷 복원: {again.summary()}")
+        assert again.state.orders == expected['orders']
+        again.close()
+        restored.close()
+
+        # 같은 종목 매수 주문 2건: 각각 추적 (두 번째 주문이 첫 주문을 덮어쓰지 않음)
+        multi = TradeJournal(root=root, name="multi")
+        first = multi.append('intent', code="005930", side='buy', qty=10, price=70000, held=0,
+                             strategy="변동성 돌파", reserve=700000)
+        multi.append('ack', code="005930", side='buy', order_no="0001")
+        multi.append('intent', code="005930", side='buy', qty=5, price=70100, held=0,
+                     strategy="변동성 돌파", reserve=350500)
+        multi.append('ack', code="005930", side='buy', order_no="0002")
+        multi.append('fill', code="005930", side='buy', qty=5, price=70100, order_no="0002")
+        print(f"  같은 종목 주문 2건: {multi.summary()}")
+        assert list(multi.state.orders) == [str(first['seq'])] and multi.state.reserved_total() == 700000
+
+        # 스냅샷 기록 중 비정상 종료 흉내: 저널 교체(.old)까지만 하고 스냅샷 파일은 이전 상태
+        expected = multi.state.to_dict()
+        multi.sync()
+        multi._file.close()
+        os.replace(multi.path, multi.old_path)
+        open(multi.path, 'wb').close()
+        crashed = TradeJournal(root=root, name="multi")
+        print(f"  스냅샷 기록 중 종료 후 복원: {crashed.summary()}")
+        assert crashed.state.orders == expected['orders'] and not os.path.exists(crashed.old_path)
+        crashed.close()
+
+        # 스냅샷 기록 중 append 지연 (파일 기록/fsync는 잠금 밖)
+        busy = TradeJournal(root=root, name="busy", compact_every=10 ** 9)
+        prices = {f"{i:06d}": {'current_price': 10000 + i, 'volume': i} for i in range(2000)}
+        worst = 0.0
+        busy.request_snapshot(prices)
+        t_end = time.perf_counter() + 0.3
+        while time.perf_counter() < t_end:
+            t0 = time.perf_counter()
+            busy.append('close', code="000000", side='buy')
+            worst = max(worst, time.perf_counter() - t0)
+        print(f"  스냅샷 {busy.stats['compactions']}회 중 append 최대 {worst * 1000:.2f}ms")
+        busy.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
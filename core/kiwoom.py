@@ -13,7 +13,10 @@ os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = plugin_path
 
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QAxContainer import QAxWidget
-from PyQt5.QtCore import QEventLoop, pyqtSignal, QObject
+from PyQt5.QtCore import QEventLoop, QTimer, pyqtSignal, QObject
+
+from .position_book import PositionBook
+from .latency import tracer
 
 
 class Kiwoom(QObject):
@@ -45,6 +48,7 @@ class Kiwoom(QObject):
         # 데이터 저장용 딕셔너리
         self.data = {}
         self.account_holdings = []
+        self.positions = PositionBook(self.account_holdings)  # 보유 종목 색인 (6자리 코드)
         self.account_summary = {}
         self.account_list = [] # [NEW] 계좌번호 리스트
         self.login_err_code = None
@@ -127,6 +131,16 @@ class Kiwoom(QObject):
             self.data['저가'] = self._get_comm_data(trcode, rqname, 0, "저가")
             self.data['체결강도'] = self._get_comm_data(trcode, rqname, 0, "체결강도")
         
+        elif rqname == "관심종목조회":
+            # 복수 종목 현재가 (OPTKWFID, 종목별 1행 - 현재가조회와 같은 키)
+            cnt = self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
+            quotes = {}
+            for i in range(cnt):
+                code = self._get_comm_data(trcode, rqname, i, "종목코드")
+                quotes[code] = {key: self._get_comm_data(trcode, rqname, i, key)
+                                for key in ("현재가", "종목명", "등락율", "거래량", "시가", "고가", "저가", "체결강도")}
+            self.data['관심종목'] = quotes
+        
         elif rqname == "예수금조회":
             # 예수금 데이터 추출
             self.data['예수금'] = self._get_comm_data(trcode, rqname, 0, "예수금")
@@ -180,6 +194,7 @@ class Kiwoom(QObject):
             self.data['보유종목'] = holdings
             # [FIX] 지속성 있는 멤버 변수에도 저장 (MainWindow에서 안정적으로 접근 가능하도록)
             self.account_holdings = holdings
+            self.positions.load(holdings)
             # 계좌 요약 정보도 저장
             self.account_summary = {
                 '총매입금액': self.data.get('총매입금액'),
@@ -229,7 +244,8 @@ class Kiwoom(QObject):
             order_type = self.ocx.dynamicCall("GetChejanData(int)", 905)  # 주문구분
             order_qty = self.ocx.dynamicCall("GetChejanData(int)", 900)  # 주문수량
             order_price = self.ocx.dynamicCall("GetChejanData(int)", 901)  # 주문가격
-            filled_qty = self.ocx.dynamicCall("GetChejanData(int)", 911)  # 체결수량
+            filled_qty = self.ocx.dynamicCall("GetChejanData(int)", 911)  # 체결수량 (주문별 누적)
+            unit_qty = self.ocx.dynamicCall("GetChejanData(int)", 915)  # 단위체결량 (이번 체결분)
             filled_price = self.ocx.dynamicCall("GetChejanData(int)", 910)  # 체결가격
             order_status = self.ocx.dynamicCall("GetChejanData(int)", 913)  # 주문상태 (접수/체결/확인 등)
             
@@ -237,7 +253,7 @@ class Kiwoom(QObject):
             print(f"   주문번호: {order_no}")
             print(f"   주문구분: {order_type}")
             print(f"   주문상태: {order_status}")
-            print(f"   체결수량: {filled_qty} / {order_qty}")
+            print(f"   체결수량: {filled_qty} / {order_qty} (이번 체결 {unit_qty})")
             print(f"   체결가격: {filled_price}원")
             
             # [NEW] UI 및 전략으로 체결 정보 전송
@@ -247,16 +263,21 @@ class Kiwoom(QObject):
                 '종목명': stock_name,
                 '주문구분': order_type, # +매수, -매도
                 '주문상태': order_status, # [NEW] 접수/체결 구분용
-                '체결수량': filled_qty,
+                '체결수량': filled_qty, # 누적
+                '단위체결량': unit_qty, # 이번 체결분 (잔고/장부 반영 기준)
                 '체결가격': filled_price,
                 '주문수량': order_qty,
                 '주문가격': order_price
             }
+            if tracer.enabled:
+                tracer.on_chejan(stock_code, 'buy' if "매수" in order_type else 'sell', order_status.strip())
             self.sig_chejan_received.emit("0", info)
 
     def _on_receive_real_data(self, code, real_type, real_data):
         """실시간 데이터 수신 (OnReceiveRealData)"""
         if real_type == "주식체결":
+            # 수신 시각은 이벤트 진입 즉시 기록 (엔진/지연 측정 공통 기준, FID 조회 시간 포함)
+            recv_ns = time.perf_counter_ns()
             # 현재가 (FID 10)
             current_price = self.ocx.dynamicCall("GetCommRealData(QString, int)", code, 10)
             current_price = abs(int(current_price))
@@ -267,12 +288,16 @@ class Kiwoom(QObject):
             volume = self.ocx.dynamicCall("GetCommRealData(QString, int)", code, 13)
             # 체결강도 (FID 228)
             strength = self.ocx.dynamicCall("GetCommRealData(QString, int)", code, 228)
+            # 시가 (FID 16) - 변동성 돌파 목표가 확정용
+            open_price = self.ocx.dynamicCall("GetCommRealData(QString, int)", code, 16)
             
             data = {
                 'current_price': float(current_price),
                 'rate': float(rate) if rate else 0.0,
                 'volume': int(volume) if volume else 0,
-                'strength': float(strength) if strength else 0.0
+                'strength': float(strength) if strength else 0.0,
+                'open': abs(int(open_price)) if open_price else 0,
+                'recv_ns': recv_ns
             }
             
             # 메인 윈도우로 전송
@@ -357,11 +382,18 @@ class Kiwoom(QObject):
         return self.ocx.dynamicCall("GetConnectState()")
     
     def _wait_rate_limit(self):
-        """API 요청 제한 대기 (초당 3~4회 제한 준수)"""
-        elapsed = time.time() - self.last_req_time
-        if elapsed < 0.25:  # 250ms 미만 경과 시 대기
-            time.sleep(0.25 - elapsed)
-        self.last_req_time = time.time()
+        """
+        API 요청 제한 대기 (초당 3~4회 제한 준수)
+        sleep 대신 이벤트 루프로 대기하여 대기 중에도 엔진의 주문 실행/실시간 이벤트가 처리됩니다.
+        대기 전에 요청 슬롯을 먼저 잡으므로 대기 중 들어온 다른 TR은 그 뒤 슬롯을 기다립니다.
+        """
+        now = time.time()
+        slot = max(now, self.last_req_time + 0.25)  # 250ms 간격
+        self.last_req_time = slot
+        if slot > now:
+            loop = QEventLoop()
+            QTimer.singleShot(int((slot - now) * 1000) + 1, loop.quit)
+            loop.exec_()
 
     def get_login_info(self, tag):
         """로그인 정보 조회"""
@@ -383,6 +415,32 @@ class Kiwoom(QObject):
         
         return self.data.copy()
 
+    def get_current_prices(self, stock_codes):
+        """
+        복수 종목 현재가 조회 (CommKwRqData / OPTKWFID, TR 1회에 최대 100종목)
+        
+        Returns:
+            {종목코드: get_current_price와 같은 키의 딕셔너리} (응답 없는 종목은 제외)
+        """
+        codes = list(stock_codes)[:100]
+        if not codes:
+            return {}
+        self._wait_rate_limit()
+        self.data['관심종목'] = {}
+        ret = self.ocx.dynamicCall(
+            "CommKwRqData(QString, bool, int, int, QString, QString)",
+            ";".join(codes), 0, len(codes), 0, "관심종목조회", "0105"
+        )
+        
+        if ret != 0:
+            print(f"❌ TR 요청 실패 (코드: {ret})")
+            return {}
+        
+        self.loops['관심종목조회'] = QEventLoop()
+        self.loops['관심종목조회'].exec_()
+        
+        return dict(self.data.get('관심종목', {}))
+
     def set_real_reg(self, codes, fid_list="10", opt_type="1"):
         """
         실시간 데이터 등록 (SetRealReg)
@@ -399,6 +457,10 @@ class Kiwoom(QObject):
                              "1000", codes, fid_list, opt_type)
         # print(f"📡 실시간 등록 요청: {codes} (FID: {fid_list})")
     
+    def set_real_remove(self, code, screen_no="1000"):
+        """실시간 데이터 해제 (SetRealRemove, code="ALL"이면 화면 전체)"""
+        self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+    
     def get_account_balance(self, account_no):
         """
         예수금 조회 (opw00001 TR 사용)
@@ -454,10 +516,13 @@ class Kiwoom(QObject):
         """
         hoga_type = "03" if price == 0 else "00"
         
+        started_ns = tracer.now() if tracer.enabled else 0
         # dynamicCall 대신 직접 메서드 호출하여 8개 인자 제한 회피
         result = self.ocx.SendOrder(
             "주문", "0104", account_no, order_type, stock_code, int(quantity), int(price), hoga_type, ""
         )
+        if started_ns:
+            tracer.on_send(stock_code, 'buy' if order_type == 1 else 'sell', started_ns, result == 0)
         
         if result == 0:
             type_str = "매수" if order_type == 1 else "매도"
@@ -0,0 +1,287 @@
+"""
+주문 지연 측정 모듈 (Latency Tracer)
+실시간 틱 수신부터 주문 전송, 체결 통보까지 구간별 지연을 히스토그램으로 누적합니다.
+
+    OnReceiveRealData ─ tick→eval ─→ TradingManager.on_real_data (판정 시작)
+                      ─ tick→signal ─→ 매수/매도 판정 (_dispatch)
+                      ─ tick→done ─→ 판정 완료 (TradingEngine, 항상 기록)
+                      ─ signal→exec ─→ 엔진 신호 → GUI 스레드 실행 (TradingEngine, 항상 기록)
+                      ─ signal→send ─→ Kiwoom.send_order (엔진 모드에서는 GUI 스레드 이동 포함)
+                                       └ send_call: SendOrder 호출 자체
+                      ─ send→accept ─→ OnReceiveChejanData (접수)
+                      ─ send→fill / tick→fill ─→ OnReceiveChejanData (체결)
+    gui_stall: GUI 하트비트 지연 (TradingEngine, 항상 기록)
+
+- 모든 구간 히스토그램은 이 모듈의 tracer 1곳에 모이고, TradingEngine.metrics()도 여기서 읽음
+- 꺼져 있으면 호출부의 `if tracer.enabled:` 확인 1회만 남음 (측정 코드 자체를 건너뜀, 엔진 구간은 예외)
+- 구간별 히스토그램은 기록 스레드가 하나뿐이므로 잠금 없이 리스트 칸만 증가
+  (틱 구간은 엔진/실시간 스레드, 주문/체결/GUI 구간은 GUI 스레드)
+- 진행 중인 주문은 (매수/매도, 종목코드)로 구분 (같은 종목의 매수/매도가 겹쳐도 섞이지 않음)
+- 버킷은 2배 구간을 4등분한 로그 눈금 (상대 오차 약 19% 이내), 최댓값은 별도로 정확히 기록
+"""
+import csv
+import json
+import time
+from typing import Dict, List
+
+from .position_book import normalize_code
+
+
+SUB_BITS = 2                     # 2배 구간당 4칸
+LINEAR = 1 << (SUB_BITS + 2)     # 16ns 미만은 1ns 단위
+NUM_BUCKETS = 192                # 약 2^48ns (78시간)까지, 초과분은 마지막 칸
+
+STAGES = ('tick→eval', 'tick→signal', 'tick→done', 'signal→exec', 'signal→send', 'send_call',
+          'send→accept', 'send→fill', 'tick→fill', 'gui_stall')
+
+
+def bucket_index(ns: int) -> int:
+    """지연(ns) → 버킷 번호"""
+    if ns < LINEAR:
+        return ns if ns > 0 else 0
+    exp = ns.bit_length() - 1
+    idx = LINEAR + ((exp - SUB_BITS - 2) << SUB_BITS) + ((ns >> (exp - SUB_BITS)) & ((1 << SUB_BITS) - 1))
+    return idx if idx < NUM_BUCKETS else NUM_BUCKETS - 1
+
+
+def bucket_upper(idx: int) -> int:
+    """버킷 번호 → 해당 칸의 상한 (ns)"""
+    if idx < LINEAR:
+        return idx
+    k = idx - LINEAR
+    exp = (k >> SUB_BITS) + SUB_BITS + 2
+    sub = k & ((1 << SUB_BITS) - 1)
+    return ((1 << SUB_BITS) + sub + 1) << (exp - SUB_BITS)
+
+
+class LatencyHistogram:
+    """구간 1개의 지연 분포 (단일 기록 스레드 전용, 읽기는 어느 스레드든 가능)"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts: List[int] = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        if ns < LINEAR:
+            idx = ns if ns > 0 else 0
+        else:
+            exp = ns.bit_length() - 1
+            idx = LINEAR + ((exp - SUB_BITS - 2) << SUB_BITS) + ((ns >> (exp - SUB_BITS)) & ((1 << SUB_BITS) - 1))
+            if idx >= NUM_BUCKETS:
+                idx = NUM_BUCKETS - 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """q(0~1) 분위 지연 (버킷 상한, 최댓값을 넘지 않음)"""
+        counts = list(self.counts)
+        n = sum(counts)
+        if n == 0:
+            return 0
+        rank = max(1, int(n * q + 0.999999))
+        seen = 0
+        for idx, c in enumerate(counts):
+            seen += c
+            if seen >= rank:
+                return min(bucket_upper(idx), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """{count, mean_us, p50_us, p90_us, p99_us, max_us}"""
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count / 1e3, 1) if self.count else 0.0,
+            'p50_us': round(self.percentile(0.50) / 1e3, 1),
+            'p90_us': round(self.percentile(0.90) / 1e3, 1),
+            'p99_us': round(self.percentile(0.99) / 1e3, 1),
+            'max_us': round(self.max / 1e3, 1),
+        }
+
+    def reset(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class LatencyTracer:
+    """
+    틱 → 주문 → 체결 구간 지연 측정기 (모듈 전역 tracer 1개를 공유)
+
+    사용 예 (수신 시각 data['recv_ns']는 Kiwoom이 항상 기록, 구간 기록은 enabled 확인 후 호출):
+        if tracer.enabled:
+            tracer.on_eval(code, data)           # 판정 시작
+        ...
+        if tracer.enabled:
+            tracer.on_signal(code, 'buy')        # 매수/매도 판정
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.now = time.perf_counter_ns
+        self.stages: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in STAGES}
+        self._eval_recv: Dict[str, int] = {}  # {종목코드: 판정 중인 틱의 수신 ns} (판정 스레드 기록)
+        self._signals: Dict[tuple, tuple] = {}  # {(구분, 종목코드): (수신 ns, 판정 ns)}
+        self._orders: Dict[tuple, list] = {}    # {(구분, 종목코드): [수신 ns, 전송 ns, 접수 여부]}
+
+    def set_enabled(self, enabled: bool):
+        """측정 켜기/끄기 (켤 때 이전 진행 중 구간은 버림)"""
+        if enabled and not self.enabled:
+            self._eval_recv.clear()
+            self._signals.clear()
+            self._orders.clear()
+        self.enabled = enabled
+
+    # ---------- 구간 기록 ----------
+
+    def on_eval(self, code: str, data: Dict):
+        """전략 판정 시작 (TradingManager.on_real_data)"""
+        recv_ns = data.get('recv_ns')
+        if recv_ns is None:
+            return
+        self._eval_recv[code] = recv_ns
+        self.stages['tick→eval'].record(self.now() - recv_ns)
+
+    def record(self, stage: str, ns: int):
+        """구간 1건 직접 기록 (TradingEngine의 상시 구간: tick→done, signal→exec, gui_stall)"""
+        self.stages[stage].record(ns)
+
+    def on_signal(self, code: str, side: str):
+        """매수/매도 판정 (판정 스레드, on_eval 직후, side: 'buy'/'sell')"""
+        recv_ns = self._eval_recv.get(code)
+        if recv_ns is None:
+            return
+        now = self.now()
+        self._signals[(side, code)] = (recv_ns, now)
+        self.stages['tick→signal'].record(now - recv_ns)
+
+    def on_send(self, code: str, side: str, started_ns: int, ok: bool):
+        """SendOrder 호출 완료 (Kiwoom.send_order, started_ns: 호출 직전 시각)"""
+        key = (side, normalize_code(code))
+        now = self.now()
+        self.stages['send_call'].record(now - started_ns)
+        signal = self._signals.pop(key, None)
+        if signal is not None:
+            self.stages['signal→send'].record(started_ns - signal[1])
+        if ok:
+            self._orders[key] = [signal[0] if signal else 0, started_ns, False]
+
+    def on_chejan(self, code: str, side: str, status: str):
+        """체결 통보 (주문상태: 접수/체결/확인)"""
+        key = (side, normalize_code(code))
+        order = self._orders.get(key)
+        if order is None:
+            return
+        now = self.now()
+        if status == "접수":
+            if not order[2]:
+                order[2] = True
+                self.stages['send→accept'].record(now - order[1])
+        elif status == "체결":
+            # 첫 체결만 기록 (분할 체결의 나머지는 제외)
+            del self._orders[key]
+            self.stages['send→fill'].record(now - order[1])
+            if order[0]:
+                self.stages['tick→fill'].record(now - order[0])
+
+    # ---------- 조회/내보내기 ----------
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: hist.snapshot() for name, hist in self.stages.items()}
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for name, s in self.snapshot().items():
+            if not s['count']:
+                continue
+            lines.append(f"{name:<12} {s['count']:>7,}건 | p50 {s['p50_us']:>10,.1f}us | "
+                         f"p99 {s['p99_us']:>10,.1f}us | max {s['max_us']:>10,.1f}us")
+        return lines
+
+    def export(self, path: str):
+        """파일로 내보내기 (.csv: 구간별 요약, 그 외: 요약 + 버킷 분포 JSON)"""
+        snap = self.snapshot()
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['stage', 'count', 'mean_us', 'p50_us', 'p90_us', 'p99_us', 'max_us'])
+                for name, s in snap.items():
+                    writer.writerow([name, s['count'], s['mean_us'], s['p50_us'], s['p90_us'], s['p99_us'], s['max_us']])
+            return
+        payload = {
+            'exported_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stages': {
+                name: {**snap[name],
+                       'buckets': {bucket_upper(i): c for i, c in enumerate(hist.counts) if c}}
+                for name, hist in self.stages.items()
+            },
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        for hist in self.stages.values():
+            hist.reset()
+        self._eval_recv.clear()
+        self._signals.clear()
+        self._orders.clear()
+
+
+tracer = LatencyTracer()
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import random
+
+    print("=" * 50)
+    print("지연 측정 오버헤드 벤치마크")
+    print("=" * 50)
+
+    rng = random.Random(0)
+    values = [int(rng.lognormvariate(10, 2)) for _ in range(100_000)]
+
+    # 버킷 정확도: 분위 추정치와 정렬 기준 실제값 비교
+    hist = LatencyHistogram()
+    for v in values:
+        hist.record(v)
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+        print(f"  p{int(q * 100):<3} 추정 {hist.percentile(q):>12,}ns  실제 {exact:>12,}ns")
+
+    def tick_path(t: LatencyTracer, n: int):
+        data = {'current_price': 1000.0}
+        for i in range(n):
+            if t.enabled:
+                data['recv_ns'] = t.now()
+            if t.enabled:
+                t.on_eval("005930", data)
+
+    n = 1_000_000
+    for label, flag in (("꺼짐", False), ("켜짐", True)):
+        t = LatencyTracer(enabled=flag)
+        t0 = time.perf_counter()
+        tick_path(t, n)
+        elapsed = time.perf_counter() - t0
+        print(f"  측정 {label}: 틱당 {elapsed / n * 1e9:6.1f}ns")
+
+    t = LatencyTracer(enabled=True)
+    for _ in range(1000):
+        data = {'recv_ns': t.now()}
+        t.on_eval("005930", data)
+        t.on_signal("005930", 'buy')
+        started = t.now()
+        t.on_send("005930", 'buy', started, True)
+        t.on_chejan("A005930", 'buy', "접수")
+        t.on_chejan("A005930", 'buy', "체결")
+    for line in t.summary_lines():
+        print(f"  {line}")
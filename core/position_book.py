@@ -0,0 +1,123 @@
+"""
+보유 종목 인덱스 모듈 (Position Book)
+계좌 보유 종목(opw00018 결과)을 정규화된 6자리 종목코드로 색인합니다.
+
+- 실시간 틱/체결 처리에서 보유 여부, 매입가, 봇 매수 여부를 O(1)로 조회
+- 잔고 조회(opw00018) 시 전체 재구성, 체결 통보 시 수량/매입가 증분 반영
+- 항목은 account_holdings 리스트의 딕셔너리와 같은 객체 (한쪽 수정이 그대로 공유됨)
+"""
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+def normalize_code(code) -> str:
+    """종목코드 정규화 ("A005930", " 005930 " → "005930")"""
+    code = str(code).strip()
+    return code[-6:] if len(code) > 6 else code
+
+
+class PositionBook:
+    """
+    보유 종목 색인
+
+    사용 예:
+        book = kiwoom.positions
+        holding = book.get("005930")          # opw00018 항목 딕셔너리 또는 None
+        if holding and book.is_bot("005930"): ...
+
+    bot_source: 봇 매수 종목코드 집합을 돌려주는 함수 (Database.get_bot_stock_codes),
+                잔고 재구성 시 1회만 호출
+    """
+
+    def __init__(self, holdings: List[Dict] = None, bot_source: Callable = None):
+        self.items: List[Dict] = []      # account_holdings와 같은 리스트
+        self.index: Dict[str, Dict] = {}  # {6자리 코드: 보유 항목}
+        self.rows: Dict[str, int] = {}    # {6자리 코드: 보유 종목 테이블 행}
+        self.bot_codes = set()
+        self.exiting = set()              # 매도 주문 후 체결 대기 중 (중복 매도 방지)
+        self.bot_source = bot_source
+        self.load(holdings if holdings is not None else [])
+
+    # ---------- 조회 ----------
+
+    def __contains__(self, code) -> bool:
+        return code in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self.index.values()))
+
+    def get(self, code) -> Optional[Dict]:
+        """보유 항목 (code는 이미 6자리로 정규화된 값)"""
+        return self.index.get(code)
+
+    def qty(self, code) -> int:
+        h = self.index.get(code)
+        return int(h['보유수량']) if h else 0
+
+    def buy_price(self, code) -> int:
+        h = self.index.get(code)
+        return int(h.get('매입가', 0)) if h else 0
+
+    def is_bot(self, code) -> bool:
+        return code in self.bot_codes
+
+    def is_exiting(self, code) -> bool:
+        return code in self.exiting
+
+    def row(self, code) -> Optional[int]:
+        return self.rows.get(code)
+
+    # ---------- 갱신 ----------
+
+    def load(self, holdings: List[Dict]):
+        """잔고 조회 결과로 전체 재구성 (봇 매수 종목 집합도 함께 갱신)"""
+        self.items = holdings
+        self.index = {normalize_code(h['종목코드']): h for h in holdings}
+        self.rows = {}
+        self.exiting = set()  # 잔고 재조회 시 미체결 매도 상태도 초기화 (남은 보유분은 다시 감시)
+        if self.bot_source is not None:
+            self.bot_codes = set(self.bot_source())
+
+    def set_row(self, code, row: int):
+        self.rows[normalize_code(code)] = row
+
+    def mark_exiting(self, code):
+        self.exiting.add(normalize_code(code))
+
+    def mark_bot(self, code):
+        self.bot_codes.add(normalize_code(code))
+
+    def apply_buy(self, code, qty: int, price: int, name: str = "") -> Dict:
+        """매수 체결 반영 (평균 매입가 재계산, 봇 매수 종목으로 표시)"""
+        code = normalize_code(code)
+        holding = self.index.get(code)
+        if holding is None:
+            holding = {'종목코드': code, '종목명': name, '보유수량': 0, '매입가': 0, '현재가': price}
+            self.index[code] = holding
+            self.items.append(holding)
+        held = int(holding['보유수량'])
+        total = int(holding['매입가']) * held + price * qty
+        holding['보유수량'] = held + qty
+        holding['매입가'] = int(round(total / holding['보유수량']))
+        self.bot_codes.add(code)
+        return holding
+
+    def apply_sell(self, code, qty: int) -> int:
+        """매도 체결 반영 (수량 차감, 전량 매도 시 제거) → 차감 전 매입가 (보유 항목 없으면 0)"""
+        code = normalize_code(code)
+        holding = self.index.get(code)
+        if holding is None:
+            return 0
+        buy_price = int(holding.get('매입가', 0))
+        holding['보유수량'] = int(holding['보유수량']) - qty
+        if holding['보유수량'] <= 0:
+            del self.index[code]
+            self.rows.pop(code, None)
+            self.exiting.discard(code)
+            for i, h in enumerate(self.items):
+                if h is holding:
+                    del self.items[i]
+                    break
+        return buy_price
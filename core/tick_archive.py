@@ -0,0 +1,405 @@
+"""
+실시간 틱 아카이브 모듈 (Tick Archive)
+실시간 체결 틱을 종목별 타입 배열에 버퍼링했다가
+백그라운드 스레드에서 날짜별 컬럼 압축 파일로 저장합니다.
+"""
+import os
+import json
+import zlib
+import lzma
+import time
+import queue
+import struct
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# 컬럼 정의: (이름, array 타입코드, numpy dtype)
+TICK_COLUMNS = (
+    ('ts', 'q', np.int64),          # 수신 시각 (epoch ns)
+    ('price', 'i', np.int32),       # 현재가
+    ('volume', 'q', np.int64),      # 누적거래량
+    ('strength', 'f', np.float32),  # 체결강도
+    ('rate', 'f', np.float32),      # 등락율
+)
+
+CHUNK_MAGIC = b"DDTK1\n"
+CHUNK_EXT = ".tkz"
+
+
+def _compress(raw: bytes, codec: str) -> bytes:
+    if codec == 'lzma':
+        return lzma.compress(raw, preset=6)
+    return zlib.compress(raw, 1)
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == 'lzma':
+        return lzma.decompress(blob)
+    return zlib.decompress(blob)
+
+
+def _write_chunk(path: str, codes: List[str], counts: List[int],
+                 columns: Dict[str, np.ndarray], codec: str) -> int:
+    """컬럼 배열을 압축 청크 파일로 기록 (원자적 교체). 기록한 바이트 수 반환"""
+    payloads = []
+    col_meta = []
+    for name, _, dtype in TICK_COLUMNS:
+        blob = _compress(np.ascontiguousarray(columns[name], dtype=dtype).tobytes(), codec)
+        payloads.append(blob)
+        col_meta.append({'name': name, 'dtype': np.dtype(dtype).str, 'size': len(blob)})
+
+    header = json.dumps({
+        'codes': codes,
+        'counts': counts,
+        'codec': codec,
+        'columns': col_meta
+    }).encode('utf-8')
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CHUNK_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for blob in payloads:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return len(CHUNK_MAGIC) + 4 + len(header) + sum(len(b) for b in payloads)
+
+
+def _read_chunk(path: str):
+    """청크 파일을 읽어 (codes, counts, columns) 반환"""
+    with open(path, 'rb') as f:
+        if f.read(len(CHUNK_MAGIC)) != CHUNK_MAGIC:
+            raise ValueError(f"틱 청크 형식 오류: {path}")
+        (header_len,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+        columns = {}
+        for meta in header['columns']:
+            raw = _decompress(f.read(meta['size']), header['codec'])
+            columns[meta['name']] = np.frombuffer(raw, dtype=np.dtype(meta['dtype']))
+    return header['codes'], header['counts'], columns
+
+
+class TickArchive:
+    """
+    실시간 틱 아카이버
+
+    - append(): GUI 스레드에서 호출, 종목별 array에 추가만 수행 (O(1))
+    - flush(): 버퍼를 통째로 교체하여 작업 스레드로 넘김 (복사 없음)
+    - 작업 스레드: numpy 컬럼 변환 → 압축 → 날짜별 청크 파일 기록
+
+    저장 구조:
+        {root}/{YYYYMMDD}/chunk_000001.tkz  (장중 flush 단위, zlib)
+        {root}/{YYYYMMDD}/sealed_000001.tkz (장 마감 후 병합본, lzma)
+    """
+
+    def __init__(self, root: str = "ticks", flush_threshold: int = 50000,
+                 codec: str = 'zlib'):
+        """
+        Args:
+            root: 아카이브 루트 디렉토리
+            flush_threshold: 버퍼 틱 수가 이 값을 넘으면 자동 flush
+            codec: 장중 청크 압축 방식 ('zlib' 또는 'lzma')
+        """
+        self.root = root
+        self.flush_threshold = flush_threshold
+        self.codec = codec
+
+        self._buffers = {}   # {code: (ts, price, volume, strength, rate) arrays}
+        self._pending = 0
+        self._seq = {}       # {date: 마지막 청크 번호}
+
+        self.stats = {
+            'ticks': 0,
+            'flushes': 0,
+            'chunks': 0,
+            'bytes_written': 0,
+            'errors': 0
+        }
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="TickArchiveWriter", daemon=True)
+        self._worker.start()
+
+    # ========== GUI 스레드 API ==========
+
+    def append(self, code: str, data: Dict, ts: int = None):
+        """실시간 틱 1건 버퍼링 (on_real_data 경로에서 호출)"""
+        buf = self._buffers.get(code)
+        if buf is None:
+            buf = tuple(array(typecode) for _, typecode, _ in TICK_COLUMNS)
+            self._buffers[code] = buf
+
+        buf[0].append(ts if ts is not None else time.time_ns())
+        buf[1].append(int(data.get('current_price', 0)))
+        buf[2].append(int(data.get('volume', 0)))
+        buf[3].append(float(data.get('strength', 0.0)))
+        buf[4].append(float(data.get('rate', 0.0)))
+
+        self._pending += 1
+        if self._pending >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """현재 버퍼를 작업 스레드로 넘김 (버퍼 교체만 수행)"""
+        if not self._pending:
+            return
+        buffers = self._buffers
+        self._buffers = {}
+        self.stats['ticks'] += self._pending
+        self._pending = 0
+        self.stats['flushes'] += 1
+        self._queue.put(('write', buffers))
+
+    def seal_day(self, date_str: str = None):
+        """해당 일자의 청크들을 lzma 단일 파일로 병합 (장 마감 후)"""
+        date_str = date_str or datetime.now().strftime('%Y%m%d')
+        self._queue.put(('seal', date_str))
+
+    def close(self, seal: bool = False, timeout: float = 10.0):
+        """남은 버퍼 기록 후 작업 스레드 종료"""
+        self.flush()
+        if seal:
+            self.seal_day()
+        self._queue.put(('stop', None))
+        self._worker.join(timeout)
+
+    @property
+    def pending(self) -> int:
+        """아직 flush되지 않은 틱 수"""
+        return self._pending
+
+    # ========== 작업 스레드 ==========
+
+    def _run(self):
+        while True:
+            task, payload = self._queue.get()
+            try:
+                if task == 'stop':
+                    return
+                if task == 'write':
+                    self._write_buffers(payload)
+                elif task == 'seal':
+                    self._seal(payload)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"❌ 틱 아카이브 기록 실패: {e}")
+
+    def _day_dir(self, date_str: str) -> str:
+        path = os.path.join(self.root, date_str)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _next_seq(self, date_str: str, day_dir: str) -> int:
+        if date_str not in self._seq:
+            last = 0
+            for filename in os.listdir(day_dir):
+                if filename.endswith(CHUNK_EXT):
+                    try:
+                        last = max(last, int(filename.rsplit('_', 1)[1].split('.')[0]))
+                    except ValueError:
+                        pass
+            self._seq[date_str] = last
+        self._seq[date_str] += 1
+        return self._seq[date_str]
+
+    def _write_buffers(self, buffers: Dict):
+        # 일자별로 분할 (장중에는 보통 하나)
+        by_date = {}
+        for code, buf in buffers.items():
+            ts = np.frombuffer(buf[0], dtype=np.int64)
+            if not len(ts):
+                continue
+            date_str = datetime.fromtimestamp(int(ts[0]) / 1e9).strftime('%Y%m%d')
+            by_date.setdefault(date_str, []).append((code, buf))
+
+        for date_str, items in by_date.items():
+            codes = [code for code, _ in items]
+            counts = [len(buf[0]) for _, buf in items]
+            columns = {}
+            for i, (name, _, dtype) in enumerate(TICK_COLUMNS):
+                columns[name] = np.concatenate([np.frombuffer(buf[i], dtype=dtype) for _, buf in items])
+
+            day_dir = self._day_dir(date_str)
+            seq = self._next_seq(date_str, day_dir)
+            path = os.path.join(day_dir, f"chunk_{seq:06d}{CHUNK_EXT}")
+            self.stats['bytes_written'] += _write_chunk(path, codes, counts, columns, self.codec)
+            self.stats['chunks'] += 1
+
+    def _seal(self, date_str: str):
+        day_dir = os.path.join(self.root, date_str)
+        if not os.path.isdir(day_dir):
+            return
+        chunk_files = sorted(f for f in os.listdir(day_dir) if f.startswith("chunk_") and f.endswith(CHUNK_EXT))
+        if not chunk_files:
+            return
+
+        codes, counts, columns = _merge_chunks([os.path.join(day_dir, f) for f in chunk_files])
+        seq = self._next_seq(date_str, day_dir)
+        path = os.path.join(day_dir, f"sealed_{seq:06d}{CHUNK_EXT}")
+        self.stats['bytes_written'] += _write_chunk(path, codes, counts, columns, 'lzma')
+
+        for filename in chunk_files:
+            os.remove(os.path.join(day_dir, filename))
+        print(f"✅ 틱 아카이브 병합 완료: {date_str} ({sum(counts):,}틱, {len(codes)}종목)")
+
+
+def _merge_chunks(paths: List[str]):
+    """여러 청크를 읽어 (종목, 시각) 순으로 정렬된 단일 컬럼 세트로 병합"""
+    code_ids = []
+    parts = {name: [] for name, _, _ in TICK_COLUMNS}
+    code_index = {}
+
+    for path in paths:
+        codes, counts, columns = _read_chunk(path)
+        ids = np.repeat(np.array([code_index.setdefault(c, len(code_index)) for c in codes], dtype=np.int32),
+                        np.array(counts, dtype=np.int64))
+        code_ids.append(ids)
+        for name in parts:
+            parts[name].append(columns[name])
+
+    if not code_ids:
+        return [], [], {name: np.empty(0, dtype=dtype) for name, _, dtype in TICK_COLUMNS}
+
+    all_codes = sorted(code_index, key=code_index.get)
+    ids = np.concatenate(code_ids)
+    merged = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+    # 종목코드 사전순 → 시각순 정렬
+    rank = np.empty(len(all_codes), dtype=np.int32)
+    rank[np.argsort(np.array(all_codes))] = np.arange(len(all_codes), dtype=np.int32)
+    order = np.lexsort((merged['ts'], rank[ids]))
+    merged = {name: col[order] for name, col in merged.items()}
+
+    sorted_codes = sorted(all_codes)
+    counts = np.bincount(rank[ids], minlength=len(all_codes)).tolist()
+    return sorted_codes, counts, merged
+
+
+class TickDay:
+    """하루치 틱 데이터 (memory-mapped 컬럼 뷰)"""
+
+    def __init__(self, date_str: str, columns: Dict[str, np.ndarray], index: Dict[str, List[int]]):
+        self.date = date_str
+        self.columns = columns
+        self.index = index  # {code: [start, end]}
+
+    @property
+    def codes(self) -> List[str]:
+        return list(self.index)
+
+    def __len__(self):
+        return len(self.columns['ts'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def for_code(self, code: str) -> Optional[Dict[str, np.ndarray]]:
+        """특정 종목의 컬럼 슬라이스 (복사 없음)"""
+        span = self.index.get(code)
+        if span is None:
+            return None
+        start, end = span
+        return {name: col[start:end] for name, col in self.columns.items()}
+
+
+class TickArchiveReader:
+    """
+    틱 아카이브 조회기 (리서치용)
+    하루치 청크를 압축 해제하여 {day}/columns/*.npy 로 캐시한 뒤 memory-map으로 엽니다.
+    """
+
+    def __init__(self, root: str = "ticks"):
+        self.root = root
+
+    def list_days(self) -> List[str]:
+        """저장된 일자 목록 (YYYYMMDD)"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if d.isdigit() and os.path.isdir(os.path.join(self.root, d)))
+
+    def open_day(self, date_str: str) -> Optional[TickDay]:
+        """하루치 틱을 memory-map으로 열기 (캐시가 오래되었으면 재생성)"""
+        day_dir = os.path.join(self.root, date_str)
+        if not os.path.isdir(day_dir):
+            return None
+
+        chunk_files = sorted(f for f in os.listdir(day_dir) if f.endswith(CHUNK_EXT))
+        if not chunk_files:
+            return None
+
+        cache_dir = os.path.join(day_dir, "columns")
+        index_path = os.path.join(cache_dir, "index.json")
+
+        index = None
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('sources') == chunk_files:
+                index = cached['index']
+
+        if index is None:
+            index = self._build_cache(day_dir, chunk_files, cache_dir, index_path)
+
+        columns = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r')
+                   for name, _, _ in TICK_COLUMNS}
+        return TickDay(date_str, columns, index)
+
+    def _build_cache(self, day_dir: str, chunk_files: List[str], cache_dir: str, index_path: str) -> Dict:
+        codes, counts, columns = _merge_chunks([os.path.join(day_dir, f) for f in chunk_files])
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, _, _ in TICK_COLUMNS:
+            np.save(os.path.join(cache_dir, f"{name}.npy"), columns[name])
+
+        index = {}
+        start = 0
+        for code, count in zip(codes, counts):
+            index[code] = [start, start + count]
+            start += count
+
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({'sources': chunk_files, 'index': index}, f)
+        return index
+
+
+# ========== 테스트 코드 ==========
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    print("=" * 50)
+    print("TickArchive 테스트")
+    print("=" * 50)
+
+    root = tempfile.mkdtemp(prefix="ticks_")
+    archive = TickArchive(root, flush_threshold=100000)
+
+    codes = [f"{i:06d}" for i in range(2000)]
+    n_ticks = 200000
+    base = time.time_ns()
+
+    start = time.perf_counter()
+    for i in range(n_ticks):
+        archive.append(codes[i % len(codes)], {
+            'current_price': 10000 + (i % 50), 'volume': i, 'strength': 101.5, 'rate': 1.2
+        }, ts=base + i)
+    elapsed = time.perf_counter() - start
+    print(f"\n[1] append {n_ticks:,}틱: {elapsed:.3f}s ({elapsed / n_ticks * 1e6:.2f}us/틱)")
+
+    archive.close(seal=True)
+    print(f"[2] 기록 통계: {archive.stats}")
+
+    reader = TickArchiveReader(root)
+    day = reader.open_day(reader.list_days()[0])
+    sample = day.for_code("000007")
+    print(f"[3] 조회: {len(day):,}틱, {len(day.codes)}종목, 000007 {len(sample['ts'])}틱 "
+          f"(가격 {int(sample['price'][0]):,})")
+
+    shutil.rmtree(root)
@@ -0,0 +1,138 @@
+"""
+매매 기록 컬럼형 내보내기 모듈 (Trade Export)
+매매 기록을 레코드 배치 단위의 컬럼형 바이너리(.ddtl)로 저장/조회합니다.
+
+파일 구조 (Arrow IPC 스트림과 유사):
+    MAGIC
+    [배치 헤더 길이(<I)][배치 헤더 JSON][컬럼 버퍼 ...]  (반복)
+    [0(<I)]  ← 종료 표시
+
+- 정수 컬럼: int64 원시 배열
+- 문자열 컬럼: int32 오프셋 배열(rows + 1) + UTF-8 데이터
+"""
+import json
+import struct
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+# 컬럼 정의: (이름, 타입) - trade_log 컬럼 순서와 동일
+TRADE_COLUMNS = (
+    ('id', 'int64'),
+    ('timestamp', 'utf8'),
+    ('stock_code', 'utf8'),
+    ('stock_name', 'utf8'),
+    ('trade_type', 'utf8'),
+    ('price', 'int64'),
+    ('quantity', 'int64'),
+    ('total_amount', 'int64'),
+    ('order_number', 'utf8'),
+    ('created_at', 'utf8'),
+    ('strategy', 'utf8'),
+    ('realized_profit', 'int64'),
+)
+
+BATCH_MAGIC = b"DDTL1\n"
+BATCH_EXT = ".ddtl"
+
+
+class TradeBatchWriter:
+    """
+    매매 기록 레코드 배치 기록기
+
+    사용 예:
+        with TradeBatchWriter("trades.ddtl") as writer:
+            for rows in db.iter_trades():
+                writer.write_batch(rows)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+        self._file = open(path, 'wb')
+        self._file.write(BATCH_MAGIC)
+
+    def write_batch(self, rows: List[Dict]):
+        """레코드 배치 1개 기록 (rows: 컬럼명 → 값 딕셔너리 리스트)"""
+        if not rows:
+            return
+
+        columns = []
+        buffers = []
+        for name, kind in TRADE_COLUMNS:
+            values = [row.get(name) for row in rows]
+            if kind == 'int64':
+                raw = np.array([int(v or 0) for v in values], dtype=np.int64).tobytes()
+                columns.append({'name': name, 'type': kind, 'sizes': [len(raw)]})
+                buffers.append(raw)
+            else:
+                encoded = [("" if v is None else str(v)).encode('utf-8') for v in values]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+                data = b"".join(encoded)
+                columns.append({'name': name, 'type': kind, 'sizes': [offsets.nbytes, len(data)]})
+                buffers.append(offsets.tobytes())
+                buffers.append(data)
+
+        header = json.dumps({'rows': len(rows), 'columns': columns}).encode('utf-8')
+        self._file.write(struct.pack('<I', len(header)))
+        self._file.write(header)
+        for buf in buffers:
+            self._file.write(buf)
+        self.rows_written += len(rows)
+
+    def close(self):
+        """종료 표시 기록 후 파일 닫기"""
+        if self._file and not self._file.closed:
+            self._file.write(struct.pack('<I', 0))
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_trade_batches(path: str) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    .ddtl 파일의 레코드 배치를 순서대로 반환 (배치 1개씩만 메모리에 적재)
+
+    Returns:
+        {컬럼명: 배열} - 정수는 int64 배열, 문자열은 object 배열
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(BATCH_MAGIC)) != BATCH_MAGIC:
+            raise ValueError(f"매매 기록 배치 파일이 아닙니다: {path}")
+
+        while True:
+            raw_len = f.read(4)
+            if len(raw_len) < 4:
+                break  # 종료 표시 없이 끝난 파일 (기록 중단)
+            (header_len,) = struct.unpack('<I', raw_len)
+            if header_len == 0:
+                break
+            header = json.loads(f.read(header_len).decode('utf-8'))
+
+            batch = {}
+            for col in header['columns']:
+                if col['type'] == 'int64':
+                    batch[col['name']] = np.frombuffer(f.read(col['sizes'][0]), dtype=np.int64)
+                else:
+                    offsets = np.frombuffer(f.read(col['sizes'][0]), dtype=np.int32)
+                    data = f.read(col['sizes'][1])
+                    values = np.empty(len(offsets) - 1, dtype=object)
+                    for i in range(len(values)):
+                        values[i] = data[offsets[i]:offsets[i + 1]].decode('utf-8')
+                    batch[col['name']] = values
+            yield batch
+
+
+def iter_trade_rows(path: str) -> Iterator[Dict]:
+    """.ddtl 파일을 레코드(딕셔너리) 단위로 반환 (가져오기용)"""
+    for batch in iter_trade_batches(path):
+        names = list(batch.keys())
+        for i in range(len(batch[names[0]])):
+            yield {name: batch[name][i].item() if isinstance(batch[name][i], np.generic) else batch[name][i]
+                   for name in names}
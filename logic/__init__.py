@@ -1,3 +1,14 @@
 from .trading_manager import TradingManager
 from .asset_manager import AssetManager
 from .strategy import Strategy, VolatilityBreakoutStrategy
+from .indicators import BarPanel
+from .rolling import IndicatorBook, CodeIndicators
+from .universe import Universe
+from .backtest import Backtester, BacktestResult
+from .optimizer import ParamSearch, apply_best
+from .walkforward import WalkForward
+from .simulator import Simulator, SimKiwoom, MatchingEngine
+from .profiles import VerificationQueue, compile_profile
+from .ranking import rank_candidates
+from .runtime import StrategyRuntime, SharedFeed, CapitalSlice
+from .engine import TradingEngine
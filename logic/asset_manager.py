@@ -1,11 +1,159 @@
 """
 자산 관리 모듈 (Asset Manager)
 사용자가 설정한 운용 금액 내에서만 매수가 가능하도록 자산을 관리합니다.
+종목별 매수 로트 장부(LotLedger)로 매도 체결의 매입 원금/실현손익을 FIFO로 계산합니다.
 """
 import json
 import os
+from collections import deque
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def _to_int(value) -> int:
+    try:
+        return int(str(value).replace(',', '').strip() or 0)
+    except ValueError:
+        return 0
+
+
+class LotLedger:
+    """
+    종목별 FIFO 매수 로트 장부
+
+    - 매수 체결: 로트 추가 O(1) / 매도 체결: 오래된 로트부터 차감 (소진한 로트 수만큼, 분할 체결 포함 상각 O(1))
+    - 종목별 보유 수량/매입 원금/실현손익 누계 유지 → 조회 O(1)
+    - 변경된 종목만 모아 flush()에서 DB 일괄 저장 (flush_every 종목 이상 쌓이면 자동 저장)
+    """
+
+    def __init__(self, db=None, flush_every: int = 50):
+        self.db = db
+        self.flush_every = flush_every
+        self.lots: Dict[str, deque] = {}   # {종목코드: deque([[수량, 매입가], ...])} (오래된 순)
+        self.qty: Dict[str, int] = {}
+        self.cost: Dict[str, int] = {}     # 남은 로트의 매입 원금 합계
+        self.realized: Dict[str, int] = {} # 종목별 누적 실현손익
+        self.total_cost = 0
+        self._dirty = set()
+        if self.db is not None:
+            self.load()
+
+    def load(self):
+        """DB에서 장부 로드 (전체 매매 기록 재생 없음)"""
+        self.lots, self.qty, self.cost, self.realized = {}, {}, {}, {}
+        self.total_cost = 0
+        for code, row in self.db.get_position_lots().items():
+            lots = deque([int(q), int(p)] for q, p in row['lots'] if int(q) > 0)
+            self.lots[code] = lots
+            self.qty[code] = sum(q for q, _ in lots)
+            self.cost[code] = sum(q * p for q, p in lots)
+            self.realized[code] = int(row['realized_profit'])
+            self.total_cost += self.cost[code]
+        self._dirty.clear()
+
+    # ---------- 조회 (O(1)) ----------
+
+    def position(self, code: str) -> Tuple[int, int]:
+        """(보유 수량, 매입 원금)"""
+        return self.qty.get(code, 0), self.cost.get(code, 0)
+
+    def avg_price(self, code: str) -> int:
+        qty = self.qty.get(code, 0)
+        return int(round(self.cost[code] / qty)) if qty else 0
+
+    def realized_profit(self, code: str) -> int:
+        return self.realized.get(code, 0)
+
+    # ---------- 체결 반영 ----------
+
+    def buy(self, code: str, qty: int, price: int):
+        """매수 체결 → 로트 추가"""
+        if qty <= 0:
+            return
+        self.lots.setdefault(code, deque()).append([qty, price])
+        self.qty[code] = self.qty.get(code, 0) + qty
+        self.cost[code] = self.cost.get(code, 0) + qty * price
+        self.total_cost += qty * price
+        self._touch(code)
+
+    def sell(self, code: str, qty: int, price: int) -> Tuple[int, int]:
+        """
+        매도 체결 → 오래된 로트부터 차감, 실현손익 누적
+
+        Returns:
+            (차감한 로트의 매입 원금, 장부에 없어 매칭하지 못한 수량)
+        """
+        basis, unmatched = self._consume(code, qty)
+        matched = qty - unmatched
+        if matched:
+            self.realized[code] = self.realized.get(code, 0) + matched * price - basis
+        return basis, unmatched
+
+    def _consume(self, code: str, qty: int) -> Tuple[int, int]:
+        lots = self.lots.get(code)
+        remaining = qty
+        basis = 0
+        while remaining > 0 and lots:
+            lot = lots[0]
+            take = lot[0] if lot[0] < remaining else remaining
+            basis += take * lot[1]
+            lot[0] -= take
+            remaining -= take
+            if lot[0] == 0:
+                lots.popleft()
+        if remaining != qty:
+            self.qty[code] -= qty - remaining
+            self.cost[code] -= basis
+            self.total_cost -= basis
+            self._touch(code)
+        return basis, remaining
+
+    def reconcile(self, holdings: Iterable[Dict], bot_codes) -> Dict:
+        """
+        잔고 조회 결과와 장부 수량 맞춤 (봇 매수 종목만, 장부 최초 생성/종료 중 누락 체결 보정)
+
+        - 장부보다 많이 보유: 차이만큼 로트 추가 (매입가 = 계좌 평균 매입가에서 장부 원금을 뺀 나머지)
+        - 장부보다 적게 보유: 오래된 로트부터 제거 (체결가를 알 수 없어 실현손익은 반영하지 않음)
+        """
+        result = {'added': 0, 'removed': 0}
+        held = {}
+        for h in holdings:
+            code = str(h.get('종목코드', '')).strip()
+            code = code[-6:] if len(code) > 6 else code
+            if code in bot_codes:
+                held[code] = (_to_int(h.get('보유수량')), _to_int(h.get('매입가')))
+        for code in set(held) | {c for c, q in self.qty.items() if q > 0}:
+            qty, avg = held.get(code, (0, 0))
+            diff = qty - self.qty.get(code, 0)
+            if diff > 0:
+                rest = qty * avg - self.cost.get(code, 0)
+                self.buy(code, diff, rest // diff if rest > 0 else avg)
+                result['added'] += 1
+            elif diff < 0:
+                self._consume(code, -diff)
+                result['removed'] += 1
+        return result
+
+    # ---------- 저장 ----------
+
+    def _touch(self, code: str):
+        self._dirty.add(code)
+        if len(self._dirty) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """변경된 종목만 DB 일괄 저장 (DB 쓰기 연결 스레드에서 호출)"""
+        if self.db is None or not self._dirty:
+            self._dirty.clear()
+            return
+        rows = {code: {'lots': [list(lot) for lot in self.lots.get(code, ())],
+                       'realized_profit': self.realized.get(code, 0)}
+                for code in self._dirty}
+        try:
+            self.db.save_position_lots(rows)
+            self._dirty.clear()
+        except Exception as e:
+            print(f"❌ 로트 장부 DB 저장 실패: {e}")
 
 
 class AssetManager:
@@ -30,6 +178,9 @@ class AssetManager:
         self.user_id = user_id
         self.config_file = f"asset_config_{user_id}.json" if user_id else "asset_config.json"
         
+        # 종목별 FIFO 매수 로트 장부 (체결 통보로 증분 갱신)
+        self.lots = LotLedger(db)
+        
         # DB가 있으면 DB 로드, 없으면 기본값
         if self.db and self.user_id:
             self.data = self._load_config_from_db()
@@ -227,34 +378,28 @@ class AssetManager:
         self.data['invested_amount'] = amount
         self._save_config()
 
-    def smart_sync_invested_amount(self, api_holdings: list, db_trades: list):
+    def smart_sync_invested_amount(self, api_holdings: list, db_trades: list = None):
         """
-        [Smart Sync] API 보유 종목 중 'DB 매매 기록'에 있는 종목만 추려서 D(매수 원금) 재계산
-        """
-        if not api_holdings:
-            self.data['invested_amount'] = 0
-            self._save_config()
-            return
-
-        total_bot_investment = 0
+        [Smart Sync] 로트 장부를 API 보유 종목에 맞춘 뒤 장부 원금 합계로 D(매수 원금) 재계산
         
-        # DB에 기록된 종목 코드 집합 (중복 제거)
-        bot_stock_codes = set([t['stock_code'] for t in db_trades])
+        Args:
+            db_trades: 봇 매수 종목 판별용 매매 기록 (생략 시 DB 종목별 롤업 사용, 전체 기록 재생 없음)
+        """
+        if db_trades is not None:
+            bot_stock_codes = {t['stock_code'] for t in db_trades}
+        elif self.db:
+            bot_stock_codes = self.db.get_bot_stock_codes()
+        else:
+            bot_stock_codes = set(self.lots.qty)
         
-        for holding in api_holdings:
-            code = holding.get('종목코드', '').replace('A', '').strip()
-            if code in bot_stock_codes:
-                try:
-                    # 매입가 * 수량
-                    avg_price = int(holding.get('매입가', '0').replace(',', ''))
-                    qty = int(holding.get('보유수량', '0').replace(',', ''))
-                    total_bot_investment += (avg_price * qty)
-                    print(f"🔄 [Smart Sync] 봇 관리 종목 식별: {holding.get('종목명')} ({qty}주)")
-                except: pass
+        result = self.lots.reconcile(api_holdings or [], bot_stock_codes)
+        self.lots.flush()
+        if result['added'] or result['removed']:
+            print(f"🔄 [Smart Sync] 로트 장부 보정: 추가 {result['added']}종목, 차감 {result['removed']}종목")
         
-        self.data['invested_amount'] = total_bot_investment
+        self.data['invested_amount'] = self.lots.total_cost
         self._save_config()
-        print(f"✅ [Smart Sync] 봇 운용 주식 매수 원금 재계산: {total_bot_investment:,}원")
+        print(f"✅ [Smart Sync] 봇 운용 주식 매수 원금 재계산: {self.lots.total_cost:,}원")
     
     def can_buy(self, amount: int) -> tuple[bool, str]:
         """매수 가능 여부 검증"""
@@ -309,3 +454,43 @@ class AssetManager:
     def get_available_cash(self): return self.available_cash
     def get_total_capital(self): return self.data['initial_capital']
     def get_holdings_value(self): return self.data['invested_amount'] # 의미 변경 주의
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("=" * 50)
+    print("로트 장부 벤치마크 (FIFO 체결 반영 / 종목별 조회)")
+    print("=" * 50)
+
+    rng = random.Random(0)
+    ledger = LotLedger()
+    codes = [f"{i:06d}" for i in range(200)]
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        code = codes[i % len(codes)]
+        if rng.random() < 0.55 or ledger.qty.get(code, 0) == 0:
+            ledger.buy(code, rng.randint(1, 20), rng.randint(9_000, 11_000))
+        else:
+            ledger.sell(code, rng.randint(1, ledger.qty[code]), rng.randint(9_000, 11_000))
+    elapsed = time.perf_counter() - t0
+    print(f"  체결 {n:,}건 반영: {elapsed * 1000:.1f}ms (건당 {elapsed / n * 1e6:.2f}us)")
+
+    # 누계와 로트 합계 일치 확인
+    for code in codes:
+        assert ledger.qty[code] == sum(q for q, _ in ledger.lots[code])
+        assert ledger.cost[code] == sum(q * p for q, p in ledger.lots[code])
+    assert ledger.total_cost == sum(ledger.cost.values())
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        for code in codes:
+            ledger.position(code)
+            ledger.realized_profit(code)
+    elapsed = time.perf_counter() - t0
+    print(f"  종목별 원금/실현손익 조회: {elapsed / (100 * len(codes)) * 1e9:.0f}ns")
+    print(f"  총 매입 원금 {ledger.total_cost:,}원 / 실현손익 합계 {sum(ledger.realized.values()):,}원")
@@ -0,0 +1,369 @@
+"""
+백테스트 엔진 (Backtest)
+저장된 일봉(BarPanel)으로 VolatilityBreakoutStrategy의 매수/매도 규칙을 재현합니다.
+
+- 매수: 당일 시가 + 전일 변동폭 * K 이상 도달 (check_buy_signal)
+- 매도: 매수가 대비 손절/익절 기준 도달 (check_sell_signal)
+- 발굴 프로필: 전고점 돌파 / 정배열 & 골든크로스 / 볼린저 상단 돌파 (전일까지의 봉으로 판정)
+- 수량: 종목당 최대 매수 금액 // 매수가 (AssetManager.calculate_order_qty), 가용 현금 내에서만 매수
+
+시간축(거래일)은 순서대로 진행하지만 매 거래일의 판정은 전 종목을 한 번에 벡터 연산합니다.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import indicators
+from .indicators import BarPanel
+
+
+# 발굴 프로필 키워드 (MainWindow 프로필 콤보와 동일)
+PROFILE_BREAKOUT = "전고점 돌파"
+PROFILE_TREND = "정배열"
+PROFILE_BOLLINGER = "볼린저"
+
+MAX_RISE_RATE = 20.0  # 고점 매수 방지 (전일 종가 대비 등락률 %)
+
+
+def _shift(x: np.ndarray, periods: int = 1, fill=np.nan) -> np.ndarray:
+    """시간축으로 periods만큼 뒤로 밀기 (t열에 t-periods 값)"""
+    out = np.full(x.shape, fill, dtype=x.dtype if fill is not np.nan else np.float64)
+    out[..., periods:] = x[..., :-periods]
+    return out
+
+
+def profile_mask(panel: BarPanel, profile: Optional[str]) -> np.ndarray:
+    """
+    프로필별 발굴 조건 (종목 수 × 거래일, 해당 일 종가 기준)
+
+    process_verification_queue의 판정과 같은 규칙을 전 구간에 적용합니다.
+    프로필이 없거나 '사용자 정의'면 모두 True.
+    """
+    close, high = panel.close, panel.high
+    with np.errstate(invalid='ignore'):
+        if profile and PROFILE_BREAKOUT in profile:
+            # 당일 종가 > 직전 20일 최고가
+            return close > _shift(indicators.rolling_max(high, 20))
+        if profile and PROFILE_TREND in profile:
+            ma5, ma20, ma60 = (indicators.sma(close, p) for p in (5, 20, 60))
+            aligned = (close > ma5) & (ma5 > ma20) & (ma20 > ma60)
+            return aligned & indicators.crossover(ma5, ma20)
+        if profile and PROFILE_BOLLINGER in profile:
+            upper, _, _ = indicators.bollinger(close, 20)
+            return close > upper
+    return ~np.isnan(close)
+
+
+def liquidity_mask(panel: BarPanel, min_vol: float) -> np.ndarray:
+    """거래량 필터 (당일 거래량 >= min_vol, 5일 평균 >= min_vol / 2)"""
+    volume = panel.volume
+    if min_vol <= 0:
+        return ~np.isnan(volume)
+    with np.errstate(invalid='ignore'):
+        return (volume >= min_vol) & (indicators.sma(volume, 5) >= min_vol / 2)
+
+
+class BacktestResult:
+    """백테스트 결과 (체결 내역, 일별 평가금액, 요약 지표)"""
+
+    def __init__(self, trades: List[Dict], equity: np.ndarray, dates: List[str],
+                 initial_capital: int, params: Dict):
+        self.trades = trades
+        self.equity = equity
+        self.dates = dates
+        self.initial_capital = initial_capital
+        self.params = params
+
+    @property
+    def total_pnl(self) -> int:
+        return int(round(self.equity[-1] - self.initial_capital)) if len(self.equity) else 0
+
+    @property
+    def return_pct(self) -> float:
+        return self.total_pnl / self.initial_capital * 100 if self.initial_capital else 0.0
+
+    @property
+    def drawdown(self) -> np.ndarray:
+        """일별 낙폭 (%, 직전 최고 평가금액 대비)"""
+        if not len(self.equity):
+            return self.equity
+        peak = np.maximum.accumulate(self.equity)
+        return (self.equity - peak) / peak * 100
+
+    @property
+    def max_drawdown(self) -> float:
+        """최대 낙폭 (%, 음수)"""
+        dd = self.drawdown
+        return float(dd.min()) if len(dd) else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return sum(1 for t in self.trades if t['pnl'] > 0) / len(self.trades) * 100
+
+    def summary(self) -> Dict:
+        """요약 지표"""
+        return {
+            'trades': len(self.trades),
+            'total_pnl': self.total_pnl,
+            'return_pct': round(self.return_pct, 2),
+            'max_drawdown': round(self.max_drawdown, 2),
+            'win_rate': round(self.win_rate, 2),
+            'final_equity': int(round(self.equity[-1])) if len(self.equity) else self.initial_capital,
+        }
+
+    def __repr__(self):
+        return f"BacktestResult({self.summary()})"
+
+
+class Backtester:
+    """
+    변동성 돌파 전략 백테스터
+
+    사용 예:
+        panel = BarPanel.from_dated_bars({code: db.get_daily_bars(code, 1000) for code in codes})
+        bt = Backtester(panel, strategy=strategy, asset_manager=asset_manager)
+        result = bt.run(profile="전고점 돌파 (Breakout)")
+        print(result.summary())
+
+    프로필/거래량 마스크는 파라미터별로 캐시되어 같은 패널로 여러 번 실행할 때 재사용됩니다.
+    """
+
+    def __init__(self, panel: BarPanel, strategy=None, asset_manager=None,
+                 capital: int = None, max_stock_amount: int = None,
+                 fee_rate: float = 0.0, tax_rate: float = 0.0):
+        """
+        Args:
+            panel: 거래일 정렬 일봉 패널 (BarPanel.from_dated_bars 권장)
+            strategy: 기본 파라미터 출처 (strategy.params)
+            asset_manager: 운용 자금/종목당 최대 매수 금액 출처
+            capital: 운용 자금 (asset_manager보다 우선)
+            max_stock_amount: 종목당 최대 매수 금액 (asset_manager보다 우선)
+            fee_rate: 매수/매도 수수료율 (양방향)
+            tax_rate: 매도 세율
+        """
+        self.panel = panel
+        self.strategy = strategy
+        if capital is None:
+            capital = asset_manager.current_capital if asset_manager else 10_000_000
+        if max_stock_amount is None:
+            max_stock_amount = asset_manager.get_max_stock_amount() if asset_manager else capital // 10
+        self.capital = int(capital)
+        self.max_stock_amount = int(max_stock_amount)
+        self.fee_rate = fee_rate
+        self.tax_rate = tax_rate
+        self._masks = {}
+
+        # 거래정지일 등 NaN 종가는 직전 종가로 평가
+        close = panel.close
+        valid = ~np.isnan(close)
+        idx = np.where(valid, np.arange(close.shape[1]), 0)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        self._mark = np.nan_to_num(close[np.arange(close.shape[0])[:, None], idx])
+
+    def save_masks(self, directory: str):
+        """
+        계산된 지표 마스크를 .npy로 저장 (다른 프로세스에서 load_masks로 재사용)
+        """
+        os.makedirs(directory, exist_ok=True)
+        keys = []
+        for i, (key, mask) in enumerate(self._masks.items()):
+            np.save(os.path.join(directory, f"mask_{i}.npy"), mask)
+            keys.append(list(key))
+        with open(os.path.join(directory, "masks.json"), 'w', encoding='utf-8') as f:
+            json.dump(keys, f, ensure_ascii=False)
+
+    def load_masks(self, directory: str, mmap_mode: Optional[str] = 'r'):
+        """save_masks로 저장한 마스크 로드 (기본: 읽기 전용 메모리 매핑)"""
+        path = os.path.join(directory, "masks.json")
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            keys = json.load(f)
+        for i, key in enumerate(keys):
+            self._masks[tuple(key)] = np.load(os.path.join(directory, f"mask_{i}.npy"), mmap_mode=mmap_mode)
+
+    def prepare(self, profiles: Sequence[Optional[str]] = (None,), min_vols: Sequence[float] = (0,)):
+        """프로필 × 최소 거래량 조합의 마스크와 목표가 기초 배열을 미리 계산"""
+        self._mask(('prev_range',), lambda: _shift(self.panel.high - self.panel.low))
+        self._mask(('prev_close',), lambda: _shift(self.panel.close))
+        for profile in profiles:
+            for min_vol in min_vols:
+                self.entry_mask(profile, min_vol)
+
+    def _mask(self, key, build):
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = build()
+        return mask
+
+    def entry_mask(self, profile: Optional[str], min_vol: float) -> np.ndarray:
+        """
+        t일 매수 후보 (t-1일 종가까지의 봉으로 판정, 미래 데이터 미사용)
+        """
+        def build():
+            screened = profile_mask(self.panel, profile) & liquidity_mask(self.panel, min_vol)
+            return _shift(screened, 1, fill=False)
+        return self._mask(('entry', profile, float(min_vol)), build)
+
+    def run(self, params: Dict = None, profile: str = None,
+            entry_filter: np.ndarray = None, max_hold: int = 0,
+            start: int = 0, end: int = None) -> BacktestResult:
+        """
+        백테스트 실행
+
+        Args:
+            params: 전략 파라미터 (k, stop_loss, take_profit, min_vol), 없으면 strategy.params
+            profile: 발굴 프로필 (None이면 프로필 필터 없음)
+            entry_filter: 추가 매수 조건 (종목 수 × 거래일 bool, 예: 분봉 추세 확인 결과)
+            max_hold: 최대 보유 거래일 (0이면 손절/익절까지 보유)
+            start, end: 매매 구간 (거래일 열 인덱스, end 미포함) - 지표는 전 구간으로 계산되어
+                        구간 이전 봉도 판정에 사용됩니다 (워크포워드/부분 구간 평가용)
+        """
+        merged = dict(self.strategy.params) if self.strategy else {}
+        merged.update(params or {})
+        k = float(merged.get('k', 0.5))
+        stop_rate = -abs(float(merged.get('stop_loss', -2.0))) / 100
+        take_rate = abs(float(merged.get('take_profit', 5.0))) / 100
+        min_vol = float(merged.get('min_vol', 0))
+
+        panel = self.panel
+        open_, high, low, close = panel.open, panel.high, panel.low, panel.close
+        n_codes, n_days = close.shape
+        end = n_days if end is None else min(end, n_days)
+        dates = panel.dates or [str(t) for t in range(n_days)]
+
+        prev_range = self._mask(('prev_range',), lambda: _shift(high - low))
+        prev_close = self._mask(('prev_close',), lambda: _shift(close))
+        candidates = self.entry_mask(profile, min_vol)
+        if entry_filter is not None:
+            candidates = candidates & entry_filter
+
+        qty = np.zeros(n_codes, dtype=np.int64)
+        entry_px = np.zeros(n_codes)
+        entry_day = np.full(n_codes, -1)
+        cash = float(self.capital)
+        equity = np.empty(max(end - start, 0))
+        trades = []
+        fee, tax = self.fee_rate, self.tax_rate
+
+        def close_positions(mask, price, reason, t):
+            nonlocal cash
+            for i in np.flatnonzero(mask):
+                px = float(price[i])
+                buy_amount = entry_px[i] * qty[i]
+                sell_amount = px * qty[i]
+                pnl = sell_amount - buy_amount - buy_amount * fee - sell_amount * (fee + tax)
+                cash += sell_amount * (1 - fee - tax)
+                trades.append({
+                    'code': panel.codes[i],
+                    'entry_date': dates[entry_day[i]],
+                    'exit_date': dates[t],
+                    'entry_price': int(entry_px[i]),
+                    'exit_price': int(round(px)),
+                    'quantity': int(qty[i]),
+                    'pnl': int(round(pnl)),
+                    'return_pct': round(float(pnl / buy_amount * 100), 2),
+                    'reason': reason,
+                })
+            qty[mask] = 0
+            entry_day[mask] = -1
+
+        with np.errstate(invalid='ignore'):
+            for t in range(start, end):
+                o, h, l, c = open_[:, t], high[:, t], low[:, t], close[:, t]
+                traded = ~np.isnan(c)
+
+                # 1. 보유 종목 매도 (시가 갭 → 장중 손절 → 장중 익절 순, 보수적)
+                held = (qty > 0) & traded
+                if held.any():
+                    stop_px = entry_px * (1 + stop_rate)
+                    take_px = entry_px * (1 + take_rate)
+                    gap_stop = held & (o <= stop_px)
+                    gap_take = held & ~gap_stop & (o >= take_px)
+                    rest = held & ~gap_stop & ~gap_take
+                    hit_stop = rest & (l <= stop_px)
+                    hit_take = rest & ~hit_stop & (h >= take_px)
+                    close_positions(gap_stop | gap_take, o, "시가갭", t)
+                    close_positions(hit_stop, stop_px, "손절", t)
+                    close_positions(hit_take, take_px, "익절", t)
+                    if max_hold:
+                        expired = (qty > 0) & traded & (t - entry_day >= max_hold)
+                        close_positions(expired, c, "보유기간", t)
+
+                # 2. 신규 매수 (목표가 돌파, 갭 상승 시 시가 체결)
+                # 목표가: 당일 시가 + int(전일 변동폭 * K)  (VolatilityBreakoutStrategy._build_plan)
+                target = o + np.floor(prev_range[:, t] * k)
+                buy = candidates[:, t] & traded & (qty == 0) & (h >= target)
+                if buy.any():
+                    price = np.maximum(target, o)
+                    buy &= price <= prev_close[:, t] * (1 + MAX_RISE_RATE / 100)
+                    # calculate_order_qty: 종목당 최대 매수 금액 // 가격
+                    order_qty = np.where(buy, np.floor(self.max_stock_amount / price), 0).astype(np.int64)
+                    cost = order_qty * price * (1 + fee)
+                    idx = np.flatnonzero(order_qty > 0)
+                    if len(idx):
+                        # 가용 현금 내에서 종목코드 순으로 체결 (can_buy)
+                        idx = idx[np.cumsum(cost[idx]) <= cash]
+                        qty[idx] = order_qty[idx]
+                        entry_px[idx] = price[idx]
+                        entry_day[idx] = t
+                        cash -= cost[idx].sum()
+
+                        # 당일 종가가 이미 손절/익절 기준을 넘었다면 매수 후 도달한 것으로 보고 청산
+                        stop_px = price * (1 + stop_rate)
+                        take_px = price * (1 + take_rate)
+                        entered = np.zeros(n_codes, dtype=bool)
+                        entered[idx] = True
+                        close_positions(entered & (c <= stop_px), stop_px, "손절", t)
+                        close_positions(entered & (c >= take_px), take_px, "익절", t)
+
+                equity[t - start] = cash + (qty * self._mark[:, t]).sum()
+
+        # 3. 기간 종료 시 보유 종목은 마지막 종가로 평가 청산
+        if len(equity):
+            close_positions(qty > 0, self._mark[:, end - 1], "기간종료", end - 1)
+            equity[-1] = cash
+
+        return BacktestResult(trades, equity, dates[start:end], self.capital, merged)
+
+    def run_profiles(self, profiles: Sequence[str], params: Dict = None, **kwargs) -> Dict[str, BacktestResult]:
+        """여러 프로필을 같은 패널로 실행"""
+        return {profile: self.run(params, profile, **kwargs) for profile in profiles}
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import time
+
+    print("=" * 50)
+    print("백테스트 벤치마크 (500종목 × 3년 일봉)")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    n_codes, n_days = 500, 750
+    close = 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.025, (n_codes, n_days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, close.shape))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, close.shape))
+    volume = rng.integers(50_000, 2_000_000, close.shape).astype(np.float64)
+    columns = {'open': np.floor(open_), 'high': np.floor(high), 'low': np.floor(low),
+               'close': np.floor(close), 'volume': volume}
+    panel = BarPanel([f"{i:06d}" for i in range(n_codes)], columns,
+                     [f"D{t:04d}" for t in range(n_days)])
+
+    bt = Backtester(panel, capital=100_000_000, max_stock_amount=2_000_000)
+    params = {'k': 0.5, 'stop_loss': -2.0, 'take_profit': 5.0, 'min_vol': 100000}
+    for profile in (None, "전고점 돌파 (Breakout)", "정배열 & 골클 (Trend)", "볼린저 밴드 돌파 (Vola)"):
+        t0 = time.perf_counter()
+        result = bt.run(params, profile)
+        elapsed = time.perf_counter() - t0
+        print(f"  {profile or '필터 없음':<22} {elapsed * 1000:8.1f} ms  {result.summary()}")
+
+    t0 = time.perf_counter()
+    result = bt.run(params, "전고점 돌파 (Breakout)")
+    print(f"  마스크 캐시 재실행:    {(time.perf_counter() - t0) * 1000:8.1f} ms")
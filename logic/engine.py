@@ -0,0 +1,350 @@
+"""
+매매 엔진 스레드 모듈 (Trading Engine)
+실시간 틱 처리(가격 캐시, 보유 종목 판정, 매수 트리거/손절/익절 판정)를 GUI 스레드 밖에서 실행합니다.
+
+    [GUI 스레드]                         [엔진 스레드]
+    OCX 실시간 이벤트 ─ post_tick() ─→ inbox(deque) ─→ StrategyRuntime.on_real_data
+                                                          │ 매수/매도 판정
+    run_actions() ←─ sig_actions(대기열 알림) ←─ actions(deque)
+      └ 주문 전송(OCX), DB/자산 반영
+    sig_logs / sig_statuses / sig_trade_event ←─ 100ms 단위 묶음 전송
+
+- OCX(COM)와 SQLite 쓰기 연결은 GUI 스레드 전용이므로 엔진은 '판정'만 하고 실행은 GUI로 넘깁니다.
+- deque의 append/popleft는 원자적이므로 잠금 없이 주고받고, 깨우기는 threading.Event 1개만 사용합니다.
+- 엔진 스레드가 갱신하는 상태(지표 캐시)의 재구성은 call_sync()로 엔진에서, 엔진 판정 중 DB 쓰기는 post_gui()로 GUI에서 실행합니다.
+- 표 갱신/TR 대기로 GUI가 멈춰도 틱 → 판정 지연은 영향을 받지 않으며, metrics()로 확인할 수 있습니다.
+  틱 수신 시각은 Kiwoom 이벤트 진입 시 찍은 data['recv_ns']를 기준으로 하고, OCX 이벤트 자체가
+  GUI 정체로 늦게 전달되는 시간은 gui_stall(하트비트 지연)로 따로 봅니다.
+- 지연 히스토그램은 core.latency.tracer 1곳에 기록합니다 (tick→done, signal→exec, gui_stall은 항상,
+  tick→eval/tick→signal/signal→send 등 주문 구간은 측정을 켰을 때).
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from PyQt5.QtCore import QThread, QTimer, Qt, pyqtSignal, pyqtSlot
+
+from core.latency import tracer
+
+
+class TradingEngine(QThread):
+    """
+    매매 엔진 스레드
+
+    사용 예:
+        engine = TradingEngine(runtime)
+        engine.sig_logs.connect(window.on_engine_logs)
+        engine.start_engine()     # Kiwoom 실시간 틱을 엔진으로 연결 후 스레드 시작
+        ...
+        engine.stop()
+    """
+    sig_logs = pyqtSignal(list)        # [메시지]
+    sig_statuses = pyqtSignal(dict)    # {종목코드: 상태} (같은 종목은 마지막 상태만)
+    sig_trade_event = pyqtSignal()
+    sig_actions = pyqtSignal()         # GUI 실행 대기 작업 있음
+
+    def __init__(self, runtime, flush_ms: int = 100, heartbeat_ms: int = 50, parent=None):
+        super().__init__(parent)
+        self.runtime = runtime
+        self.flush_sec = flush_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+
+        self.inbox = deque()    # (수신 ns, 종목코드, 데이터) / (수신 ns, None, 함수)
+        self.actions = deque()  # (판정 ns, manager, key, fn, args)
+        self._wake = threading.Event()
+        self._running = False
+        self._action_signaled = False
+        self._thread_ident = None
+
+        # UI 묶음 전송 버퍼 (엔진/GUI 어느 스레드에서 쌓여도 append/대입만 사용)
+        self._logs = deque()
+        self._statuses = deque()  # (종목코드, 상태)
+        self._trade_event = False
+
+        # 지표 (지연 분포는 tracer 히스토그램: tick→done, signal→exec, gui_stall)
+        self.counters = {'ticks': 0, 'signals': 0, 'actions': 0, 'flushes': 0, 'queue_max': 0, 'gui_stalls': 0}
+        self._last_beat = 0
+
+        runtime.sig_log.connect(self._logs.append, Qt.DirectConnection)
+        runtime.sig_update_status.connect(self._on_status, Qt.DirectConnection)
+        runtime.sig_trade_event.connect(self._on_trade_event, Qt.DirectConnection)
+        self.sig_actions.connect(self.run_actions)  # 엔진 → GUI (스레드가 달라 대기열 연결)
+
+        self.heartbeat = QTimer()
+        self.heartbeat.timeout.connect(self._beat)
+
+    # ---------- 시작/종료 (GUI 스레드) ----------
+
+    def start_engine(self):
+        """실시간 틱 연결 + 전략별 실행 위임 설정 후 엔진 스레드 시작"""
+        for name in self.runtime.strategies():
+            self.runtime.manager(name).dispatch = self._post_action
+            self.runtime.manager(name).strategy.post_db = self.post_gui
+        self.runtime.indicator_book.owner_call = self.call_sync
+        self.runtime.kiwoom.sig_real_data.connect(self.post_tick, Qt.DirectConnection)
+        self._running = True
+        self._last_beat = time.perf_counter_ns()
+        self.heartbeat.start(self.heartbeat_ms)
+        self.start()
+
+    def stop(self, timeout_ms: int = 3000):
+        """엔진 종료 (남은 틱 처리 및 UI 버퍼 전송 후)"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        self.heartbeat.stop()
+        self.wait(timeout_ms)
+        try:
+            self.runtime.kiwoom.sig_real_data.disconnect(self.post_tick)
+        except Exception:
+            pass
+        for name in self.runtime.strategies():
+            self.runtime.manager(name).dispatch = None
+            self.runtime.manager(name).strategy.post_db = None
+        self.runtime.indicator_book.owner_call = None
+        self.run_actions()
+
+    # ---------- GUI → 엔진 ----------
+
+    @pyqtSlot(str, dict)
+    def post_tick(self, code, data):
+        """OCX 실시간 이벤트 (GUI 스레드): 대기열에 넣고 엔진 깨우기 (수신 시각은 Kiwoom이 찍은 recv_ns 우선)"""
+        self.inbox.append((data.get('recv_ns') or time.perf_counter_ns(), code, data))
+        self._wake.set()
+
+    def call(self, fn: Callable):
+        """엔진 스레드에서 fn() 실행 (틱과 같은 순서로 처리, 예: 틱 아카이브 flush)"""
+        if not self._running:
+            fn()
+            return
+        self.inbox.append((time.perf_counter_ns(), None, fn))
+        self._wake.set()
+
+    def call_sync(self, fn: Callable, timeout: float = 2.0):
+        """엔진 스레드에서 fn() 실행 후 결과 반환 (엔진이 소유한 상태 재구성용, 예: 지표 시드)"""
+        if not self._running or threading.get_ident() == self._thread_ident:
+            return fn()
+        done = threading.Event()
+        box = {}
+
+        def task():
+            try:
+                box['value'] = fn()
+            except Exception as e:
+                box['error'] = e
+            finally:
+                done.set()
+
+        self.call(task)
+        if not done.wait(timeout):
+            raise TimeoutError("엔진 스레드 응답 없음")
+        if 'error' in box:
+            raise box['error']
+        return box.get('value')
+
+    # ---------- 엔진 스레드 ----------
+
+    def run(self):
+        self._thread_ident = threading.get_ident()
+        inbox = self.inbox
+        on_real_data = self.runtime.on_real_data
+        tick_to_done = tracer.stages['tick→done']
+        counters = self.counters
+        next_flush = time.perf_counter() + self.flush_sec
+        while True:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            depth = len(inbox)
+            if depth > counters['queue_max']:
+                counters['queue_max'] = depth
+            while inbox:
+                recv_ns, code, data = inbox.popleft()
+                if code is None:
+                    data()
+                    continue
+                on_real_data(code, data)
+                tick_to_done.record(time.perf_counter_ns() - recv_ns)
+                counters['ticks'] += 1
+            if time.perf_counter() >= next_flush or not self._running:
+                self._flush()
+                next_flush = time.perf_counter() + self.flush_sec
+            if not self._running and not inbox:
+                break
+
+    def _post_action(self, manager, key, fn, args):
+        """매수/매도 신호 (엔진 스레드) → GUI 실행 대기열"""
+        now = time.perf_counter_ns()
+        self.counters['signals'] += 1
+        self.actions.append((now, manager, key, fn, args))
+        if not self._action_signaled:
+            self._action_signaled = True
+            self.sig_actions.emit()
+
+    def post_gui(self, fn: Callable, *args):
+        """엔진 스레드의 DB 쓰기 등을 GUI 스레드로 넘김 (SQLite 쓰기 연결은 GUI 스레드 전용)"""
+        self.actions.append((0, None, None, fn, args))
+        if not self._action_signaled:
+            self._action_signaled = True
+            self.sig_actions.emit()
+
+    def _on_status(self, code, status):
+        self._statuses.append((code, status))
+
+    def _on_trade_event(self):
+        self._trade_event = True
+
+    def _flush(self):
+        """UI 묶음 전송 (대기열 연결로 GUI 스레드에서 처리)"""
+        if self._logs:
+            logs = []
+            while self._logs:
+                logs.append(self._logs.popleft())
+            self.sig_logs.emit(logs)
+        if self._statuses:
+            statuses = {}
+            while self._statuses:
+                code, status = self._statuses.popleft()
+                statuses[code] = status
+            self.sig_statuses.emit(statuses)
+        if self._trade_event:
+            self._trade_event = False
+            self.sig_trade_event.emit()
+        self.counters['flushes'] += 1
+
+    # ---------- GUI 스레드 ----------
+
+    @pyqtSlot()
+    def run_actions(self):
+        """엔진이 판정한 매수/매도 실행 (주문 전송, DB/자산 반영은 GUI 스레드에서만)"""
+        self._action_signaled = False
+        actions = self.actions
+        while actions:
+            signal_ns, manager, key, fn, args = actions.popleft()
+            if manager is None:  # post_gui (주문 아님)
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self._logs.append(f"❌ [엔진] GUI 작업 오류: {e}")
+                continue
+            tracer.record('signal→exec', time.perf_counter_ns() - signal_ns)
+            try:
+                fn(*args)
+            except Exception as e:
+                self._logs.append(f"❌ [엔진] 주문 실행 오류 {key}: {e}")
+            finally:
+                manager.in_flight.discard(key)
+            self.counters['actions'] += 1
+
+    def _beat(self):
+        """GUI 하트비트: 예정 간격을 넘긴 만큼을 GUI 정체 시간으로 기록"""
+        now = time.perf_counter_ns()
+        late = now - self._last_beat - self.heartbeat_ms * 1_000_000
+        self._last_beat = now
+        if late > 0:
+            tracer.record('gui_stall', late)
+            if late > 100_000_000:
+                self.counters['gui_stalls'] += 1
+
+    # ---------- 지표 ----------
+
+    def metrics(self) -> Dict:
+        """
+        엔진 지표 (카운터 + tracer 구간 요약)
+
+        tick→done: 틱 수신 → 판정 완료 (엔진 스레드, GUI 정체와 무관해야 함)
+        signal→exec: 신호 → GUI 스레드 실행 (GUI 정체 영향을 받음)
+        gui_stall: GUI 하트비트 지연
+        tick→eval / tick→signal / signal→send 등: 주문 지연 측정을 켰을 때만
+        """
+        return {**self.counters, 'queue_depth': len(self.inbox), 'stages': tracer.snapshot()}
+
+    def summary(self) -> str:
+        m = self.metrics()
+        stages = m['stages']
+        text = (f"틱 {m['ticks']:,}건 (대기열 최대 {m['queue_max']}) | "
+                f"틱→판정완료 p99 {stages['tick→done']['p99_us']:,.1f}us | "
+                f"신호→GUI실행 p99 {stages['signal→exec']['p99_us'] / 1e3:,.2f}ms | "
+                f"GUI 정체 최대 {stages['gui_stall']['max_us'] / 1e3:,.1f}ms ({m['gui_stalls']}회)")
+        if stages['signal→send']['count']:
+            text += f" | 신호→주문전송 p99 {stages['signal→send']['p99_us'] / 1e3:,.2f}ms"
+        return text
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import random
+    import sys
+
+    from PyQt5.QtCore import QCoreApplication
+
+    from core.database import Database
+    from logic.asset_manager import AssetManager
+    from logic.engine import TradingEngine
+    from logic.runtime import StrategyRuntime
+    from logic.simulator import SimKiwoom
+    from logic.strategy import VolatilityBreakoutStrategy
+
+    print("=" * 50)
+    print("매매 엔진 벤치마크 (GUI 정체 200ms / 1초 주기, 5초)")
+    print("=" * 50)
+
+    app = QCoreApplication(sys.argv)
+    db = Database(":memory:", read_workers=1, query_cache=True)
+    kiwoom = SimKiwoom()
+    asset_manager = AssetManager(db=None)
+    runtime = StrategyRuntime(kiwoom, db, asset_manager)
+    strategy = VolatilityBreakoutStrategy(None, None, db)
+    strategy.params.update({'stop_loss': 2.0, 'take_profit': 5.0})
+    runtime.add_strategy("변동성 돌파", strategy)
+
+    rng = random.Random(0)
+    codes = [f"{i:06d}" for i in range(100)]
+    buy_prices = {code: rng.choice((1450, 3870, 12350, 48700, 152000)) for code in codes}
+
+    engine = TradingEngine(runtime)
+    runtime.start(ticks=False)
+    engine.start_engine()
+    tracer.set_enabled(True)
+    state = {'running': True, 'n': 0}
+
+    def feed():
+        """틱 공급 스레드 (GUI 정체와 무관한 수신 시각): 1ms마다 틱 20건, 50ms마다 매도 대기 해제(체결 가정)"""
+        for code, price in buy_prices.items():
+            kiwoom.positions.apply_buy(code, 10, price, code)
+        while state['running']:
+            for _ in range(20):
+                code = codes[state['n'] % len(codes)]
+                if state['n'] % 1000 < len(codes):
+                    kiwoom.positions.exiting.discard(code)
+                state['n'] += 1
+                kiwoom.sig_real_data.emit(code, {'current_price': int(buy_prices[code] * rng.uniform(0.97, 1.06)),
+                                                 'volume': state['n'], 'strength': 100.0, 'rate': 0.0,
+                                                 'recv_ns': time.perf_counter_ns()})
+            time.sleep(0.001)
+
+    def stall():
+        """GUI 스레드 정체 (표 갱신/TR 대기 흉내)"""
+        time.sleep(0.2)
+
+    def finish():
+        state['running'] = False
+        feeder.join()
+        staller.stop()
+        engine.stop()
+        print(f"  {engine.summary()}")
+        print("  (tick→done/eval/signal은 엔진 스레드 구간, signal→exec/send는 GUI 경유 구간)")
+        for line in tracer.summary_lines():
+            print(f"  {line}")
+        app.quit()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    staller = QTimer()
+    staller.timeout.connect(stall)
+    staller.start(1000)
+    feeder.start()
+    QTimer.singleShot(5000, finish)
+    app.exec_()
+    db.close()
@@ -0,0 +1,393 @@
+"""
+지표 계산 엔진 (Indicators)
+종가/고가/저가/거래량 컬럼 배열에서 이동평균, 지수이동평균, 볼린저 밴드,
+최고가, 교차 신호를 벡터 연산으로 계산합니다.
+
+배열 규칙:
+- 시간축은 마지막 축이며 과거 → 최신 순서 (Kiwoom 응답은 최신 → 과거이므로 뒤집어 사용)
+- 1차원(종목 1개) 또는 2차원(종목 수 × 봉 수) 모두 지원
+- 데이터가 부족한 구간은 NaN
+
+종목 1개 판정(검증/틱)은 배열 변환 비용이 계산보다 크므로 Strategy의 스칼라 헬퍼와 rolling.IndicatorBook을 쓰고,
+이 모듈은 여러 종목을 한 번에 다시 계산하는 일괄 작업(백테스트/최적화/장전 스캔)에 씁니다.
+"""
+import json
+import os
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:  # numpy < 1.20
+    sliding_window_view = None
+
+
+# Kiwoom 봉 데이터 키 → 컬럼 이름
+BAR_FIELDS = {
+    'open': '시가',
+    'high': '고가',
+    'low': '저가',
+    'close': '종가',
+    'volume': '거래량',
+}
+_BAR_ROW = itemgetter(*BAR_FIELDS.values())  # 봉 1개 → (시가, 고가, 저가, 종가, 거래량)
+
+
+def bars_to_arrays(data: Sequence[Dict], length: int = None) -> Dict[str, np.ndarray]:
+    """
+    Kiwoom 봉 데이터(최신 → 과거 딕셔너리 리스트)를 컬럼 배열로 변환
+
+    Args:
+        data: get_daily_data / get_minute_data 결과
+        length: 최근 length개 봉만 사용 (None이면 전체)
+
+    Returns:
+        {'open', 'high', 'low', 'close', 'volume'} → float64 배열 (과거 → 최신)
+    """
+    n = len(data) if length is None else min(length, len(data))
+    rows = data[n - 1::-1] if n else []
+    return {
+        name: np.array([d.get(key, 0) for d in rows], dtype=np.float64)
+        for name, key in BAR_FIELDS.items()
+    }
+
+
+class BarPanel:
+    """
+    여러 종목의 봉 데이터를 (종목 수 × 봉 수) 2차원 배열로 묶은 패널
+
+    봉 수가 부족한 종목은 앞쪽(과거)을 NaN으로 채워 마지막 열이 모두 최신 봉이 되도록 정렬합니다.
+    """
+
+    def __init__(self, codes: List[str], columns: Dict[str, np.ndarray], dates: List[str] = None):
+        self.codes = list(codes)
+        self.columns = columns
+        self.dates = list(dates) if dates is not None else None  # 열별 거래일 (날짜 정렬 패널만)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_bars(cls, bars: Dict[str, Sequence[Dict]], length: int = 120) -> "BarPanel":
+        """
+        Args:
+            bars: {종목코드: Kiwoom 봉 데이터}
+            length: 패널 봉 수 (최근 length개)
+        """
+        codes = list(bars.keys())
+        # (종목 × 봉 × 필드) 블록에 종목별로 한 번에 채운 뒤 필드별 연속 배열로 분리
+        block = np.full((len(codes), length, len(BAR_FIELDS)), np.nan)
+        for i, code in enumerate(codes):
+            data = bars[code]
+            n = min(length, len(data))
+            if n == 0:
+                continue
+            rows = data[n - 1::-1]
+            try:
+                block[i, length - n:] = list(map(_BAR_ROW, rows))
+            except KeyError:  # 일부 필드가 없는 봉 (없는 값은 0)
+                block[i, length - n:] = [[d.get(key, 0) for key in BAR_FIELDS.values()] for d in rows]
+        columns = {name: np.ascontiguousarray(block[:, :, j]) for j, name in enumerate(BAR_FIELDS)}
+        return cls(codes, columns)
+
+    @classmethod
+    def from_dated_bars(cls, bars: Dict[str, Sequence[Dict]]) -> "BarPanel":
+        """
+        거래일('일자') 기준으로 정렬한 패널 (백테스트용)
+
+        전 종목 거래일의 합집합을 열로 사용하며, 거래가 없는 날(상장 전/정지)은 NaN입니다.
+
+        Args:
+            bars: {종목코드: Kiwoom 봉 데이터 (최신 → 과거)}
+        """
+        codes = list(bars.keys())
+        dates = sorted({d['일자'] for data in bars.values() for d in data if d.get('일자')})
+        col = {date: j for j, date in enumerate(dates)}
+        columns = {name: np.full((len(codes), len(dates)), np.nan) for name in BAR_FIELDS}
+        for i, code in enumerate(codes):
+            rows = [d for d in bars[code] if d.get('일자')]
+            if not rows:
+                continue
+            idx = np.array([col[d['일자']] for d in rows])
+            for name, key in BAR_FIELDS.items():
+                columns[name][i, idx] = [d.get(key, 0) for d in rows]
+        return cls(codes, columns, dates)
+
+    def save(self, directory: str):
+        """
+        컬럼별 .npy + 메타(JSON)로 저장 (프로세스 간 공유용, load()로 메모리 매핑)
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, values in self.columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values))
+        with open(os.path.join(directory, "panel.json"), 'w', encoding='utf-8') as f:
+            json.dump({'codes': self.codes, 'dates': self.dates, 'columns': list(self.columns)}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> "BarPanel":
+        """save()로 저장한 패널 로드 (기본: 읽기 전용 메모리 매핑, 복사 없음)"""
+        with open(os.path.join(directory, "panel.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                   for name in meta['columns']}
+        return cls(meta['codes'], columns, meta['dates'])
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.columns['close']
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.columns['high']
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.columns['low']
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.columns['open']
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.columns['volume']
+
+    def __len__(self):
+        return len(self.codes)
+
+    def row(self, code: str) -> Optional[Dict[str, np.ndarray]]:
+        """종목 1개의 컬럼 배열 (NaN 패딩 제거)"""
+        i = self.index.get(code)
+        if i is None:
+            return None
+        valid = ~np.isnan(self.close[i])
+        return {name: values[i][valid] for name, values in self.columns.items()}
+
+
+# ========== 롤링 지표 (전체 구간) ==========
+
+def _rolling_sum(x: np.ndarray, period: int):
+    """창 합계와 창 내 유효 개수 (NaN은 0으로 취급)"""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=-1)
+    ccnt = np.cumsum(valid, axis=-1)
+    pad = [(0, 0)] * (x.ndim - 1) + [(1, 0)]
+    csum = np.pad(csum, pad)
+    ccnt = np.pad(ccnt, pad)
+    return csum[..., period:] - csum[..., :-period], ccnt[..., period:] - ccnt[..., :-period]
+
+
+def _align(values: np.ndarray, x: np.ndarray, period: int) -> np.ndarray:
+    """창 결과를 원래 길이로 맞춤 (앞쪽 period-1개는 NaN)"""
+    out = np.full(x.shape, np.nan)
+    out[..., period - 1:] = values
+    return out
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    """단순 이동평균 (창 안에 NaN이 있으면 NaN)"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < period:
+        return np.full(x.shape, np.nan)
+    total, count = _rolling_sum(x, period)
+    return _align(np.where(count == period, total / period, np.nan), x, period)
+
+
+def rolling_std(x: np.ndarray, period: int) -> np.ndarray:
+    """이동 표준편차 (모집단 기준, Strategy.calculate_bollinger_bands와 동일)"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < period:
+        return np.full(x.shape, np.nan)
+    total, count = _rolling_sum(x, period)
+    total_sq, _ = _rolling_sum(x * x, period)
+    mean = total / period
+    variance = np.maximum(total_sq / period - mean * mean, 0.0)
+    return _align(np.where(count == period, np.sqrt(variance), np.nan), x, period)
+
+
+def bollinger(x: np.ndarray, period: int = 20, k: float = 2.0):
+    """볼린저 밴드 (상단, 중심, 하단)"""
+    mid = sma(x, period)
+    std = rolling_std(x, period)
+    return mid + k * std, mid, mid - k * std
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    """
+    지수 이동평균 (첫 period개 단순평균으로 시작, alpha = 2 / (period + 1))
+
+    시간축은 순차 계산이지만 종목축은 한 번에 계산합니다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < period:
+        return out
+    alpha = 2.0 / (period + 1)
+    seed = sma(x, period)
+    prev = seed[..., period - 1].copy()
+    out[..., period - 1] = prev
+    for t in range(period, x.shape[-1]):
+        cur = x[..., t]
+        # 이전 값이 NaN이면(데이터 시작 전) 이번 창의 단순평균으로 시작
+        prev = np.where(np.isnan(prev), seed[..., t], prev + alpha * (cur - prev))
+        out[..., t] = prev
+    return out
+
+
+def rolling_max(x: np.ndarray, period: int) -> np.ndarray:
+    """이동 최고값 (창 안에 NaN이 있으면 NaN)"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < period:
+        return np.full(x.shape, np.nan)
+    if sliding_window_view is not None:
+        values = sliding_window_view(x, period, axis=-1).max(axis=-1)
+    else:
+        values = np.stack([x[..., i:i + period].max(axis=-1)
+                           for i in range(x.shape[-1] - period + 1)], axis=-1)
+    return _align(values, x, period)
+
+
+def crossover(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """상향 교차 여부 (이전 봉 a <= b, 현재 봉 a > b), 첫 봉은 False"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    out = np.zeros(np.broadcast(a, b).shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        out[..., 1:] = (a[..., :-1] <= b[..., :-1]) & (a[..., 1:] > b[..., 1:])
+    return out
+
+
+# ========== 최신 봉 기준 판정 (전략 검증용) ==========
+
+def last_sma(x: np.ndarray, period: int) -> np.ndarray:
+    """최신 봉 기준 단순 이동평균 (마지막 period개 평균)"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < period:
+        return np.full(x.shape[:-1], np.nan)
+    return x[..., -period:].mean(axis=-1)
+
+
+def breakout(close: np.ndarray, high: np.ndarray, period: int = 20):
+    """
+    전고점 돌파 (최신 종가 > 직전 period개 봉 최고가)
+
+    Returns:
+        (돌파 여부, 직전 최고가)
+    """
+    close = np.asarray(close, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    if close.shape[-1] < period + 1:
+        return np.zeros(close.shape[:-1], dtype=bool), np.zeros(close.shape[:-1])
+    max_high = high[..., -period - 1:-1].max(axis=-1)
+    with np.errstate(invalid='ignore'):
+        return close[..., -1] > max_high, max_high
+
+
+def trend_alignment(close: np.ndarray, periods: Sequence[int] = (5, 20, 60)) -> np.ndarray:
+    """정배열 (최신 종가 > 단기 > 중기 > 장기 이동평균)"""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] < max(periods):
+        return np.zeros(close.shape[:-1], dtype=bool)
+    result = np.ones(close.shape[:-1], dtype=bool)
+    prev = close[..., -1]
+    with np.errstate(invalid='ignore'):
+        for period in periods:
+            cur = last_sma(close, period)
+            result &= prev > cur
+            prev = cur
+    return result
+
+
+def golden_cross(close: np.ndarray, short_p: int = 5, long_p: int = 20) -> np.ndarray:
+    """최신 봉에서 골든크로스 발생 여부 (단기 이평이 장기 이평을 상향 돌파)"""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] < long_p + 1:
+        return np.zeros(close.shape[:-1], dtype=bool)
+    prev = close[..., :-1]
+    with np.errstate(invalid='ignore'):
+        return ((last_sma(prev, short_p) <= last_sma(prev, long_p)) &
+                (last_sma(close, short_p) > last_sma(close, long_p)))
+
+
+def last_bollinger(close: np.ndarray, period: int = 20, k: float = 2.0):
+    """최신 봉 기준 볼린저 밴드 (상단, 중심, 하단)"""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] < period:
+        nan = np.full(close.shape[:-1], np.nan)
+        return nan, nan, nan
+    window = close[..., -period:]
+    mid = window.mean(axis=-1)
+    std = window.std(axis=-1)
+    return mid + k * std, mid, mid - k * std
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import time
+
+    print("=" * 50)
+    print("지표 엔진 벤치마크 (2,000종목 × 120일봉)")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    n_codes, n_bars = 2000, 120
+    closes = 10000 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_codes, n_bars)), axis=1))
+    highs = closes * (1 + rng.uniform(0, 0.03, closes.shape))
+    # Kiwoom 응답과 같이 파이썬 숫자로 구성
+    bars = {
+        f"{i:06d}": [{'시가': c, '고가': h, '저가': c, '종가': c, '거래량': 1000}
+                     for c, h in zip(closes[i][::-1].tolist(), highs[i][::-1].tolist())]
+        for i in range(n_codes)
+    }
+
+    # 1. 스칼라 방식 (종목별 리스트 순회, Strategy 단일 종목 헬퍼와 같은 계산)
+    def py_sma(data, period):
+        return sum(d['종가'] for d in data[:period]) / period
+
+    t0 = time.perf_counter()
+    legacy = []
+    for code, data in bars.items():
+        past_high = max(d['고가'] for d in data[1:21])
+        aligned = data[0]['종가'] > py_sma(data, 5) > py_sma(data, 20) > py_sma(data, 60)
+        cross = (py_sma(data[1:], 5) <= py_sma(data[1:], 20)) and (py_sma(data, 5) > py_sma(data, 20))
+        legacy.append((data[0]['종가'] > past_high, aligned, cross))
+    t_legacy = time.perf_counter() - t0
+
+    # 2. 종목 1개씩 배열 변환 + 벡터 함수 (단일 종목에는 변환 비용이 계산보다 큼)
+    t0 = time.perf_counter()
+    for code, data in bars.items():
+        arrays = bars_to_arrays(data, 60)
+        breakout(arrays['close'], arrays['high'], 20)
+        trend_alignment(arrays['close'])
+        golden_cross(arrays['close'])
+    t_single = time.perf_counter() - t0
+
+    # 3. 패널 구성 (딕셔너리 → 배열 변환 1회, 이후 재계산은 패널 재사용)
+    t0 = time.perf_counter()
+    panel = BarPanel.from_bars(bars, n_bars)
+    t_panel = time.perf_counter() - t0
+
+    # 4. 벡터 연산 (전 종목 1회)
+    t0 = time.perf_counter()
+    is_break, _ = breakout(panel.close, panel.high, 20)
+    aligned = trend_alignment(panel.close)
+    cross = golden_cross(panel.close)
+    t_vector = time.perf_counter() - t0
+
+    vector = list(zip(is_break.tolist(), aligned.tolist(), cross.tolist()))
+    print(f"  스칼라 (종목별):         {t_legacy * 1000:8.2f} ms")
+    print(f"  배열 변환 (종목별):      {t_single * 1000:8.2f} ms")
+    print(f"  패널 구성 (1회):         {t_panel * 1000:8.2f} ms")
+    print(f"  벡터 연산 (패널 재사용): {t_vector * 1000:8.2f} ms")
+    print(f"  결과 일치:   {legacy == vector}")
+    print(f"  → 단일 종목/틱 판정은 스칼라, 패널은 구성 1회 후 {t_panel / max(t_legacy - t_vector, 1e-9):.1f}회 이상 재계산할 때 유리")
+
+    # 5. 전체 구간 지표 (백테스트용)
+    t0 = time.perf_counter()
+    sma(panel.close, 20)
+    ema(panel.close, 20)
+    bollinger(panel.close, 20)
+    rolling_max(panel.high, 20)
+    crossover(sma(panel.close, 5), sma(panel.close, 20))
+    print(f"  전체 구간 지표: {(time.perf_counter() - t0) * 1000:8.2f} ms")
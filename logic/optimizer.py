@@ -0,0 +1,301 @@
+"""
+전략 파라미터 탐색 모듈 (Optimizer)
+Backtester를 여러 CPU 코어에서 병렬 실행하여 파라미터 조합을 평가합니다.
+
+- 탐색 방식: 그리드 / 랜덤 / 연속 절반 제거(successive halving)
+- 봉 데이터 공유: 패널을 .npy로 한 번 저장하고 작업 프로세스는 메모리 매핑으로 읽음 (피클 전송 없음)
+- 결과: 점수 순위표(CSV), 최적 조합은 apply_best()로 Strategy.update_params에 바로 반영
+
+사용 예:
+    with ParamSearch(panel, {'k': [0.3, 0.5, 0.7], 'stop_loss': [-1.5, -2.0, -3.0]}) as search:
+        results = search.run_grid()
+        search.write_csv("param_search.csv")
+        apply_best(strategy, results)
+"""
+import csv
+import itertools
+import math
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .backtest import Backtester
+from .indicators import BarPanel
+
+
+# 점수 지표 (높을수록 좋음) - BacktestResult.summary() 키
+METRICS = ('return_pct', 'total_pnl', 'max_drawdown', 'win_rate')
+
+# 일봉 백테스트에 반영되지 않는 파라미터 (분봉/체결강도 필요) - 탐색 공간에서 제외하고 apply_best로 반영하지 않음
+INTRADAY_PARAMS = ('min_intensity', 'confirm_count')
+
+
+# ========== 작업 프로세스 ==========
+
+_BACKTESTER = None
+
+
+def _init_worker(panel_dir: str, bt_kwargs: Dict):
+    """작업 프로세스 초기화: 패널/지표 마스크 메모리 매핑 + 백테스터 생성 (프로세스당 1회)"""
+    global _BACKTESTER
+    _BACKTESTER = Backtester(BarPanel.load(panel_dir), **bt_kwargs)
+    _BACKTESTER.load_masks(os.path.join(panel_dir, "masks"))
+
+
+def _run_task(task: Tuple) -> Dict:
+    """백테스트 1회 (params, profile, start, end) → 요약"""
+    params, profile, start, end = task
+    result = _BACKTESTER.run(params, profile, start=start, end=end)
+    return result.summary()
+
+
+# ========== 탐색 ==========
+
+class ParamSearch:
+    """
+    병렬 파라미터 탐색기
+
+    space 형식:
+        {'k': [0.3, 0.5, 0.7]}         → 후보 목록 (그리드/랜덤 공통)
+        {'take_profit': (3.0, 8.0)}    → 구간 (랜덤 탐색 전용, 그리드에서는 양 끝값)
+    INTRADAY_PARAMS(체결강도/분봉 확인)는 점수에 영향이 없으므로 탐색 공간에서 제외합니다.
+    """
+
+    def __init__(self, panel: BarPanel, space: Dict, profile: str = None,
+                 base_params: Dict = None, metric: str = 'return_pct',
+                 workers: int = None, cache_profiles: Sequence[str] = None, **bt_kwargs):
+        """
+        Args:
+            panel: 거래일 정렬 일봉 패널
+            space: 파라미터 탐색 공간
+            profile: 발굴 프로필 (None이면 프로필 필터 없음)
+            base_params: 탐색하지 않는 고정 파라미터 (예: strategy.params)
+            metric: 순위 기준 (METRICS)
+            workers: 작업 프로세스 수 (기본: CPU 코어 수)
+            cache_profiles: 풀 시작 전에 지표 마스크를 미리 계산해 공유할 프로필 (기본: profile)
+            bt_kwargs: Backtester 인자 (capital, max_stock_amount, fee_rate, tax_rate)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"지원하지 않는 점수 지표: {metric}")
+        ignored = [name for name in space if name in INTRADAY_PARAMS]
+        if ignored:
+            print(f"⚠️ [최적화] 일봉 백테스트에 반영되지 않는 파라미터는 탐색에서 제외: {', '.join(ignored)}")
+        self.panel = panel
+        self.space = {name: spec for name, spec in space.items() if name not in INTRADAY_PARAMS}
+        self.profile = profile
+        self.base_params = dict(base_params or {})
+        self.metric = metric
+        self.workers = workers or os.cpu_count() or 1
+        self.bt_kwargs = bt_kwargs
+        self.cache_profiles = list(cache_profiles) if cache_profiles is not None else [profile]
+        self.results: List[Dict] = []
+        self._panel_dir = None
+        self._executor = None
+
+    # ---------- 작업 프로세스 풀 ----------
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._panel_dir = tempfile.mkdtemp(prefix="dducksang_panel_")
+            self.panel.save(self._panel_dir)
+            # 지표 마스크는 부모에서 1회 계산 → 작업 프로세스는 매핑만 (프로세스마다 재계산 없음)
+            backtester = Backtester(self.panel, **self.bt_kwargs)
+            backtester.prepare(self.cache_profiles, self._min_vols())
+            backtester.save_masks(os.path.join(self._panel_dir, "masks"))
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self._panel_dir, self.bt_kwargs))
+        return self._executor
+
+    def close(self):
+        """작업 프로세스 종료 및 공유 패널 파일 삭제"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._panel_dir:
+            shutil.rmtree(self._panel_dir, ignore_errors=True)
+            self._panel_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def evaluate(self, tasks: Sequence[Tuple]) -> List[Dict]:
+        """(params, profile, start, end) 작업 목록을 병렬 실행 (입력 순서대로 요약 반환)"""
+        if not tasks:
+            return []
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        return list(self._pool().map(_run_task, tasks, chunksize=chunksize))
+
+    def _min_vols(self) -> List[float]:
+        """탐색 공간/고정 파라미터의 min_vol 후보 (구간 지정은 미리 계산하지 않음)"""
+        spec = self.space.get('min_vol')
+        if isinstance(spec, list):
+            return [float(v) for v in spec]
+        return [float(self.base_params.get('min_vol', 0))]
+
+    # ---------- 후보 생성 ----------
+
+    def grid(self) -> List[Dict]:
+        """그리드 후보 (구간은 양 끝값 사용)"""
+        names = list(self.space)
+        values = [list(v) if isinstance(v, list) else [v[0], v[1]] for v in self.space.values()]
+        return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+    def sample(self, n: int, seed: int = None) -> List[Dict]:
+        """랜덤 후보 n개 (구간은 균등 분포, 정수 구간은 정수)"""
+        rng = random.Random(seed)
+        candidates = []
+        for _ in range(n):
+            params = {}
+            for name, spec in self.space.items():
+                if isinstance(spec, list):
+                    params[name] = rng.choice(spec)
+                elif isinstance(spec[0], int) and isinstance(spec[1], int):
+                    params[name] = rng.randint(spec[0], spec[1])
+                else:
+                    params[name] = round(rng.uniform(spec[0], spec[1]), 2)
+            candidates.append(params)
+        return candidates
+
+    # ---------- 실행 ----------
+
+    def _score(self, candidates: List[Dict], start: int = 0, end: int = None) -> List[Dict]:
+        tasks = [({**self.base_params, **params}, self.profile, start, end) for params in candidates]
+        rows = []
+        for params, summary in zip(candidates, self.evaluate(tasks)):
+            rows.append({'params': params, **summary})
+        rows.sort(key=lambda r: r[self.metric], reverse=True)
+        return rows
+
+    def _finish(self, rows: List[Dict]) -> List[Dict]:
+        for rank, row in enumerate(rows, 1):
+            row['rank'] = rank
+        self.results = rows
+        return rows
+
+    def run_grid(self) -> List[Dict]:
+        """그리드 탐색 (점수 내림차순)"""
+        return self._finish(self._score(self.grid()))
+
+    def run_random(self, n: int, seed: int = None) -> List[Dict]:
+        """랜덤 탐색 (점수 내림차순)"""
+        return self._finish(self._score(self.sample(n, seed)))
+
+    def run_halving(self, n: int = 81, eta: int = 3, min_fraction: float = 1 / 9,
+                    seed: int = None, candidates: List[Dict] = None) -> List[Dict]:
+        """
+        연속 절반 제거 탐색
+
+        처음에는 전체 기간의 min_fraction(최근 구간)만으로 많은 후보를 평가하고,
+        단계마다 상위 1/eta만 남기며 평가 기간을 eta배로 늘립니다.
+
+        Returns:
+            마지막 단계(전체 기간) 결과 (점수 내림차순)
+        """
+        candidates = candidates or self.sample(n, seed)
+        n_days = self.panel.close.shape[1]
+        fraction = min_fraction
+        while True:
+            start = n_days - max(int(n_days * min(fraction, 1.0)), 1)
+            rows = self._score(candidates, start=start)
+            if fraction >= 1.0 - 1e-9 or len(candidates) <= 1:
+                return self._finish(rows)
+            keep = max(1, math.ceil(len(rows) / eta))
+            candidates = [row['params'] for row in rows[:keep]]
+            fraction *= eta
+
+    # ---------- 결과 ----------
+
+    @property
+    def best(self) -> Optional[Dict]:
+        return self.results[0] if self.results else None
+
+    def write_csv(self, path: str, rows: List[Dict] = None) -> str:
+        """순위표 CSV 저장 (순위, 파라미터, 요약 지표)"""
+        rows = self.results if rows is None else rows
+        param_names = list(self.space)
+        metric_names = ['trades', 'total_pnl', 'return_pct', 'max_drawdown', 'win_rate', 'final_equity']
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['rank', 'profile'] + param_names + metric_names)
+            for row in rows:
+                writer.writerow([row.get('rank'), self.profile or ""] +
+                                [row['params'].get(name) for name in param_names] +
+                                [row.get(name) for name in metric_names])
+        return path
+
+
+def apply_best(strategy, results, keys: Sequence[str] = None) -> Dict:
+    """
+    최적 파라미터를 전략에 반영 (Strategy.update_params → DB 저장)
+
+    Args:
+        results: ParamSearch 결과 리스트 또는 파라미터 딕셔너리
+        keys: 반영할 파라미터 (기본: strategy.params에 있는 키만, INTRADAY_PARAMS는 항상 제외)
+    """
+    if isinstance(results, list):
+        if not results:
+            return {}
+        results = results[0]
+    params = results.get('params', results)
+    keys = keys or strategy.params.keys()
+    best = {k: v for k, v in params.items() if k in keys and k not in INTRADAY_PARAMS}
+    if best:
+        strategy.update_params(best)
+    return best
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import time
+
+    import numpy as np
+
+    # 작업 프로세스가 _run_task를 찾을 수 있도록 __main__이 아닌 모듈 경로로 사용
+    from logic.optimizer import ParamSearch
+
+    print("=" * 50)
+    print("파라미터 탐색 벤치마크 (300종목 × 3년 일봉)")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    n_codes, n_days = 300, 750
+    close = 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.025, (n_codes, n_days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    columns = {
+        'open': np.floor(open_), 'close': np.floor(close),
+        'high': np.floor(np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, close.shape))),
+        'low': np.floor(np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, close.shape))),
+        'volume': rng.integers(50_000, 2_000_000, close.shape).astype(np.float64),
+    }
+    panel = BarPanel([f"{i:06d}" for i in range(n_codes)], columns,
+                     [f"D{t:04d}" for t in range(n_days)])
+    space = {'k': [0.3, 0.4, 0.5, 0.6], 'stop_loss': [-1.5, -2.0, -3.0], 'take_profit': [3.0, 5.0, 8.0]}
+    bt_kwargs = {'capital': 100_000_000, 'max_stock_amount': 2_000_000}
+
+    search = ParamSearch(panel, space, base_params={'min_vol': 100000}, **bt_kwargs)
+    t0 = time.perf_counter()
+    serial_bt = Backtester(panel, **bt_kwargs)
+    for params in search.grid():
+        serial_bt.run({'min_vol': 100000, **params})
+    t_serial = time.perf_counter() - t0
+
+    with search:
+        t0 = time.perf_counter()
+        results = search.run_grid()
+        t_grid = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        halving = search.run_halving(n=27, seed=0)
+        t_halving = time.perf_counter() - t0
+
+    print(f"  그리드 {len(results)}개 (직렬):          {t_serial:6.2f}초")
+    print(f"  그리드 {len(results)}개 ({search.workers}프로세스): {t_grid:6.2f}초 (풀 시작 포함)")
+    print(f"  연속 절반 제거 27개:            {t_halving:6.2f}초")
+    print(f"  최적: {results[0]['params']} → {results[0]['return_pct']}%")
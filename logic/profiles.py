@@ -0,0 +1,405 @@
+"""
+발굴 프로필 파이프라인 모듈 (Profiles)
+발굴 프로필을 '필터 목록'으로 선언하고, 비용이 낮은 단계부터 평가합니다.
+
+단계 (비용 순):
+    0. SCAN   - 스캔 응답 값만 사용 (TR 없음): 제외 종목, 등락률/거래량 급증률 기준
+    1. QUOTE  - 현재가 조회 (opt10001): 체결강도, 등락률 상한
+    2. DAILY  - 일봉 조회 (opt10081) + 롤링 지표: 유동성, 고점 방지, 프로필 차트 조건
+    3. MINUTE - 분봉 조회 (opt10080): N분봉 연속 상승
+
+VerificationQueue는 대기 중인 후보 전체를 단계별로 모아 낮은 단계부터 처리하므로,
+비싼 분봉 조회는 앞 단계를 모두 통과한 종목에만 요청됩니다.
+타이머 1회에 TR 한도(TR_BUDGET)까지 진행하며, 현재가 단계는 복수 종목 조회 TR 1회로 묶습니다.
+같은 단계 안에서는 횡단면 점수(logic/ranking.py)가 높은 후보부터, 단계 사이에서는
+점수 + 단계 가중치(STAGE_WEIGHT, 뒤 단계일수록 높음) + 대기 가중치(AGING)가 높은 쪽부터 조회합니다.
+"""
+import heapq
+from itertools import count
+from typing import Callable, Dict, List, Optional
+
+from .ranking import rank_candidates
+
+
+STAGE_SCAN = 0
+STAGE_QUOTE = 1
+STAGE_DAILY = 2
+STAGE_MINUTE = 3
+STAGE_NAMES = {STAGE_SCAN: "스캔", STAGE_QUOTE: "현재가", STAGE_DAILY: "일봉", STAGE_MINUTE: "분봉"}
+
+TR_BUDGET = 4      # step() 1회당 TR 조회 한도 (키움 TR 제한 초당 약 4회 → 호출당 약 1초)
+BATCH_SIZE = 100   # 복수 종목 조회 TR 1회당 최대 종목 수 (OPTKWFID)
+STAGE_WEIGHT = 1.5  # 단계 간 우선순위: 한 단계 뒤의 후보에 더하는 점수 (이미 TR을 쓴 후보를 먼저 마무리)
+AGING = 0.25        # 단계 간 우선순위: step() 1회 대기할 때마다 더하는 점수 (기아 방지)
+
+MAX_RISE_RATE = 20.0  # 고점 매수 방지 (%)
+EXCLUDE_KEYWORDS = ("스팩", "ETF", "ETN", "리츠", "부동산투자신탁", " (W)", "선물", "인버스", "레버리지")
+
+
+class Candidate:
+    """검증 후보 1건 (단계별 조회 데이터 보관)"""
+
+    __slots__ = ('code', 'name', 'profile', 'scan', 'stage', 'quote', 'state', 'minutes', 'score', 'since')
+
+    def __init__(self, code: str, name: str, profile: str, scan: Dict = None):
+        self.code = code
+        self.name = name
+        self.profile = profile
+        self.scan = scan        # 스캔 응답 항목 (price_rate, volume_rate)
+        self.stage = STAGE_SCAN
+        self.quote = None       # 현재가 조회 결과
+        self.state = None       # CodeIndicators (일봉 기반 롤링 지표)
+        self.minutes = None     # 1분봉 데이터
+        self.score = 0.0        # 대기열 내 횡단면 점수 (높을수록 먼저 조회)
+        self.since = 0          # 현재 단계 대기 시작 (VerificationQueue step 회차)
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}({self.code})"
+
+
+class Filter:
+    """
+    선언형 필터
+
+    check(candidate, params) → None(통과) 또는 거부 사유 문자열 ("" 이면 로그 없이 거부)
+    """
+
+    __slots__ = ('name', 'stage', 'check')
+
+    def __init__(self, name: str, stage: int, check: Callable):
+        self.name = name
+        self.stage = stage
+        self.check = check
+
+    def __repr__(self):
+        return f"Filter({self.name}, {STAGE_NAMES[self.stage]})"
+
+
+# ========== 필터 구현 ==========
+
+def _f(value, default=0.0) -> float:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def _exclude_name(c, p):
+    if c.scan is not None and any(kw in c.name for kw in EXCLUDE_KEYWORDS):
+        return ""
+    return None
+
+
+def _scan_rates(c, p):
+    if c.scan is None:
+        return None
+    price_rate = _f(c.scan.get('price_rate', 0))
+    volume_rate = _f(c.scan.get('volume_rate', 0))
+    if price_rate < p['min_price_rate'] or volume_rate < p['min_vol_rate'] or price_rate > MAX_RISE_RATE:
+        return ""
+    return None
+
+
+def _quote_rise(c, p):
+    rate = _f((c.quote or {}).get('등락율', 0))
+    if rate > MAX_RISE_RATE:
+        return f"🚫 [고점경고] {c.label} 등락률 {rate}% 초과로 제외"
+    return None
+
+
+def _intensity(c, p):
+    raw = (c.quote or {}).get('체결강도')
+    if raw is None or not str(raw).strip():
+        return None  # 체결강도 확인 불가 → 통과 (다음 단계에서 판단)
+    current = _f(raw)
+    min_intensity = float(p.get('min_intensity', 100.0))
+    if current < min_intensity:
+        return f"📉 [조건미달] {c.label} 매수세 약함 (체결강도: {current:.1f}%, 기준: {min_intensity:.1f}%)"
+    return None
+
+
+def _liquidity(c, p):
+    current_vol = int(c.state.day_volume)
+    min_vol = p.get('min_vol', 100000)
+    avg_vol_5d = c.state.avg_volume() or 0
+    if current_vol < min_vol or avg_vol_5d < (min_vol / 2):
+        return f"📉 [조건미달] {c.label} 유동성 부족 (현재: {current_vol:,}, 기준: {min_vol:,})"
+    return None
+
+
+def _daily_rise(c, p):
+    rise_rate = c.state.rise_rate()
+    if rise_rate is not None and rise_rate > MAX_RISE_RATE:
+        return f"🚫 [고점경고] {c.label} 현재 {rise_rate:.2f}% 급등 중 - 추격매수 방지를 위해 제외"
+    return None
+
+
+def _breakout(c, p):
+    is_break, _ = c.state.breakout()
+    return None if is_break else ""
+
+
+def _trend(c, p):
+    return None if c.state.trend_alignment() and c.state.golden_cross() else ""
+
+
+def _bollinger(c, p):
+    upper, _, _ = c.state.bollinger()
+    return None if upper and c.state.price > upper else ""
+
+
+def _reject_unknown(c, p):
+    return ""
+
+
+def _minute_trend(c, p):
+    confirm_count = int(p.get('confirm_count', 3))
+    if not c.minutes or len(c.minutes) < confirm_count:
+        return f"⚠️ [데이터부족] {c.label} 분봉 데이터가 부족하여 분석 제외"
+    if not c.state.minute_trend(confirm_count):
+        return f"📉 [추세미달] {c.label} {confirm_count}분봉 연속 상승세 아님"
+    return None
+
+
+FILTERS = {f.name: f for f in (
+    Filter('exclude_name', STAGE_SCAN, _exclude_name),
+    Filter('scan_rates', STAGE_SCAN, _scan_rates),
+    Filter('quote_rise', STAGE_QUOTE, _quote_rise),
+    Filter('intensity', STAGE_QUOTE, _intensity),
+    Filter('liquidity', STAGE_DAILY, _liquidity),
+    Filter('daily_rise', STAGE_DAILY, _daily_rise),
+    Filter('breakout', STAGE_DAILY, _breakout),
+    Filter('trend', STAGE_DAILY, _trend),
+    Filter('bollinger', STAGE_DAILY, _bollinger),
+    Filter('reject_unknown', STAGE_DAILY, _reject_unknown),
+    Filter('minute_trend', STAGE_MINUTE, _minute_trend),
+)}
+
+
+# ========== 프로필 선언 ==========
+
+# 모든 프로필 공통 (선언 순서 = 같은 단계 안의 평가 순서)
+COMMON_FILTERS = ('exclude_name', 'scan_rates', 'quote_rise', 'intensity',
+                  'liquidity', 'daily_rise', 'minute_trend')
+
+# match: 프로필 문자열에 포함된 키워드 (HTS 조건 "HTS 조건(전고점 돌파 ...)"도 매칭)
+PROFILE_SPECS = (
+    {'key': 'breakout', 'match': "전고점 돌파", 'min_vol_rate': 500.0, 'min_price_rate': 5.0,
+     'filters': ('breakout',)},
+    {'key': 'trend', 'match': "정배열", 'min_vol_rate': 150.0, 'min_price_rate': 2.0,
+     'filters': ('trend',)},
+    {'key': 'bollinger', 'match': "볼린저", 'min_vol_rate': 200.0, 'min_price_rate': 3.0,
+     'filters': ('bollinger',)},
+    {'key': 'custom', 'match': "사용자 정의", 'min_vol_rate': 100.0, 'min_price_rate': 0.0,
+     'filters': ()},
+)
+# 어떤 키워드에도 맞지 않는 프로필: 1차 기준은 기본값, 차트 단계에서 거부
+UNKNOWN_SPEC = {'key': 'unknown', 'match': "", 'min_vol_rate': 100.0, 'min_price_rate': 0.0,
+                'filters': ('reject_unknown',)}
+
+
+class Pipeline:
+    """컴파일된 프로필 (단계별 필터 목록 + 1차 기준값)"""
+
+    def __init__(self, spec: Dict):
+        self.key = spec['key']
+        self.thresholds = {'min_vol_rate': spec['min_vol_rate'], 'min_price_rate': spec['min_price_rate']}
+        names = list(COMMON_FILTERS) + list(spec['filters'])
+        by_stage: Dict[int, List[Filter]] = {}
+        for name in names:
+            f = FILTERS[name]
+            by_stage.setdefault(f.stage, []).append(f)
+        self.stages = {stage: tuple(fs) for stage, fs in sorted(by_stage.items())}
+        self.stage_order = tuple(self.stages)
+
+    def next_stage(self, stage: int) -> Optional[int]:
+        """stage 다음으로 필터가 있는 단계 (없으면 None)"""
+        for s in self.stage_order:
+            if s > stage:
+                return s
+        return None
+
+    def run_stage(self, stage: int, candidate: Candidate, params: Dict) -> Optional[str]:
+        """단계 필터 평가 (첫 거부에서 중단) → None(통과) 또는 거부 사유"""
+        merged = {**params, **self.thresholds}
+        for f in self.stages.get(stage, ()):
+            reason = f.check(candidate, merged)
+            if reason is not None:
+                return reason
+        return None
+
+    def check_scan(self, item: Dict, params: Dict = None) -> Optional[str]:
+        """스캔 응답 항목 1차 필터 (TR 없음)"""
+        return self.run_stage(STAGE_SCAN, Candidate(item['code'], item['name'], self.key, item), params or {})
+
+    def __repr__(self):
+        return f"Pipeline({self.key}, {self.stages})"
+
+
+_compiled: Dict[str, Pipeline] = {}
+
+
+def compile_profile(profile: str) -> Pipeline:
+    """프로필 문자열 → 파이프라인 (문자열별 1회 컴파일 후 재사용)"""
+    pipeline = _compiled.get(profile)
+    if pipeline is None:
+        spec = next((s for s in PROFILE_SPECS if s['match'] in (profile or "")), UNKNOWN_SPEC)
+        pipeline = _compiled[profile] = Pipeline(spec)
+    return pipeline
+
+
+# ========== 검증 대기열 ==========
+
+class VerificationQueue:
+    """
+    단계별 검증 대기열
+
+    - push(): 스캔 단계 필터 즉시 평가 후 대기열 추가 (중복은 O(1) 확인)
+    - step(): TR 한도까지 우선순위가 가장 높은 단계의 선두 후보부터 데이터 조회 + 해당 단계 필터 평가
+      (타이머에서 호출, 같은 호출 안에서 통과한 후보는 다음 단계까지 이어서 진행)
+      단계 우선순위 = 선두 후보 점수 + STAGE_WEIGHT × 단계 + AGING × 대기 회차
+      → 현재가 단계에 새 후보가 계속 들어와도 뒤 단계의 상위 후보가 밀리지 않음
+
+    단계별 대기열은 (-점수, 순번, 후보) 힙이며, 새 후보가 들어온 단계는 다음 step()에서
+    대기 후보 전체를 한 번에 재점수화합니다 (점수가 같으면 먼저 들어온 순서).
+
+    fetchers: {단계: fn(candidate) → bool}  - 후보에 조회 데이터를 채우고 성공 여부 반환
+    batch_fetchers: {단계: fn(candidates) → [bool]}  - 복수 종목 TR 1회로 조회 (있으면 fetchers 대신 사용)
+    weights: 순위 특성 가중치 (None이면 ranking.DEFAULT_WEIGHTS)
+    tr_budget: step() 1회당 TR 조회 한도
+    """
+
+    def __init__(self, fetchers: Dict[int, Callable], params: Dict = None, weights: Dict = None,
+                 batch_fetchers: Dict[int, Callable] = None, tr_budget: int = TR_BUDGET):
+        self.fetchers = fetchers
+        self.batch_fetchers = batch_fetchers or {}
+        self.tr_budget = tr_budget
+        self.params = params if params is not None else {}
+        self.weights = weights
+        self.buckets = {stage: [] for stage in STAGE_NAMES if stage != STAGE_SCAN}
+        self.dirty = set()  # 재점수화가 필요한 단계
+        self.pending: Dict[str, Candidate] = {}
+        self.stats = {'pushed': 0, 'passed': 0, 'rejected': 0, 'fetches': 0, 'rescored': 0}
+        self._seq = count()
+        self._ticks = 0  # step() 호출 회차 (대기 가중치 기준)
+
+    def __contains__(self, code) -> bool:
+        return code in self.pending
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __bool__(self) -> bool:
+        return bool(self.pending)
+
+    def clear(self):
+        self.pending.clear()
+        self.dirty.clear()
+        for bucket in self.buckets.values():
+            bucket.clear()
+
+    def _enqueue(self, stage: int, candidate: Candidate):
+        candidate.stage = stage
+        candidate.since = self._ticks
+        heapq.heappush(self.buckets[stage], (-candidate.score, next(self._seq), candidate))
+        self.dirty.add(stage)
+
+    def _rescore(self, stage: int):
+        """단계 대기 후보 전체 재점수화 (벡터 연산) 후 힙 재구성"""
+        bucket = self.buckets[stage]
+        live = [(seq, c) for _, seq, c in bucket if self.pending.get(c.code) is c]
+        rank_candidates([c for _, c in live], self.weights)
+        bucket[:] = [(-c.score, seq, c) for seq, c in live]
+        heapq.heapify(bucket)
+        self.dirty.discard(stage)
+        self.stats['rescored'] += 1
+
+    def ranked(self, stage: int = STAGE_QUOTE) -> List[Candidate]:
+        """단계 대기 후보 (점수 순)"""
+        if stage in self.dirty:
+            self._rescore(stage)
+        return [c for _, _, c in sorted(self.buckets[stage]) if self.pending.get(c.code) is c]
+
+    def push(self, code: str, name: str, profile: str, scan: Dict = None) -> bool:
+        """후보 추가 (스캔 단계 탈락/중복이면 False)"""
+        if code in self.pending:
+            return False
+        candidate = Candidate(code, name, profile, scan)
+        pipeline = compile_profile(profile)
+        if pipeline.run_stage(STAGE_SCAN, candidate, self.params) is not None:
+            return False
+        stage = pipeline.next_stage(STAGE_SCAN)
+        if stage is None:
+            return False
+        self.pending[code] = candidate
+        self._enqueue(stage, candidate)
+        self.stats['pushed'] += 1
+        return True
+
+    def step(self, budget: int = None) -> List[tuple]:
+        """
+        검증 진행 (TR 조회 budget회까지, 기본 tr_budget)
+
+        Returns:
+            [(결과, 후보, 사유), ...] - 결과: "pass" / "reject" / "advance" (대기열이 비었으면 빈 리스트)
+        """
+        budget = self.tr_budget if budget is None else budget
+        self._ticks += 1
+        results = []
+        while budget > 0:
+            stage = self._next_stage()
+            if stage is None:
+                break
+            batch = self.batch_fetchers.get(stage)
+            group = self._pop(stage, BATCH_SIZE if batch else 1)
+            budget -= 1
+            self.stats['fetches'] += 1
+            oks = batch(group) if batch else [self.fetchers[stage](group[0])]
+            for candidate, ok in zip(group, oks):
+                results.append(self._advance(stage, candidate, ok))
+        return results
+
+    def _next_stage(self) -> Optional[int]:
+        """다음에 조회할 단계 (선두 후보의 점수 + 단계/대기 가중치가 가장 높은 단계)"""
+        best, best_priority = None, None
+        for stage, bucket in self.buckets.items():
+            if stage in self.dirty:
+                self._rescore(stage)
+            while bucket and self.pending.get(bucket[0][2].code) is not bucket[0][2]:
+                heapq.heappop(bucket)  # clear() 이후 남은 항목
+            if not bucket:
+                continue
+            head = bucket[0][2]
+            priority = head.score + STAGE_WEIGHT * stage + AGING * (self._ticks - head.since)
+            if best_priority is None or priority > best_priority:
+                best, best_priority = stage, priority
+        return best
+
+    def _pop(self, stage: int, limit: int) -> List[Candidate]:
+        """단계 대기 후보를 점수 순으로 최대 limit건 꺼내기"""
+        bucket = self.buckets[stage]
+        group = []
+        while bucket and len(group) < limit:
+            _, _, candidate = heapq.heappop(bucket)
+            if self.pending.get(candidate.code) is candidate:
+                group.append(candidate)
+        return group
+
+    def _advance(self, stage: int, candidate: Candidate, fetched: bool):
+        if not fetched:
+            return self._finish(candidate, "reject", "")
+        pipeline = compile_profile(candidate.profile)
+        reason = pipeline.run_stage(stage, candidate, self.params)
+        if reason is not None:
+            return self._finish(candidate, "reject", reason)
+        next_stage = pipeline.next_stage(stage)
+        if next_stage is None:
+            return self._finish(candidate, "pass", "")
+        self._enqueue(next_stage, candidate)
+        return "advance", candidate, ""
+
+    def _finish(self, candidate: Candidate, result: str, reason: str):
+        self.pending.pop(candidate.code, None)
+        self.stats['passed' if result == "pass" else 'rejected'] += 1
+        return result, candidate, reason
@@ -0,0 +1,114 @@
+"""
+후보 순위 모듈 (Ranking)
+검증 대기 중인 후보들을 이미 확보한 값(스캔 응답/현재가 조회)만으로 횡단면 점수화합니다.
+
+특성 (종목 × 특성 행렬, 대기열 전체를 한 번에 계산):
+    volume_rate - 거래량 급증률 (log)
+    price_rate  - 등락률 (고점 매수 방지 기준의 절반에서 최고점, 그 이상은 감점)
+    intensity   - 체결강도 (현재가 조회 이후 단계에서만)
+    liquidity   - 거래대금 = 현재가 × 거래량 (log)
+
+특성별로 대기열 안에서 표준화(z-score)한 뒤 가중합 → 값이 없는 특성은 0(평균)으로 처리
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+FEATURES = ('volume_rate', 'price_rate', 'intensity', 'liquidity')
+DEFAULT_WEIGHTS = {'volume_rate': 1.0, 'price_rate': 0.5, 'intensity': 1.0, 'liquidity': 0.7}
+
+SWEET_RATE = 10.0  # 등락률 최고점 (%) - 고점 매수 방지 기준(20%)의 절반
+
+
+def _f(value, default=np.nan) -> float:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def _value(candidate, scan_key: str, quote_key: str) -> float:
+    """스캔 응답 값 우선, 없으면 현재가 조회 값 (둘 다 없으면 NaN)"""
+    if candidate.scan and scan_key in candidate.scan:
+        return abs(_f(candidate.scan[scan_key]))
+    if candidate.quote and str(candidate.quote.get(quote_key, '')).strip():
+        return abs(_f(candidate.quote[quote_key]))
+    return np.nan
+
+
+def feature_matrix(candidates: Sequence) -> np.ndarray:
+    """후보 목록 → (후보 수, 특성 수) 원시 특성 행렬 (없는 값 NaN)"""
+    raw = np.full((len(candidates), len(FEATURES)), np.nan)
+    for i, c in enumerate(candidates):
+        scan = c.scan or {}
+        quote = c.quote or {}
+        if 'volume_rate' in scan:
+            raw[i, 0] = _f(scan['volume_rate'])
+        rate = _f(scan['price_rate']) if 'price_rate' in scan else _f(quote.get('등락율'))
+        raw[i, 1] = rate
+        if str(quote.get('체결강도', '')).strip():
+            raw[i, 2] = _f(quote['체결강도'])
+        raw[i, 3] = _value(c, 'price', '현재가') * _value(c, 'volume', '거래량')
+
+    features = np.empty_like(raw)
+    with np.errstate(invalid='ignore'):
+        features[:, 0] = np.log1p(np.maximum(raw[:, 0], 0))
+        features[:, 1] = np.minimum(raw[:, 1], 2 * SWEET_RATE - raw[:, 1])
+        features[:, 2] = raw[:, 2]
+        features[:, 3] = np.log1p(np.maximum(raw[:, 3], 0))
+    return features
+
+
+def cross_score(features: np.ndarray, weights: Dict[str, float] = None) -> np.ndarray:
+    """특성 행렬 → 후보별 점수 (특성별 횡단면 z-score 가중합)"""
+    n = features.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    weights = weights or DEFAULT_WEIGHTS
+    w = np.array([weights.get(name, 0.0) for name in FEATURES])
+    valid = ~np.isnan(features)
+    counts = valid.sum(axis=0)
+    filled = np.where(valid, features, 0.0)
+    mean = filled.sum(axis=0) / np.maximum(counts, 1)
+    var = (np.where(valid, features - mean, 0.0) ** 2).sum(axis=0) / np.maximum(counts, 1)
+    std = np.sqrt(var)
+    z = np.where(valid & (std > 0), (features - mean) / np.where(std > 0, std, 1.0), 0.0)
+    return z @ w
+
+
+def rank_candidates(candidates: Sequence, weights: Dict[str, float] = None) -> np.ndarray:
+    """후보 점수 계산 후 candidate.score에 기록 → 점수 배열"""
+    scores = cross_score(feature_matrix(candidates), weights)
+    for c, s in zip(candidates, scores.tolist()):
+        c.score = s
+    return scores
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import time
+
+    from logic.profiles import Candidate
+
+    print("=" * 50)
+    print("후보 순위 벤치마크")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    n = 200
+    candidates = [Candidate(f"{i:06d}", f"종목{i}", "전고점 돌파 (Breakout)",
+                            {'volume_rate': float(rng.uniform(500, 3000)),
+                             'price_rate': float(rng.uniform(5, 20)),
+                             'price': int(rng.integers(1000, 100000)),
+                             'volume': int(rng.integers(10_000, 5_000_000))})
+                  for i in range(n)]
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        scores = rank_candidates(candidates)
+    elapsed = (time.perf_counter() - t0) / 100
+    print(f"  후보 {n}개 점수 계산: {elapsed * 1000:.3f}ms")
+    for c in sorted(candidates, key=lambda c: -c.score)[:5]:
+        print(f"  {c.label:<16} 점수 {c.score:6.2f}  급증 {c.scan['volume_rate']:7.1f}%  등락 {c.scan['price_rate']:5.2f}%")
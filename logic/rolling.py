@@ -0,0 +1,361 @@
+"""
+롤링 지표 상태 모듈 (Rolling Indicators)
+종목별로 이동합계/제곱합/단조 덱(최고가)을 유지하여
+새 봉·새 틱이 들어올 때 O(1)로 갱신하고, 전략 판정은 상수 시간에 읽습니다.
+
+Strategy 헬퍼(전체 창 재계산)와 같은 값을 돌려주도록 맞춰져 있습니다:
+- 일봉 완성분(전일까지)은 창에 누적, 당일 봉은 실시간 가격으로 덮어쓰는 '진행 중' 봉
+"""
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+
+class RollingWindow:
+    """고정 길이 창의 합계/제곱합 (push O(1))"""
+
+    __slots__ = ('period', 'values', 'total', 'total_sq')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value: float):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.period:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.period
+
+    def mean(self) -> Optional[float]:
+        """완성된 창 평균 (창이 덜 찼으면 None)"""
+        return self.total / self.period if self.full else None
+
+    def live_sums(self, live: float):
+        """
+        진행 중 값 live를 최신 값으로 포함한 창의 (합계, 제곱합)
+        완성분 period-1개 + live, 완성분이 부족하면 None
+        """
+        n = len(self.values)
+        if n < self.period - 1:
+            return None
+        oldest = self.values[0] if n == self.period else 0.0
+        return (self.total - oldest + live,
+                self.total_sq - oldest * oldest + live * live)
+
+
+class RollingMax:
+    """고정 길이 창의 최고값 (단조 감소 덱, push 분할상환 O(1))"""
+
+    __slots__ = ('period', 'count', 'deque')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.deque = deque()  # (순번, 값), 값 내림차순
+
+    def push(self, value: float):
+        while self.deque and self.deque[-1][1] <= value:
+            self.deque.pop()
+        self.deque.append((self.count, value))
+        self.count += 1
+        if self.deque[0][0] <= self.count - 1 - self.period:
+            self.deque.popleft()
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.period
+
+    def max(self) -> Optional[float]:
+        return self.deque[0][1] if self.deque else None
+
+
+class CodeIndicators:
+    """
+    종목 1개의 롤링 지표 상태
+
+    - push_bar(): 완성된 일봉 추가 (과거 → 최신 순)
+    - on_tick(): 실시간 가격/누적거래량으로 당일 봉 갱신 + 1분봉 집계
+    - 판정 메서드(sma, bollinger, breakout, ...)는 모두 O(1)
+    """
+
+    def __init__(self, code: str, sma_periods: Sequence[int] = (5, 20, 60),
+                 band_period: int = 20, band_k: float = 2.0,
+                 high_period: int = 20, volume_period: int = 5):
+        self.code = code
+        self.band_period = band_period
+        self.band_k = band_k
+        self.high_period = high_period
+        self.volume_period = volume_period
+        periods = set(sma_periods) | {band_period}
+        self.closes = {p: RollingWindow(p) for p in periods}
+        self.highs = RollingMax(high_period)
+        self.volumes = RollingWindow(volume_period)
+        self.last_bar_date = None   # 마지막 완성 봉 일자
+        self.prev_close = None      # 전일 종가
+        self.bar_count = 0
+
+        # 당일(진행 중) 봉
+        self.price = None
+        self.day_high = None
+        self.day_volume = 0
+
+        # 1분봉 추세 (연속 비하락 봉 수)
+        self._minute_key = None
+        self._minute_close = None
+        self._last_minute_close = None
+        self._minute_run = 0
+        self.updated_at = 0.0
+
+    @property
+    def max_period(self) -> int:
+        return max(max(self.closes), self.high_period, self.volume_period)
+
+    # ---------- 갱신 ----------
+
+    def push_bar(self, bar: Dict):
+        """완성된 일봉 1개 추가 (Kiwoom 봉 딕셔너리)"""
+        close = float(bar['종가'])
+        for window in self.closes.values():
+            window.push(close)
+        self.highs.push(float(bar['고가']))
+        self.volumes.push(float(bar.get('거래량', 0)))
+        self.prev_close = close
+        self.last_bar_date = bar.get('일자')
+        self.bar_count += 1
+
+    def seed(self, daily_data: Sequence[Dict]):
+        """
+        Kiwoom 일봉(최신 → 과거, [0]은 당일)으로 상태 구성
+
+        완성 봉이 이미 반영된 상태면 당일 봉만 갱신합니다 (재검증 시 O(1)).
+        """
+        if not daily_data:
+            return
+        today = daily_data[0]
+        completed = daily_data[1:self.max_period + 1]
+        newest_date = completed[0].get('일자') if completed else None
+        if newest_date is None or newest_date != self.last_bar_date:
+            self.__init__(self.code, tuple(p for p in self.closes), self.band_period, self.band_k,
+                          self.high_period, self.volume_period)
+            for bar in reversed(completed):
+                self.push_bar(bar)
+        self.price = float(today['종가'])
+        self.day_high = float(today.get('고가', self.price))
+        self.day_volume = float(today.get('거래량', 0))
+        self.updated_at = time.time()
+
+    def seed_minutes(self, minute_data: Sequence[Dict]):
+        """Kiwoom 분봉(최신 → 과거, [0]은 진행 중)으로 분봉 추세 초기화"""
+        self._minute_run = 0
+        self._last_minute_close = None
+        for bar in reversed(minute_data[1:]):
+            self._close_minute(float(bar['종가']))
+        self._minute_key = int(time.time() // 60)
+        self._minute_close = float(minute_data[0]['종가']) if minute_data else None
+
+    def _close_minute(self, close: float):
+        if self._last_minute_close is not None and close >= self._last_minute_close:
+            self._minute_run += 1
+        else:
+            self._minute_run = 1
+        self._last_minute_close = close
+
+    def on_tick(self, price: float, volume: float = None, ts: float = None):
+        """실시간 체결 반영 (O(1))"""
+        ts = time.time() if ts is None else ts
+        self.price = price
+        self.day_high = price if self.day_high is None else max(self.day_high, price)
+        if volume:
+            self.day_volume = volume
+
+        key = int(ts // 60)
+        if self._minute_key is not None and key != self._minute_key and self._minute_close is not None:
+            self._close_minute(self._minute_close)
+        self._minute_key = key
+        self._minute_close = price
+        self.updated_at = ts
+
+    def close_day(self, date_str: str = None):
+        """당일 봉을 완성 봉으로 넘김 (장 마감 후 / 시뮬레이션 날짜 변경 시)"""
+        if self.price is None:
+            return
+        self.push_bar({'종가': self.price, '고가': self.day_high or self.price,
+                       '거래량': self.day_volume,
+                       '일자': date_str or datetime.now().strftime('%Y%m%d')})
+        self.price = None
+        self.day_high = None
+        self.day_volume = 0
+
+    # ---------- 판정 (O(1)) ----------
+
+    def sma(self, period: int) -> Optional[float]:
+        """당일 포함 단순 이동평균 (Strategy.calculate_sma와 동일)"""
+        window = self.closes.get(period)
+        if window is None or self.price is None:
+            return None
+        sums = window.live_sums(self.price)
+        return sums[0] / period if sums else None
+
+    def prev_sma(self, period: int) -> Optional[float]:
+        """전일 기준 단순 이동평균"""
+        window = self.closes.get(period)
+        return window.mean() if window is not None else None
+
+    def bollinger(self):
+        """당일 포함 볼린저 밴드 (상단, 중심, 하단)"""
+        window = self.closes[self.band_period]
+        sums = window.live_sums(self.price) if self.price is not None else None
+        if not sums:
+            return None, None, None
+        n = self.band_period
+        mean = sums[0] / n
+        std = math.sqrt(max(sums[1] / n - mean * mean, 0.0))
+        return mean + self.band_k * std, mean, mean - self.band_k * std
+
+    def breakout(self):
+        """전고점 돌파 (현재가 > 직전 high_period일 최고가)"""
+        if self.price is None or not self.highs.full:
+            return False, 0
+        max_high = self.highs.max()
+        return self.price > max_high, max_high
+
+    def trend_alignment(self, periods: Sequence[int] = (5, 20, 60)) -> bool:
+        """정배열 (현재가 > 단기 > 중기 > 장기)"""
+        prev = self.price
+        for period in periods:
+            cur = self.sma(period)
+            if prev is None or cur is None or not prev > cur:
+                return False
+            prev = cur
+        return True
+
+    def golden_cross(self, short_p: int = 5, long_p: int = 20) -> bool:
+        """당일 골든크로스 (전일 단기 <= 장기, 당일 단기 > 장기)"""
+        values = (self.prev_sma(short_p), self.prev_sma(long_p), self.sma(short_p), self.sma(long_p))
+        if None in values:
+            return False
+        return values[0] <= values[1] and values[2] > values[3]
+
+    def avg_volume(self) -> Optional[float]:
+        """당일 포함 평균 거래량 (volume_period일)"""
+        sums = self.volumes.live_sums(self.day_volume)
+        return sums[0] / self.volume_period if sums else None
+
+    def rise_rate(self) -> Optional[float]:
+        """전일 종가 대비 등락률 (%)"""
+        if not self.prev_close or self.price is None:
+            return None
+        return (self.price - self.prev_close) / self.prev_close * 100
+
+    def minute_trend(self, confirm_count: int) -> bool:
+        """최근 confirm_count개 1분봉(진행 중 포함)이 연속 비하락인지"""
+        if self._minute_close is None:
+            return False
+        if confirm_count <= 1:
+            return True
+        if self._last_minute_close is None or self._minute_close < self._last_minute_close:
+            return False
+        return self._minute_run >= confirm_count - 1
+
+
+class IndicatorBook:
+    """종목코드 → CodeIndicators 관리 (실시간 틱 라우팅)"""
+
+    def __init__(self, **params):
+        self.params = params
+        self.states: Dict[str, CodeIndicators] = {}
+        # 상태 재구성 실행기 owner_call(fn) → 결과 (None이면 즉시 실행)
+        # TradingEngine이 설정: 틱 갱신(on_tick)과 같은 엔진 스레드에서 시드하여 갱신 중인 객체를 재초기화하지 않음
+        self.owner_call = None
+
+    def get(self, code: str) -> Optional[CodeIndicators]:
+        return self.states.get(code)
+
+    def seed(self, code: str, daily_data: Sequence[Dict],
+             minute_data: Sequence[Dict] = None) -> CodeIndicators:
+        """일봉(및 분봉)으로 종목 상태 생성/갱신"""
+        if self.owner_call is not None:
+            return self.owner_call(lambda: self._seed(code, daily_data, minute_data))
+        return self._seed(code, daily_data, minute_data)
+
+    def seed_minutes(self, code: str, minute_data: Sequence[Dict]) -> Optional[CodeIndicators]:
+        """분봉으로 종목 분봉 추세 초기화 (상태가 있는 종목만)"""
+        def run():
+            state = self.states.get(code)
+            if state is not None and minute_data:
+                state.seed_minutes(minute_data)
+            return state
+        return self.owner_call(run) if self.owner_call is not None else run()
+
+    def _seed(self, code: str, daily_data: Sequence[Dict],
+              minute_data: Sequence[Dict] = None) -> CodeIndicators:
+        state = self.states.get(code)
+        if state is None:
+            state = self.states[code] = CodeIndicators(code, **self.params)
+        state.seed(daily_data)
+        if minute_data:
+            state.seed_minutes(minute_data)
+        return state
+
+    def on_tick(self, code: str, price: float, volume: float = None, ts: float = None):
+        """실시간 체결 반영 (상태가 있는 종목만)"""
+        state = self.states.get(code)
+        if state is not None:
+            state.on_tick(price, volume, ts)
+
+    def remove(self, code: str):
+        self.states.pop(code, None)
+
+    def codes(self) -> List[str]:
+        return list(self.states.keys())
+
+    def __len__(self):
+        return len(self.states)
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import random
+
+    print("=" * 50)
+    print("롤링 지표 벤치마크 (300종목 × 초당 틱)")
+    print("=" * 50)
+
+    random.seed(0)
+    book = IndicatorBook()
+    for i in range(300):
+        price = 10000.0
+        bars = []
+        for d in range(120):
+            price *= 1 + random.gauss(0, 0.02)
+            bars.append({'일자': f"{d:08d}", '종가': int(price), '고가': int(price * 1.02),
+                         '시가': int(price), '저가': int(price * 0.98), '거래량': 100000})
+        book.seed(f"{i:06d}", bars[::-1])
+
+    n_ticks = 300 * 1000
+    t0 = time.perf_counter()
+    for t in range(n_ticks):
+        code = f"{t % 300:06d}"
+        state = book.states[code]
+        book.on_tick(code, state.price * (1 + random.gauss(0, 0.001)), 150000, 1e9 + t / 300)
+        state.breakout()
+        state.trend_alignment()
+        state.golden_cross()
+        state.bollinger()
+    elapsed = time.perf_counter() - t0
+    print(f"  틱 {n_ticks:,}건 (갱신 + 판정 4종): {elapsed:.2f}초 ({elapsed / n_ticks * 1e6:.2f} us/틱)")
@@ -0,0 +1,517 @@
+"""
+다중 전략 런타임 모듈 (Strategy Runtime)
+여러 Strategy를 하나의 시세 피드/지표 캐시 위에서 동시에 실행합니다.
+
+- SharedFeed: 실시간 등록 참조 카운트 + 일봉/분봉 조회 캐시 (전략이 늘어도 TR/실시간 등록은 1회)
+- CapitalSlice: AssetManager 운용 자금 중 전략별 배정분 (AssetManager와 같은 매수 판단 인터페이스)
+- StrategyRuntime: 실시간 틱/체결을 관심 전략의 TradingManager로 분배, 전략별 틱당 CPU 시간 집계
+  (주문 저널 연결 시 재시작 후 restore() → 잔고 조회 → reconcile()로 매매 상태 복원)
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from .rolling import IndicatorBook
+from .trading_manager import TradingManager
+
+
+REAL_FIDS = "10;12;13;16;228"  # 현재가, 등락율, 누적거래량, 시가, 체결강도
+
+
+class SharedFeed:
+    """
+    전략 공용 시세 피드 (Kiwoom 대리 객체)
+
+    Strategy/TradingManager의 kiwoom 자리에 그대로 넣어 사용합니다.
+    조회/등록 외의 속성(account_holdings, send_order 등)은 Kiwoom으로 위임됩니다.
+    """
+
+    def __init__(self, kiwoom, minute_ttl: float = 30.0):
+        self._kiwoom = kiwoom
+        self.minute_ttl = minute_ttl
+        self.subscribers: Dict[str, set] = {}  # {code: {전략명}}
+        self._daily = {}    # {code: (거래일, 일봉)}
+        self._minutes = {}  # {(code, interval): (조회 시각, 분봉)}
+        self.stats = {'tr_daily': 0, 'tr_minute': 0, 'cache_hits': 0, 'real_reg': 0, 'real_remove': 0}
+
+    def __getattr__(self, name):
+        return getattr(self._kiwoom, name)
+
+    # ---------- 실시간 등록 (참조 카운트) ----------
+
+    def subscribe(self, owner: str, code: str) -> bool:
+        """전략의 실시간 관심 등록 (첫 구독일 때만 SetRealReg), 실제 등록했으면 True"""
+        owners = self.subscribers.setdefault(code, set())
+        first = not owners
+        owners.add(owner)
+        if first and self._kiwoom.get_connect_state() == 1:
+            self._kiwoom.set_real_reg(code, REAL_FIDS, "1")
+            self.stats['real_reg'] += 1
+        return first
+
+    def unsubscribe(self, owner: str, code: str) -> bool:
+        """관심 해제 (마지막 구독자일 때만 SetRealRemove), 실제 해제했으면 True"""
+        owners = self.subscribers.get(code)
+        if not owners or owner not in owners:
+            return False
+        owners.discard(owner)
+        if owners:
+            return False
+        del self.subscribers[code]
+        if self._kiwoom.get_connect_state() == 1 and hasattr(self._kiwoom, 'set_real_remove'):
+            self._kiwoom.set_real_remove(code)
+            self.stats['real_remove'] += 1
+        return True
+
+    # ---------- 조회 캐시 ----------
+
+    def get_daily_data(self, stock_code, date=None):
+        """일봉 조회 (같은 거래일에는 전략 간 재사용)"""
+        if date:
+            self.stats['tr_daily'] += 1
+            return self._kiwoom.get_daily_data(stock_code, date)
+        today = datetime.now().strftime('%Y%m%d')
+        cached = self._daily.get(stock_code)
+        if cached and cached[0] == today:
+            self.stats['cache_hits'] += 1
+            return cached[1]
+        self.stats['tr_daily'] += 1
+        data = self._kiwoom.get_daily_data(stock_code)
+        if data:
+            self._daily[stock_code] = (today, data)
+        return data
+
+    def get_minute_data(self, stock_code, interval=3):
+        """분봉 조회 (minute_ttl초 동안 재사용)"""
+        key = (stock_code, interval)
+        cached = self._minutes.get(key)
+        now = time.time()
+        if cached and now - cached[0] < self.minute_ttl:
+            self.stats['cache_hits'] += 1
+            return cached[1]
+        self.stats['tr_minute'] += 1
+        data = self._kiwoom.get_minute_data(stock_code, interval)
+        if data:
+            self._minutes[key] = (now, data)
+        return data
+
+
+class CapitalSlice:
+    """
+    전략별 운용 자금 배정분
+
+    fraction: 상위 AssetManager 운용 자금(B) 중 배정 비율
+    매수/매도 등록은 상위 AssetManager에도 반영되어 전체 자산 관리가 유지됩니다.
+    """
+
+    def __init__(self, parent, name: str, fraction: float = 1.0, max_stock_amount: int = None):
+        self.parent = parent
+        self.name = name
+        self.fraction = fraction
+        self.max_stock_amount = max_stock_amount
+        self.invested_amount = 0
+
+    def __getattr__(self, name):
+        return getattr(self.parent, name)
+
+    @property
+    def current_capital(self) -> int:
+        return int(self.parent.current_capital * self.fraction)
+
+    @property
+    def available_cash(self) -> int:
+        """배정분 가용 현금 (전체 가용 현금을 넘지 않음)"""
+        return max(0, min(self.current_capital - self.invested_amount, self.parent.available_cash))
+
+    def get_max_stock_amount(self) -> int:
+        if self.max_stock_amount is not None:
+            return self.max_stock_amount
+        return self.parent.get_max_stock_amount()
+
+    def can_buy(self, amount: int) -> tuple:
+        """매수 가능 여부 검증 (배정분 기준)"""
+        if self.parent.data['initial_capital'] <= 0:
+            return False, "운용 금액이 설정되지 않았습니다."
+        if amount > self.available_cash:
+            return False, f"[{self.name}] 배정 자금 부족 (필요: {amount:,}원, 보유: {self.available_cash:,}원)"
+        max_amount = self.get_max_stock_amount()
+        if max_amount > 0 and amount > max_amount:
+            return False, f"종목당 최대 매수 한도 초과 (한도: {max_amount:,}원)"
+        return True, "매수 가능"
+
+    def calculate_order_qty(self, price: int) -> int:
+        """주문 수량 계산 (종목당 최대 매수 금액 기준)"""
+        if price <= 0:
+            return 0
+        max_amount = self.get_max_stock_amount()
+        if max_amount <= 0:
+            return 0
+        return int(max_amount // price)
+
+    def reserve_cash(self, amount: int) -> bool:
+        can, msg = self.can_buy(amount)
+        if not can:
+            print(f"❌ 현금 예약 실패: {msg}")
+            return False
+        self.register_buy(amount)
+        return True
+
+    def register_buy(self, amount: int):
+        self.invested_amount += amount
+        self.parent.register_buy(amount)
+
+    def register_sell(self, buy_amount: int, sell_amount: int):
+        self.invested_amount = max(0, self.invested_amount - buy_amount)
+        self.parent.register_sell(buy_amount, sell_amount)
+
+    def release_cash(self, amount: int):
+        self.invested_amount = max(0, self.invested_amount - amount)
+        self.parent.release_cash(amount)
+
+
+class StrategyRuntime(QObject):
+    """
+    다중 전략 실행기
+
+    사용 예:
+        runtime = StrategyRuntime(kiwoom, db, asset_manager, tick_archive)
+        manager = runtime.add_strategy("변동성돌파", VolatilityBreakoutStrategy(None, None, db), fraction=0.7)
+        runtime.add_strategy("눌림목", PullbackStrategy(None, None, db), fraction=0.3)
+        runtime.start()
+
+    첫 번째로 추가한 전략(기본 전략)은 모든 틱을 받아 가격 캐시/틱 아카이브를 담당하고,
+    나머지 전략은 감시 종목/보유 종목의 틱만 받습니다.
+    """
+    sig_log = pyqtSignal(str)
+    sig_update_status = pyqtSignal(str, str)
+    sig_trade_event = pyqtSignal()
+
+    def __init__(self, kiwoom, db, asset_manager, tick_archive=None):
+        super().__init__()
+        self.kiwoom = kiwoom
+        self.db = db
+        self.asset_manager = asset_manager
+        self.tick_archive = tick_archive
+        self.feed = SharedFeed(kiwoom)
+        self.indicator_book = IndicatorBook()
+        self.slots: Dict[str, Dict] = {}  # {전략명: {'strategy', 'manager', 'capital', 'stats'}}
+        self.primary: Optional[str] = None
+        self.owners: Dict[str, str] = {}  # {종목코드: 매수한 전략명}
+        self.journal = None  # 주문 저널 (core.journal.TradeJournal)
+        self._started = False
+
+    # ---------- 전략 관리 ----------
+
+    def add_strategy(self, name: str, strategy, fraction: float = 1.0,
+                     max_stock_amount: int = None) -> TradingManager:
+        """전략 추가 (공용 피드/지표 캐시/자금 배정 연결) → 전략 전용 TradingManager"""
+        if name in self.slots:
+            raise ValueError(f"이미 등록된 전략입니다: {name}")
+        capital = CapitalSlice(self.asset_manager, name, fraction, max_stock_amount)
+        strategy.kiwoom = self.feed
+        strategy.asset_manager = capital
+        strategy.indicator_book = self.indicator_book
+        is_primary = self.primary is None
+        manager = TradingManager(self.feed, self.db, capital, strategy,
+                                 tick_archive=self.tick_archive if is_primary else None,
+                                 connect_signals=False)
+        manager.may_trade = lambda code, buying=False, name=name: self.may_trade(name, code, buying)
+        manager.update_indicators = is_primary
+        manager.name = name
+        manager.journal = self.journal
+        # 직접 연결: 엔진 스레드에서 발생해도 런타임 시그널로 즉시 전달 (GUI 전달은 수신 측 연결 방식에 따름)
+        manager.sig_log.connect(self.sig_log.emit, Qt.DirectConnection)
+        manager.sig_update_status.connect(self.sig_update_status.emit, Qt.DirectConnection)
+        manager.sig_trade_event.connect(self.sig_trade_event.emit, Qt.DirectConnection)
+        self.slots[name] = {
+            'strategy': strategy, 'manager': manager, 'capital': capital,
+            'stats': {'ticks': 0, 'total_ns': 0, 'max_ns': 0},
+        }
+        if is_primary:
+            self.primary = name
+        return manager
+
+    def remove_strategy(self, name: str):
+        """전략 제거 (실시간 관심 해제)"""
+        slot = self.slots.pop(name, None)
+        if slot is None:
+            return
+        for code in list(self.feed.subscribers):
+            self.feed.unsubscribe(name, code)
+        if self.primary == name:
+            self.primary = next(iter(self.slots), None)
+            if self.primary:
+                self.slots[self.primary]['manager'].update_indicators = True
+
+    def manager(self, name: str = None) -> Optional[TradingManager]:
+        slot = self.slots.get(name or self.primary)
+        return slot['manager'] if slot else None
+
+    def start(self, ticks: bool = True):
+        """
+        Kiwoom 실시간/체결 시그널 연결 (런타임이 1회 수신 후 분배)
+
+        ticks=False: 실시간 틱은 TradingEngine이 엔진 스레드에서 on_real_data로 전달
+        """
+        if self._started:
+            return
+        if ticks:
+            self.kiwoom.sig_real_data.connect(self.on_real_data)
+        self.kiwoom.sig_chejan_received.connect(self.on_chejan_data)
+        self._started = True
+
+    def may_trade(self, name: str, code: str, buying: bool = False) -> bool:
+        """
+        종목 소유권 판정 (한 계좌에서 종목당 한 전략만 매매)
+
+        매수: 다른 전략이 보유하거나 주문 중이 아니어야 함
+        매도: 매수한 전략 (소유 전략이 없는 기존 보유 종목은 기본 전략)
+        """
+        owner = self.owners.get(code)
+        if not buying:
+            return (owner or self.primary) == name
+        if owner is not None and owner != name:
+            return False
+        return not any(code in slot['strategy'].ordered_codes
+                       for other, slot in self.slots.items() if other != name)
+
+    # ---------- 실시간 관심 종목 ----------
+
+    def subscribe(self, name: str, code: str) -> bool:
+        return self.feed.subscribe(name, code)
+
+    def sync_subscriptions(self, name: str = None):
+        """전략 감시 종목(universe)과 실시간 등록 상태 동기화 (제거된 종목 해제 포함)"""
+        for slot_name in ([name] if name else list(self.slots)):
+            universe = self.slots[slot_name]['strategy'].universe
+            for code in universe:
+                self.feed.subscribe(slot_name, code)
+            for code, owners in list(self.feed.subscribers.items()):
+                if slot_name in owners and code not in universe and self.owners.get(code) != slot_name:
+                    self.feed.unsubscribe(slot_name, code)
+
+    # ---------- 분배 ----------
+
+    @pyqtSlot(str, dict)
+    def on_real_data(self, code, data):
+        """틱 1건을 관심 전략에 분배 (전략별 처리 시간 측정)"""
+        owner = self.owners.get(code)
+        for name, slot in self.slots.items():
+            if name != self.primary and owner != name and code not in slot['strategy'].universe:
+                continue
+            t0 = time.perf_counter_ns()
+            slot['manager'].on_real_data(code, data)
+            elapsed = time.perf_counter_ns() - t0
+            stats = slot['stats']
+            stats['ticks'] += 1
+            stats['total_ns'] += elapsed
+            if elapsed > stats['max_ns']:
+                stats['max_ns'] = elapsed
+
+    @pyqtSlot(str, dict)
+    def on_chejan_data(self, gubun, data):
+        """체결 통보를 주문한 전략에 분배 (매수: 주문 낸 전략, 매도: 매수한 전략)"""
+        code = str(data.get('종목코드', '')).strip()
+        if code.startswith('A'):
+            code = code[1:]
+        if "매수" in str(data.get('주문구분', '')):
+            owner = next((name for name, slot in self.slots.items()
+                          if code in slot['strategy'].ordered_codes), None)
+            owner = owner or self.owners.get(code) or self.primary
+            self.owners[code] = owner
+        else:
+            owner = self.owners.get(code)
+            if owner not in self.slots:
+                owner = self.primary
+        if owner is None:
+            return
+        self.slots[owner]['manager'].on_chejan_data(gubun, data)
+        if "매도" in str(data.get('주문구분', '')) and self.kiwoom.positions.qty(code) == 0:
+            # 전량 매도 → 매수 전략 연결 해제 (다음 매수는 주문 낸 전략으로 새로 연결)
+            self.owners.pop(code, None)
+
+    # ---------- 주문 저널 ----------
+
+    def restore(self, journal) -> Dict:
+        """
+        저널 상태로 매매 상태 복원 (잔고 조회 전, TR 없음) + 이후 주문을 저널에 기록
+
+        복원: 당일 매수 주문 종목(중복 매수 방지), 종목별 매수 전략, 실시간 시세 캐시
+        """
+        self.journal = journal
+        state = journal.state
+        restored = {'ordered': 0, 'owners': 0, 'prices': len(state.prices)}
+        for name, slot in self.slots.items():
+            manager, strategy = slot['manager'], slot['strategy']
+            manager.journal = journal
+            manager.price_cache.update(state.prices)
+            if not hasattr(strategy, 'mark_ordered'):
+                continue
+            for code in state.ordered.get(name, ()):
+                if code not in strategy.ordered_codes:
+                    strategy.mark_ordered(code)
+                    restored['ordered'] += 1
+        for code, owner in state.owners.items():
+            if owner in self.slots and code not in self.owners:
+                self.owners[code] = owner
+                restored['owners'] += 1
+        return restored
+
+    def reconcile(self) -> Dict:
+        """
+        잔고 조회(opw00018) 직후 저널의 미완료 주문 대사
+
+        - 주문 전후 보유 수량 차이로 종료 중 놓친 체결을 반영 (매수: 보유 색인/DB 기록/익절 목표가)
+        - 전일 이전 주문은 종료 처리 (시장가 주문은 당일만 유효), 당일 미체결 주문은 계속 추적
+        """
+        result = {'filled': 0, 'expired': 0, 'open': 0}
+        journal = self.journal
+        if journal is None:
+            return result
+        positions = self.kiwoom.positions
+        claimed = {}  # {(구분, 종목코드): 앞선 주문에 배정한 체결 수량} (같은 종목 주문 여러 건이면 주문 순서대로 배정)
+        for order in journal.state.open_orders():
+            code, side = order['code'], order['side']
+            remaining = order['qty'] - order['filled']
+            held = positions.qty(code)
+            changed = held - order['held'] if side == 'buy' else order['held'] - held
+            changed -= claimed.get((side, code), 0)
+            missed = min(remaining, max(0, changed) - order['filled'])
+            claimed[(side, code)] = claimed.get((side, code), 0) + order['filled'] + max(0, missed)
+            if missed > 0:
+                self._apply_missed_fill(order, missed)
+                result['filled'] += 1
+                if missed >= remaining:
+                    continue
+            if order['date'] != journal.state.date:
+                journal.append('close', oid=order['oid'], code=code, side=side)
+                result['expired'] += 1
+            else:
+                result['open'] += 1
+                if side == 'sell':
+                    positions.mark_exiting(code)
+        return result
+
+    def _apply_missed_fill(self, order: Dict, qty: int):
+        """종료 중 놓친 체결 반영 (잔고 조회 결과가 이미 반영되어 있으므로 보유 색인 수량은 그대로)"""
+        code, side = order['code'], order['side']
+        slot = self.slots.get(order['strategy']) or self.slots.get(self.primary)
+        positions = self.kiwoom.positions
+        holding = positions.get(code) or {}
+        name = str(holding.get('종목명', code)).strip()
+        if side == 'buy':
+            price = positions.buy_price(code)
+            self.journal.append('fill', oid=order['oid'], code=code, side='buy', qty=qty, price=price, reconciled=True)
+            positions.mark_bot(code)
+            self.owners[code] = order['strategy'] if order['strategy'] in self.slots else self.primary
+            if slot is not None:
+                slot['strategy'].target_prices[code] = slot['strategy'].exit_prices(price)[1]
+                profile = slot['strategy'].universe.source(code, "")
+                self.db.save_trade(code, name, "매수", price, qty, strategy=profile)
+            self.sig_log.emit(f"🔁 [저널 복원] {name} 매수 {qty}주 체결 반영 (매입가 {price:,}원)")
+        else:
+            # 체결가를 알 수 없어 손익은 반영하지 않음 (거래내역에서 확인 필요)
+            self.journal.append('fill', oid=order['oid'], code=code, side='sell', qty=qty, price=0, reconciled=True)
+            self.sig_log.emit(f"⚠️ [저널 복원] {name} 매도 {qty}주 체결 누락 확인 (체결가 미확인, 손익 미반영)")
+
+    # ---------- 자금 배정 ----------
+
+    def sync_capital(self) -> Dict[str, int]:
+        """
+        전략별 배정분 사용액(invested_amount) 재계산 (메모리 값은 재시작 시 0이므로 로그인/자산 갱신 때 맞춤)
+
+        보유분: 로트 장부의 종목별 매입 원금 → 매수한 전략 (owners, 없으면 기본 전략)
+        미체결 매수: 저널의 예약 현금 → 주문 낸 전략
+        """
+        invested = {name: 0 for name in self.slots}
+        if not invested:
+            return invested
+        for code, cost in self.asset_manager.lots.cost.items():
+            owner = self.owners.get(code)
+            invested[owner if owner in invested else self.primary] += cost
+        if self.journal is not None:
+            for order in self.journal.state.open_orders('buy'):
+                owner = order['strategy'] if order['strategy'] in invested else self.primary
+                invested[owner] += order['reserved']
+        for name, amount in invested.items():
+            self.slots[name]['capital'].invested_amount = amount
+        return invested
+
+    # ---------- 통계 ----------
+
+    def cpu_stats(self) -> Dict[str, Dict]:
+        """전략별 틱 처리 시간 {전략명: {ticks, avg_us, max_us, total_ms}}"""
+        result = {}
+        for name, slot in self.slots.items():
+            s = slot['stats']
+            result[name] = {
+                'ticks': s['ticks'],
+                'avg_us': round(s['total_ns'] / s['ticks'] / 1000, 2) if s['ticks'] else 0.0,
+                'max_us': round(s['max_ns'] / 1000, 2),
+                'total_ms': round(s['total_ns'] / 1e6, 2),
+            }
+        return result
+
+    def strategies(self) -> List[str]:
+        return list(self.slots)
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import random
+
+    from core.database import Database
+    from logic.asset_manager import AssetManager
+    from logic.simulator import SimKiwoom
+    from logic.strategy import VolatilityBreakoutStrategy
+
+    print("=" * 50)
+    print("다중 전략 런타임 벤치마크 (3전략 × 300종목, 30만 틱)")
+    print("=" * 50)
+
+    codes = [f"{i:06d}" for i in range(300)]
+    db = Database(":memory:", read_workers=1, query_cache=True)
+    for code in codes:
+        db.save_daily_bars(code, [{'일자': "20240104", '시가': 10000, '고가': 10300, '저가': 9800,
+                                   '종가': 10000, '거래량': 1_000_000}], keep=1)
+    kiwoom = SimKiwoom()
+    asset_manager = AssetManager(db=None)
+    asset_manager.data['initial_capital'] = 300_000_000
+    asset_manager.data['max_stock_amount'] = 2_000_000
+
+    runtime = StrategyRuntime(kiwoom, db, asset_manager)
+    for name, k, fraction, universe in (("k0.5", 0.5, 0.5, codes), ("k0.7", 0.7, 0.3, codes[:150]),
+                                        ("k0.3", 0.3, 0.2, codes[150:])):
+        strategy = VolatilityBreakoutStrategy(None, None, db)
+        strategy.params.update({'k': k, 'take_profit': 3.0, 'stop_loss': 2.0})
+        strategy.log_msg.connect(lambda msg: None)
+        runtime.add_strategy(name, strategy, fraction=fraction)
+        strategy.set_universe(universe)
+        strategy.prepare_targets(universe, trade_date="20240105")
+        runtime.sync_subscriptions(name)
+    runtime.start()
+
+    rng = random.Random(0)
+    prices = {code: 10000 for code in codes}
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 자산 변동 출력 생략
+        for i in range(300_000):
+            code = codes[rng.randrange(len(codes))]
+            prices[code] = max(100, prices[code] + rng.choice((-10, 0, 10)))
+            kiwoom.clock.now_ns = i * 50_000_000  # 틱 간격 50ms
+            kiwoom.engine.on_tick(code, prices[code])
+            kiwoom.sig_real_data.emit(code, {'current_price': prices[code], 'open': 10000,
+                                             'volume': i, 'strength': 120.0, 'rate': 0.0})
+    elapsed = time.perf_counter() - t0
+
+    print(f"  전체: {elapsed:.2f}초 ({300_000 / elapsed:,.0f}틱/초)")
+    print(f"  실시간 등록: {runtime.feed.stats['real_reg']}회 (종목 {len(codes)}개, 전략 {len(runtime.slots)}개)")
+    owned = {name: sum(1 for owner in runtime.owners.values() if owner == name) for name in runtime.slots}
+    for name, s in runtime.cpu_stats().items():
+        print(f"  [{name}] 매수 {owned[name]}종목  배정 잔여 {runtime.slots[name]['capital'].available_cash:,}원")
+        print(f"  [{name}] 틱 {s['ticks']:,}  평균 {s['avg_us']}us  최대 {s['max_us']}us  합계 {s['total_ms']}ms")
@@ -0,0 +1,372 @@
+"""
+틱 단위 모의 매매 모듈 (Simulator)
+틱 아카이브에 저장된 하루치 체결을 실제 TradingManager 경로로 재생합니다.
+
+    TickArchiveReader → SimKiwoom.sig_real_data → TradingManager.on_real_data
+                                                     ├ on_buy_trigger → process_buy_strategy → send_order
+                                                     └ 익절/손절 → send_order
+    send_order → MatchingEngine (지연 + 슬리피지) → sig_chejan_received → TradingManager.on_chejan_data
+
+- 가상 시계: 틱의 수신 시각(ts)으로 진행 (대기 없음, 실제 속도와 무관)
+- 주문: 시장가("03")만 지원, 지연 시간 이후 해당 종목의 첫 틱 가격 ± 슬리피지로 전량 체결
+- DB: 메모리 DB (실제 매매 기록에 영향 없음)
+"""
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.database import Database
+from core.latency import tracer
+from core.position_book import PositionBook
+from core.tick_archive import TickArchiveReader
+from .asset_manager import AssetManager
+from .strategy import VolatilityBreakoutStrategy
+from .trading_manager import TradingManager
+from .universe import Universe
+
+
+SIM_ACCOUNT = "SIM0000000"
+
+
+class SimClock:
+    """가상 시계 (재생 중인 틱 시각, epoch ns)"""
+
+    def __init__(self):
+        self.now_ns = 0
+
+    def now(self) -> float:
+        return self.now_ns / 1e9
+
+
+class _SimOcx:
+    """TradingManager가 사용하는 OCX 호출(GetMasterCodeName)만 흉내"""
+
+    def __init__(self, names: Dict[str, str]):
+        self.names = names
+
+    def dynamicCall(self, method, *args):
+        if method.startswith("GetMasterCodeName"):
+            return self.names.get(args[0], args[0])
+        return ""
+
+
+class MatchingEngine:
+    """
+    모의 체결 엔진
+
+    Args:
+        latency_ms: 주문 전송 → 체결 가능 시점까지 지연
+        slippage_bps: 시장가 체결 불리 폭 (1bp = 0.01%)
+    """
+
+    def __init__(self, kiwoom: "SimKiwoom", latency_ms: float = 50.0, slippage_bps: float = 5.0):
+        self.kiwoom = kiwoom
+        self.latency_ns = int(latency_ms * 1e6)
+        self.slippage = slippage_bps / 10000
+        self.pending: Dict[str, List[Dict]] = {}  # {code: [주문]}
+        self.fills: List[Dict] = []
+        self.stats = {'orders': 0, 'fills': 0, 'rejected': 0}
+        self._order_no = 0
+
+    def submit(self, order_type: int, code: str, qty: int) -> int:
+        """주문 접수 (매도는 보유 - 미체결 매도 수량을 넘으면 거부)"""
+        self.stats['orders'] += 1
+        if order_type == 2:
+            pending_sell = sum(o['qty'] for o in self.pending.get(code, ()) if o['type'] == 2)
+            if qty > self.kiwoom.holding_qty(code) - pending_sell:
+                # 실제 서버 거부(매도가능수량 부족)와 같이 체결 통보 없음
+                self.stats['rejected'] += 1
+                return 0
+        self._order_no += 1
+        self.pending.setdefault(code, []).append({
+            'no': f"{self._order_no:07d}", 'type': order_type, 'qty': int(qty),
+            'due': self.kiwoom.clock.now_ns + self.latency_ns,
+        })
+        return 0
+
+    def on_tick(self, code: str, price: int):
+        """종목 틱 도착 시 체결 가능한 주문 처리"""
+        orders = self.pending.get(code)
+        if not orders:
+            return
+        now = self.kiwoom.clock.now_ns
+        due = [o for o in orders if o['due'] <= now]
+        if not due:
+            return
+        self.pending[code] = [o for o in orders if o['due'] > now]
+        for order in due:
+            if order['type'] == 1:
+                fill_price = int(np.ceil(price * (1 + self.slippage)))
+            else:
+                fill_price = int(price * (1 - self.slippage))
+            self.stats['fills'] += 1
+            self.fills.append({'ts': now, 'code': code, 'type': "매수" if order['type'] == 1 else "매도",
+                               'qty': order['qty'], 'price': fill_price, 'tick_price': price})
+            self.kiwoom.fill(order, code, fill_price)
+
+    def cancel_all(self) -> int:
+        """미체결 주문 전부 취소 (장 마감)"""
+        count = sum(len(v) for v in self.pending.values())
+        self.pending.clear()
+        return count
+
+
+class SimKiwoom(QObject):
+    """
+    TradingManager/Strategy가 사용하는 Kiwoom 인터페이스의 모의 구현
+
+    account_holdings 형식은 opw00018 결과(종목코드/종목명/보유수량/매입가)와 같습니다.
+    """
+    sig_chejan_received = pyqtSignal(str, dict)
+    sig_real_data = pyqtSignal(str, dict)
+
+    def __init__(self, names: Dict[str, str] = None, latency_ms: float = 50.0, slippage_bps: float = 5.0):
+        super().__init__()
+        self.clock = SimClock()
+        self.names = names or {}
+        self.ocx = _SimOcx(self.names)
+        self.account_list = [SIM_ACCOUNT]
+        self.positions = PositionBook()  # 보유 종목 (체결 통보 시 TradingManager가 반영)
+        self.account_holdings = self.positions.items
+        self.engine = MatchingEngine(self, latency_ms, slippage_bps)
+
+    def get_connect_state(self):
+        return 1
+
+    def set_real_reg(self, codes, fid_list="10", opt_type="1"):
+        """모의 매매는 재생 틱을 직접 전달하므로 실시간 등록 없음"""
+
+    def set_real_remove(self, code, screen_no="1000"):
+        """모의 매매는 실시간 해제 없음"""
+
+    def send_order(self, order_type, stock_code, quantity, price, account_no):
+        """시장가 주문만 지원 (price는 무시, hoga "03")"""
+        started_ns = tracer.now() if tracer.enabled else 0
+        result = self.engine.submit(order_type, stock_code, quantity)
+        if started_ns:
+            tracer.on_send(stock_code, 'buy' if order_type == 1 else 'sell', started_ns, result == 0)
+        return result
+
+    def get_daily_data(self, stock_code, date=None):
+        """모의 매매 중 TR 조회 없음 (목표가는 재생 전에 일봉 캐시로 일괄 계산)"""
+        return []
+
+    def holding_qty(self, code: str) -> int:
+        return self.positions.qty(code)
+
+    def fill(self, order: Dict, code: str, price: int):
+        """체결 통보 (잔고 반영은 실제 계좌와 같이 TradingManager가 체결 통보로 처리)"""
+        qty = order['qty']
+        name = self.names.get(code, code)
+        chejan = {'주문구분': "+매수" if order['type'] == 1 else "-매도", '종목코드': "A" + code,
+                  '종목명': name, '주문번호': order['no'], '주문상태': "체결",
+                  '체결수량': str(qty), '단위체결량': str(qty), '체결가격': str(price)}
+        self.sig_chejan_received.emit('0', chejan)
+
+
+class SimResult:
+    """하루 재생 결과"""
+
+    def __init__(self, date: str, ticks: int, wall_sec: float, span_sec: float,
+                 fills: List[Dict], stats: Dict, realized: int, unrealized: int,
+                 open_positions: Dict[str, Dict], log: List[str]):
+        self.date = date
+        self.ticks = ticks
+        self.wall_sec = wall_sec
+        self.span_sec = span_sec
+        self.fills = fills
+        self.stats = stats
+        self.realized = realized
+        self.unrealized = unrealized
+        self.open_positions = open_positions
+        self.log = log
+
+    @property
+    def speedup(self) -> float:
+        """실제 장 시간 대비 재생 배속"""
+        return self.span_sec / self.wall_sec if self.wall_sec else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            'date': self.date,
+            'ticks': self.ticks,
+            'orders': self.stats['orders'],
+            'fills': self.stats['fills'],
+            'rejected': self.stats['rejected'],
+            'canceled': self.stats.get('canceled', 0),
+            'realized': self.realized,
+            'unrealized': self.unrealized,
+            'open_positions': len(self.open_positions),
+            'wall_sec': round(self.wall_sec, 2),
+            'speedup': round(self.speedup, 1),
+        }
+
+    def __repr__(self):
+        return f"SimResult({self.summary()})"
+
+
+class Simulator:
+    """
+    틱 재생 모의 매매기
+
+    사용 예:
+        sim = Simulator("ticks", daily_bars={code: db.get_daily_bars(code) for code in codes},
+                        params=strategy.params, capital=10_000_000, max_stock_amount=1_000_000)
+        result = sim.run_day("20240105", codes)
+        print(result.summary())
+    """
+
+    def __init__(self, tick_root: str = "ticks", daily_bars: Dict[str, Sequence[Dict]] = None,
+                 params: Dict = None, capital: int = 10_000_000, max_stock_amount: int = 1_000_000,
+                 latency_ms: float = 50.0, slippage_bps: float = 5.0, names: Dict[str, str] = None):
+        """
+        Args:
+            tick_root: 틱 아카이브 루트
+            daily_bars: {종목코드: Kiwoom 일봉 (최신 → 과거)} - 전일 변동폭 계산용
+            params: 전략 파라미터 (k, stop_loss, take_profit, min_intensity, ...)
+            capital / max_stock_amount: 운용 자금 / 종목당 최대 매수 금액
+            latency_ms / slippage_bps: 체결 엔진 설정
+        """
+        self.reader = TickArchiveReader(tick_root)
+        self.daily_bars = daily_bars or {}
+        self.params = dict(params or {})
+        self.capital = capital
+        self.max_stock_amount = max_stock_amount
+        self.latency_ms = latency_ms
+        self.slippage_bps = slippage_bps
+        self.names = names or {}
+
+    def _build(self):
+        """재생용 구성 요소 생성 (메모리 DB, 모의 Kiwoom, 실제 전략/매매 관리자)"""
+        db = Database(":memory:", read_workers=1, query_cache=True)
+        for code, bars in self.daily_bars.items():
+            db.save_daily_bars(code, list(bars), keep=len(bars))
+        kiwoom = SimKiwoom(self.names, self.latency_ms, self.slippage_bps)
+        asset_manager = AssetManager(db=None)
+        asset_manager.data['initial_capital'] = int(self.capital)
+        asset_manager.data['max_stock_amount'] = int(self.max_stock_amount)
+        strategy = VolatilityBreakoutStrategy(kiwoom, asset_manager, db)
+        strategy.params.update(self.params)
+        manager = TradingManager(kiwoom, db, asset_manager, strategy)
+        return db, kiwoom, asset_manager, strategy, manager
+
+    def run_day(self, date_str: str, codes: Sequence[str] = None, quiet: bool = True) -> Optional[SimResult]:
+        """
+        하루치 틱 재생
+
+        Args:
+            codes: 감시 종목 (None이면 아카이브의 전 종목)
+            quiet: 전략/매매 로그를 콘솔에 출력하지 않음 (SimResult.log에 보관)
+        """
+        day = self.reader.open_day(date_str)
+        if day is None:
+            return None
+        codes = [c for c in (codes or day.codes) if c in day.index]
+        db, kiwoom, asset_manager, strategy, manager = self._build()
+        log = []
+        manager.sig_log.connect(log.append)
+        strategy.log_msg.connect(log.append)
+
+        # 장전: 감시 종목 + 전일 일봉으로 목표가 계획 일괄 계산 (시가는 첫 틱에서 반영)
+        strategy.universe = Universe(codes)
+        strategy.prepare_targets(codes, trade_date=date_str)
+
+        # 종목별 구간을 시각 순으로 병합 (memory-map 컬럼에서 한 번에 추출)
+        spans = [day.index[c] for c in codes]
+        rows = np.concatenate([np.arange(s, e) for s, e in spans]) if spans else np.array([], dtype=np.int64)
+        code_ids = np.repeat(np.arange(len(codes)), [e - s for s, e in spans])
+        order = np.argsort(day['ts'][rows], kind='stable')
+        rows, code_ids = rows[order], code_ids[order]
+        ts_list = day['ts'][rows].tolist()
+        price_list = day['price'][rows].tolist()
+        volume_list = day['volume'][rows].tolist()
+        strength_list = day['strength'][rows].tolist()
+        rate_list = day['rate'][rows].tolist()
+
+        clock = kiwoom.clock
+        engine = kiwoom.engine
+        emit = kiwoom.sig_real_data.emit
+        opens = {}
+        last_price = {}
+        t0 = time.perf_counter()
+        for i, cid in enumerate(code_ids.tolist()):
+            code = codes[cid]
+            price = price_list[i]
+            clock.now_ns = ts_list[i]
+            engine.on_tick(code, price)
+            # 시가(FID 16): 아카이브 첫 틱 가격 (장 시작 전부터 기록된 경우 실제 시가와 같음)
+            open_price = opens.setdefault(code, price)
+            last_price[code] = price
+            emit(code, {'current_price': float(price), 'rate': rate_list[i], 'volume': volume_list[i],
+                        'strength': strength_list[i], 'open': open_price})
+        wall = time.perf_counter() - t0
+
+        engine.stats['canceled'] = engine.cancel_all()
+        realized = sum(t['realized_profit'] or 0 for t in db.get_trade_history(trade_type="매도"))
+        open_positions = {}
+        unrealized = 0
+        for h in kiwoom.account_holdings:
+            code = h['종목코드'][-6:]
+            value = (last_price.get(code, h['매입가']) - h['매입가']) * h['보유수량']
+            unrealized += value
+            open_positions[code] = {'qty': h['보유수량'], 'buy_price': h['매입가'],
+                                    'last_price': last_price.get(code), 'unrealized': value}
+        span = (ts_list[-1] - ts_list[0]) / 1e9 if ts_list else 0.0
+        db.close()
+
+        if not quiet:
+            for line in log:
+                print(line)
+        return SimResult(date_str, len(ts_list), wall, span, list(engine.fills), dict(engine.stats),
+                         int(realized), int(unrealized), open_positions, log)
+
+    def run(self, days: Sequence[str] = None, codes: Sequence[str] = None) -> List[SimResult]:
+        """여러 날 재생 (일자마다 새 계좌로 시작, 보유 이월 없음)"""
+        days = days or self.reader.list_days()
+        results = []
+        for date_str in days:
+            result = self.run_day(date_str, codes)
+            if result is not None:
+                results.append(result)
+        return results
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    from core.tick_archive import TickArchive
+
+    print("=" * 50)
+    print("틱 재생 모의 매매 (200종목 × 6.5시간)")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp(prefix="sim_ticks_")
+    date_str = "20240105"
+    codes = [f"{i:06d}" for i in range(200)]
+    daily_bars = {code: [{'일자': "20240104", '시가': 10000, '고가': 10300, '저가': 9800,
+                          '종가': 10000, '거래량': 1_000_000}] for code in codes}
+
+    # 합성 틱: 종목당 약 2,500틱 (09:00 ~ 15:30)
+    archive = TickArchive(root, flush_threshold=200_000)
+    start_ns = int(time.mktime(time.strptime(date_str + "0900", "%Y%m%d%H%M"))) * 10**9
+    span_ns = int(6.5 * 3600 * 1e9)
+    for code in codes:
+        n = 2500
+        prices = np.maximum(10000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), 100).astype(int)
+        stamps = np.sort(rng.integers(0, span_ns, n)) + start_ns
+        for ts, price, vol in zip(stamps.tolist(), prices.tolist(), range(1000, 1000 + n * 100, 100)):
+            archive.append(code, {'current_price': price, 'volume': vol, 'strength': 120.0,
+                                  'rate': (price - 10000) / 100}, ts=ts)
+    archive.close(seal=False)
+
+    sim = Simulator(root, daily_bars=daily_bars, params={'k': 0.5, 'take_profit': 3.0, 'stop_loss': 2.0},
+                    capital=100_000_000, max_stock_amount=2_000_000, latency_ms=80, slippage_bps=5)
+    result = sim.run_day(date_str, codes)
+    print(f"  {result.summary()}")
+    shutil.rmtree(root)
@@ -1,5 +1,40 @@
+import math
+from collections import deque
+
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from .rolling import IndicatorBook
+from .universe import Universe
+
+
+# KRX 호가 단위 (코스피/코스닥 공통): (가격 미만, 호가 단위), 50만원 이상은 1,000원
+TICK_TABLE = ((2000, 1), (5000, 5), (20000, 10), (50000, 50), (200000, 100), (500000, 500))
+NO_EXIT = 1 << 62  # 익절 가격 없음 (매입가 0 등)
+EXIT_CACHE_SIZE = 1024  # 매입가별 손절/익절가 캐시 최대 건수 (넘으면 비우고 다시 채움)
+
+
+def tick_size(price) -> int:
+    """가격대별 호가 단위"""
+    for limit, tick in TICK_TABLE:
+        if price < limit:
+            return tick
+    return 1000
+
+
+def floor_tick(price) -> int:
+    """price 이하의 가장 가까운 호가"""
+    price = round(price, 6)  # 부동소수 오차 (10000 * 1.05 = 10500.000000000002) 제거
+    tick = tick_size(price)
+    return int(price // tick * tick)
+
+
+def ceil_tick(price) -> int:
+    """price 이상의 가장 가까운 호가"""
+    price = round(price, 6)
+    tick = tick_size(price)
+    return int(-(-price // tick) * tick)
+
+
 class Strategy(QObject):
     """전략 기본 클래스"""
     # 로그 메시지 발생 시그널
@@ -18,9 +53,19 @@ class Strategy(QObject):
             'min_vol': 100000,
             'confirm_count': 3
         }
-        self.universe = []         # 감시 대상 전체 종목 리스트
-        self.auto_universe = {}    # {code: strategy_name}
+        self.universe = Universe()  # 감시 대상 전체 종목 (자동 발굴 출처/목표가/미검출 횟수 포함)
         self.config_file = None
+        self.indicator_book = IndicatorBook()  # 종목별 롤링 지표 (실시간 틱으로 O(1) 갱신)
+        self.params_version = 0  # 파라미터 변경 시 증가 (매도 가격 캐시 무효화)
+        # DB 쓰기 위임 post_db(fn, *args) (None이면 즉시 실행, TradingEngine이 GUI 스레드 전달로 설정)
+        self.post_db = None
+
+    def _db_write(self, fn, *args):
+        """DB 쓰기 (엔진 스레드에서 판정 중이면 쓰기 연결 소유 스레드로 넘김)"""
+        if self.post_db is None:
+            fn(*args)
+        else:
+            self.post_db(fn, *args)
 
     def load_config(self, user_id):
         """사용자별 전략 설정 로드 (DB 우선, JSON 마이그레이션 포함)"""
@@ -35,12 +80,11 @@ class Strategy(QObject):
             if config:
                 if config.get('params'):
                     self.params.update(config['params'])
+                    self.params_version += 1
                 if config.get('universe'):
-                    self.auto_universe = config['universe']
-                    for code in self.auto_universe:
-                        if code not in self.universe:
-                            self.universe.append(code)
-                self.log_msg.emit(f"⚙️ 전략 설정 로드 완료 (DB): {user_id} (자동 {len(self.auto_universe)}개 종목)")
+                    for code, source in config['universe'].items():
+                        self.universe.add(code, source)
+                self.log_msg.emit(f"⚙️ 전략 설정 로드 완료 (DB): {user_id} (자동 {len(self.universe.auto_sources())}개 종목)")
                 
                 # DB 로드 성공 시 JSON이 있다면 삭제 (마이그레이션 완료로 간주)
                 if os.path.exists(self.config_file):
@@ -60,12 +104,11 @@ class Strategy(QObject):
                         self.params.update(data['params'])
                     else:
                         self.params.update(data)
+                    self.params_version += 1
                     
                     if 'auto_universe' in data:
-                        self.auto_universe = data['auto_universe']
-                        for code in self.auto_universe:
-                            if code not in self.universe:
-                                self.universe.append(code)
+                        for code, source in data['auto_universe'].items():
+                            self.universe.add(code, source)
                                 
                 self.log_msg.emit(f"⚙️ 전략 설정 로드 완료 (JSON → DB 이관 예정): {user_id}")
                 
@@ -82,12 +125,12 @@ class Strategy(QObject):
             
         try:
             if self.db:
-                self.db.save_strategy_config(self.user_id, self.params, self.auto_universe)
+                self.db.save_strategy_config(self.user_id, self.params, self.universe.auto_sources())
                 # self.log_msg.emit(f"💾 전략 설정 DB 저장 완료")
             else:
                 # DB가 없는 비상 상황용 (거의 없음)
                 import json
-                data = {'params': self.params, 'auto_universe': self.auto_universe}
+                data = {'params': self.params, 'auto_universe': self.universe.auto_sources()}
                 with open(self.config_file, 'w', encoding='utf-8') as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception as e:
@@ -95,6 +138,7 @@ class Strategy(QObject):
     
     def update_params(self, params):
         self.params.update(params)
+        self.params_version += 1
         self.log_msg.emit(f"⚙️ 전략 파라미터 업데이트: {self.params}")
         self.save_config()  # 변경 즉시 저장 (DB)
 
@@ -102,143 +146,302 @@ class Strategy(QObject):
         """주기적으로 실행되는 메인 로직"""
         pass
 
+    def exit_prices(self, buy_price: int) -> tuple:
+        """
+        매입가 기준 손절/익절 가격 (호가 단위 정수)
+
+        손절: 현재가 <= stop_price (수익률 <= -|stop_loss|%)
+        익절: 현재가 >= take_price (수익률 >= |take_profit|%)
+        """
+        if buy_price <= 0:
+            return 0, NO_EXIT
+        stop_loss = abs(float(self.params['stop_loss']))
+        take_profit = abs(float(self.params['take_profit']))
+        return (floor_tick(buy_price * (1 - stop_loss / 100)),
+                ceil_tick(buy_price * (1 + take_profit / 100)))
+
     # ---------- 기술적 지표 계산 헬퍼 (Advanced) ----------
-    
+    # 종목 1개 판정용 스칼라 계산 (data: Kiwoom 봉 데이터, 최신 → 과거)
+    # 여러 종목을 한 번에 다시 계산할 때는 indicators.BarPanel + 벡터 함수 사용 (종목 1개에는 배열 변환 비용이 더 큼)
+
     def calculate_sma(self, data, period):
         """단순 이동평균 계산"""
         if len(data) < period:
             return None
-        prices = [d['종가'] for d in data[:period]]
-        return sum(prices) / period
+        return sum(d['종가'] for d in data[:period]) / period
 
     def calculate_bollinger_bands(self, data, period=20, k=2):
         """볼린저 밴드 계산"""
         if len(data) < period:
             return None, None, None
-        
-        import math
         prices = [d['종가'] for d in data[:period]]
         avg = sum(prices) / period
-        
-        # 표준편차
-        variance = sum((p - avg) ** 2 for p in prices) / period
-        std_dev = math.sqrt(variance)
-        
-        upper_band = avg + (k * std_dev)
-        lower_band = avg - (k * std_dev)
-        
-        return upper_band, avg, lower_band
+        std_dev = math.sqrt(sum((p - avg) ** 2 for p in prices) / period)
+        return avg + k * std_dev, avg, avg - k * std_dev
 
     def check_breakout(self, data, period=20):
         """전고점 돌파 확인 (최근 period일 최고가 상향 돌파)"""
         if len(data) < period + 1:
             return False, 0
-        
-        current_price = data[0]['종가']
         # 오늘 제외 최근 period일 동안의 최고가
-        past_highs = [d['고가'] for d in data[1:period+1]]
-        max_high = max(past_highs)
-        
-        return current_price > max_high, max_high
+        max_high = max(d['고가'] for d in data[1:period + 1])
+        return data[0]['종가'] > max_high, max_high
 
     def check_trend_alignment(self, data):
         """정배열 확인 (주가 > 5 > 20 > 60)"""
         if len(data) < 60:
             return False
-            
         sma5 = self.calculate_sma(data, 5)
         sma20 = self.calculate_sma(data, 20)
         sma60 = self.calculate_sma(data, 60)
-        
-        current_price = data[0]['종가']
-        
-        if not (sma5 and sma20 and sma60):
-            return False
-            
-        return current_price > sma5 > sma20 > sma60
+        return data[0]['종가'] > sma5 > sma20 > sma60
 
     def check_golden_cross(self, data, short_p=5, long_p=20):
         """골든크로스 발생 확인 (오늘 뚫고 올라갔는지)"""
         if len(data) < long_p + 1:
             return False
-            
-        # 오늘 시점
-        curr_short = self.calculate_sma(data, short_p)
-        curr_long = self.calculate_sma(data, long_p)
-        
-        # 어제 시점
         prev_data = data[1:]
-        prev_short = self.calculate_sma(prev_data, short_p)
-        prev_long = self.calculate_sma(prev_data, long_p)
-        
-        if None in [curr_short, curr_long, prev_short, prev_long]:
-            return False
-            
-        # 어제는 작았는데 오늘은 크면 골든크로스
-        return prev_short <= prev_long and curr_short > curr_long
+        return (self.calculate_sma(prev_data, short_p) <= self.calculate_sma(prev_data, long_p)
+                and self.calculate_sma(data, short_p) > self.calculate_sma(data, long_p))
 
 class VolatilityBreakoutStrategy(Strategy):
     """변동성 돌파 전략"""
     def __init__(self, kiwoom, asset_manager, db=None):
         super().__init__(kiwoom, asset_manager, db=db)
         self.target_prices = {}  # 종목별 목표 매수가
+        self.target_plans = {}   # 종목별 당일 목표가 계획 {code: {prev_high, prev_low, k, breakout_range, open_price, ...}}
+        self.plan_date = None    # 목표가 계획 거래일 (YYYYMMDD)
+        self.missing_targets = deque()  # 일봉 캐시가 없어 TR 조회가 필요한 종목
+        self.triggers = {}       # 매수 트리거 인덱스 {code: 돌파 기준가} (실시간 틱마다 O(1) 확인)
+        self.ordered_codes = set()  # 매수 주문을 낸 종목 (중복 주문 방지)
+        self._exit_cache = {}  # {매입가: (손절가, 익절가)} (파라미터 변경 시 비움, 최대 EXIT_CACHE_SIZE건)
+        self._exit_version = 0
 
     def set_universe(self, codes):
-        """감시 대상 종목 설정 및 목표가 계산"""
+        """감시 대상 종목 설정 및 목표가 계산 (캐시 기반 일괄 계산, 부족분은 대기열)"""
+        if not isinstance(codes, Universe):
+            # 리스트 입력: 기존 종목의 메타데이터(자동 발굴 출처)는 유지
+            universe = Universe()
+            for code in codes:
+                universe.add(code, self.universe.source(code, None))
+            codes = universe
         self.universe = codes
         self.log_msg.emit(f"📋 감시 대상 종목 설정: {len(codes)}개")
+        self.prepare_targets(codes)
+
+    def prepare_targets(self, codes=None, trade_date=None):
+        """
+        장전 목표가 일괄 계산
+        
+        1) 저장된 당일 목표가 로드 → 2) 일봉 캐시의 전일 봉으로 변동폭 * K 계산 → 3) 일괄 저장
+        시가는 장 시작 후 첫 실시간 체결(on_open_price)에서 반영됩니다.
+        
+        Returns:
+            일봉 캐시가 없어 TR 조회가 필요한 종목 리스트 (missing_targets에도 추가)
+        """
+        from datetime import datetime
+        trade_date = trade_date or datetime.now().strftime('%Y%m%d')
+        codes = list(self.universe if codes is None else codes)
+        k = float(self.params['k'])
+        
+        if trade_date != self.plan_date:
+            self._reset_day(trade_date)
+        else:
+            # K가 바뀐 계획은 폐기 후 재계산 (확정된 목표가/트리거도 해제)
+            for code in [c for c, p in self.target_plans.items() if p.get('k') != k]:
+                del self.target_plans[code]
+                self.target_prices.pop(code, None)
+                self.disarm_trigger(code)
+        
+        # 1. 저장된 계획 (K가 바뀌었으면 재계산)
+        if self.db:
+            for code, plan in self.db.get_target_prices(trade_date).items():
+                if code in codes and plan.get('k') == k:
+                    self.target_plans[code] = plan
+        
+        # 2. 일봉 캐시로 신규 계산
+        todo = [c for c in codes if c not in self.target_plans]
+        prev_bars = self.db.get_prev_daily_bars(todo, trade_date) if (self.db and todo) else {}
+        new_plans = {}
+        for code in todo:
+            bar = prev_bars.get(code)
+            if bar:
+                new_plans[code] = self._build_plan(bar, k)
+        self.target_plans.update(new_plans)
+        if self.db and new_plans:
+            self.db.save_target_prices(trade_date, new_plans)
+        
+        # 3. 시가를 이미 아는 종목은 목표가 확정
         for code in codes:
-            self.calculate_target_price(code)
+            plan = self.target_plans.get(code)
+            if plan and plan.get('target_price'):
+                self.target_prices[code] = int(plan['target_price'])
+                self.arm_trigger(code)
+        
+        missing = [c for c in codes if c not in self.target_plans]
+        for code in missing:
+            if code not in self.missing_targets:
+                self.missing_targets.append(code)
+        self.log_msg.emit(f"🎯 목표가 일괄 계산: {len(codes) - len(missing)}/{len(codes)}개 "
+                          f"(신규 {len(new_plans)}개, 일봉 조회 대기 {len(missing)}개)")
+        return missing
 
-    def calculate_target_price(self, code):
-        """목표 매수가 계산"""
-        # 일봉 데이터 조회 (최근 2일치 필요)
-        # 중요: API 호출 제한 고려 (타이머로 분산 필요할 수 있으나 일단 단순 호출)
-        daily_data = self.kiwoom.get_daily_data(code)
+    def _reset_day(self, trade_date):
+        """거래일 변경: 전일 목표가/트리거/주문 종목 초기화 (전일 트리거로 매수 금지)"""
+        self.target_plans = {}
+        if self.plan_date is not None:
+            # 첫 계산(plan_date 없음)은 저널에서 복원한 당일 주문 종목을 유지
+            self.target_prices = {}
+            self.triggers = {}
+            self.ordered_codes = set()
+        self.plan_date = trade_date
+
+    def needs_open(self, code):
+        """당일 계획의 시가가 아직 반영되지 않았으면 True (실시간 시가 반영 대상)"""
+        plan = self.target_plans.get(code)
+        return plan is not None and not plan.get('open_price')
+
+    def _build_plan(self, prev_bar, k):
+        """전일 봉 → 목표가 계획 (시가 미정)"""
+        volatility = prev_bar['고가'] - prev_bar['저가']
+        return {
+            'prev_date': prev_bar['일자'],
+            'prev_high': prev_bar['고가'],
+            'prev_low': prev_bar['저가'],
+            'prev_close': prev_bar['종가'],
+            'k': k,
+            'breakout_range': int(volatility * k),
+            'open_price': None,
+            'target_price': None,
+        }
+
+    def cache_daily_bars(self, code, daily_data):
+        """
+        조회한 일봉을 캐시에 저장하고 목표가 계획 갱신 (TR 재조회 없이 재사용)
         
-        if len(daily_data) < 2:
-            self.log_msg.emit(f"⚠️ {code}: 일봉 데이터 부족으로 목표가 계산 불가")
+        daily_data[0]이 당일 봉이면 시가까지 반영해 목표가를 확정합니다.
+        """
+        from datetime import datetime
+        if not daily_data:
             return
+        today = datetime.now().strftime('%Y%m%d')
+        if self.plan_date != today:
+            self._reset_day(today)
+        if self.db:
+            self.db.save_daily_bars(code, daily_data)
+        
+        prev_bar = next((bar for bar in daily_data if bar.get('일자', '') < today), None)
+        if prev_bar is None:
+            return
+        plan = self._build_plan(prev_bar, float(self.params['k']))
+        if daily_data[0].get('일자') == today and daily_data[0].get('시가'):
+            plan['open_price'] = int(daily_data[0]['시가'])
+            plan['target_price'] = plan['open_price'] + plan['breakout_range']
+        self.target_plans[code] = plan
+        if self.db:
+            self.db.save_target_prices(today, {code: plan})
+
+    def fetch_next_missing(self):
+        """일봉 캐시가 없는 종목 1개를 TR로 조회 (타이머로 분산 호출)"""
+        while self.missing_targets:
+            code = self.missing_targets.popleft()
+            if code in self.universe and code not in self.target_plans:
+                self.calculate_target_price(code)
+                return True
+        return False
 
-        # 전일 데이터 (인덱스 1)
-        yesterday = daily_data[1]
-        high = yesterday['고가']
-        low = yesterday['저가']
-        close = yesterday['종가']
+    def on_open_price(self, code, open_price):
+        """
+        실시간 시가 반영 (첫 체결 시 1회)
         
-        # 금일 시가 (인덱스 0의 시가 or 실시간 시가)
-        # 주의: 장 시작 전이나 장 초반에는 인덱스 0이 전일 데이터일 수도 있음
-        # 하지만 API 특성상 장 당일엔 오늘 날짜 데이터가 생성됨.
-        today = daily_data[0]
-        current_open = today['시가']
+        Returns:
+            목표가가 이번에 확정되었으면 True
+        """
+        plan = self.target_plans.get(code)
+        if plan is None or plan.get('open_price') or open_price <= 0:
+            return False
+        plan['open_price'] = int(open_price)
+        plan['target_price'] = plan['open_price'] + plan['breakout_range']
+        self.target_prices[code] = plan['target_price']
+        self.arm_trigger(code)
+        if self.db and self.plan_date:
+            self._db_write(self.db.update_target_open, self.plan_date, code, plan['open_price'], plan['target_price'])
+        self.log_msg.emit(f"🎯 {code} 목표가 확정: {plan['target_price']:,}원 (시가 {plan['open_price']:,} + 변동 {plan['breakout_range']:,})")
+        return True
+
+    def calculate_target_price(self, code):
+        """목표 매수가 계산 (당일 계획이 있으면 재사용, 없을 때만 일봉 TR 조회)"""
+        plan = self.target_plans.get(code)
+        if plan is None:
+            # 중요: API 호출 제한 고려 (가능하면 prepare_targets/cache_daily_bars로 미리 계산)
+            daily_data = self.kiwoom.get_daily_data(code)
+            
+            if len(daily_data) < 2:
+                self.log_msg.emit(f"⚠️ {code}: 일봉 데이터 부족으로 목표가 계산 불가")
+                return
+            self.cache_daily_bars(code, daily_data)
+            plan = self.target_plans.get(code)
+            if plan is None:
+                return
         
-        # 변동폭
-        volatility = high - low
+        if plan.get('target_price'):
+            self.target_prices[code] = int(plan['target_price'])
+            self.arm_trigger(code)
+            self.log_msg.emit(f"🎯 {code} 목표가 계산: {plan['target_price']:,}원 (시가 {plan['open_price']:,} + 변동 {plan['breakout_range']:,} * K {plan['k']})")
+        else:
+            self.log_msg.emit(f"🎯 {code} 변동폭 준비: {plan['breakout_range']:,}원 (시가 수신 후 목표가 확정)")
+
+    def add_stock(self, code, source=None):
+        """
+        종목 추가 (조건검색 등)
         
-        # 목표가 = 금일 시가 + (변동폭 * k)
-        k = float(self.params['k'])
-        target_price = current_open + (volatility * k)
+        Args:
+            source: 자동 발굴 출처 (전략/프로필명)
         
-        self.target_prices[code] = int(target_price)
-        self.log_msg.emit(f"🎯 {code} 목표가 계산: {int(target_price):,}원 (시가 {current_open:,} + 변동 {volatility:,} * K {k})")
-
-    def add_stock(self, code):
-        """종목 추가 (조건검색 등)"""
-        if code not in self.universe:
-            self.universe.append(code)
-            # 즉시 목표가 계산 시도
-            self.calculate_target_price(code)
-            self.log_msg.emit(f"➕ 감시 종목 추가: {code}")
+        Returns:
+            새로 추가되었으면 True (이미 감시 중이면 출처만 갱신)
+        """
+        if not self.universe.add(code, source):
+            return False
+        # 즉시 목표가 계산 시도 (검증 단계에서 캐시된 일봉이 있으면 TR 없음)
+        self.calculate_target_price(code)
+        self.log_msg.emit(f"➕ 감시 종목 추가: {code}")
+        return True
 
     def remove_stock(self, code):
         """종목 제거"""
-        if code in self.universe:
-            self.universe.remove(code)
+        if self.universe.discard(code):
             if code in self.target_prices:
                 del self.target_prices[code]
+            self.target_plans.pop(code, None)
+            self.disarm_trigger(code)
+            self.ordered_codes.discard(code)
+            self.indicator_book.remove(code)
             self.log_msg.emit(f"➖ 감시 종목 해제: {code}")
 
 
+    # ---------- 매수 트리거 인덱스 ----------
+
+    def arm_trigger(self, code):
+        """감시 종목의 매수 기준가 장전 (주문 낸 종목은 제외)"""
+        if code in self.universe and code in self.target_prices and code not in self.ordered_codes:
+            self.triggers[code] = self.target_prices[code]
+            self.universe.set_target(code, self.target_prices[code])
+
+    def disarm_trigger(self, code):
+        """매수 트리거 해제"""
+        self.triggers.pop(code, None)
+
+    def check_trigger(self, code, current_price):
+        """실시간 틱 돌파 확인 (O(1), 장전된 종목만)"""
+        threshold = self.triggers.get(code)
+        return threshold is not None and current_price >= threshold
+
+    def mark_ordered(self, code):
+        """매수 주문 전송 → 트리거 해제 (체결 전 중복 주문 방지)"""
+        self.ordered_codes.add(code)
+        self.triggers.pop(code, None)
+
     def check_buy_signal(self, code, current_price):
         """매수 신호 확인"""
         if code not in self.target_prices:
@@ -251,19 +454,24 @@ class VolatilityBreakoutStrategy(Strategy):
         return False
 
     def check_sell_signal(self, code, current_price, buy_price):
-        """매도 신호 확인 (손절/익절)"""
+        """매도 신호 확인 (손절/익절, 매입가별 가격 캐시 → 정수 비교 2회)"""
         if buy_price == 0:
             return False, None
-            
-        profit_rate = (current_price - buy_price) / buy_price * 100
         
-        # 손절 기준: 입력값이 양수든 음수든 '손실'이므로 음수로 처리
-        stop_loss = -abs(float(self.params['stop_loss']))
-        take_profit = abs(float(self.params['take_profit']))
+        cache = self._exit_cache
+        if self._exit_version != self.params_version or len(cache) >= EXIT_CACHE_SIZE:
+            cache.clear()
+            self._exit_version = self.params_version
+        levels = cache.get(buy_price)
+        if levels is None:
+            levels = cache[buy_price] = self.exit_prices(buy_price)
+        stop_price, take_price = levels
         
-        if profit_rate <= stop_loss:
-            return True, f"손절 (수익률: {profit_rate:.2f}% / 기준: {stop_loss}%)"
-        if profit_rate >= take_profit:
-            return True, f"익절 (수익률: {profit_rate:.2f}% / 기준: {take_profit}%)"
+        if current_price <= stop_price:
+            profit_rate = (current_price - buy_price) / buy_price * 100
+            return True, f"손절 (수익률: {profit_rate:.2f}% / 기준: {stop_price:,}원)"
+        if current_price >= take_price:
+            profit_rate = (current_price - buy_price) / buy_price * 100
+            return True, f"익절 (수익률: {profit_rate:.2f}% / 기준: {take_price:,}원)"
             
         return False, None
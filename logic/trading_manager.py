@@ -1,6 +1,8 @@
 import time
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
 
+from core.latency import tracer
+
 class TradingManager(QObject):
     """
     매매 로직 관리 클래스 (Controller/Logic)
@@ -14,7 +16,9 @@ class TradingManager(QObject):
     sig_update_status = pyqtSignal(str, str) # 종목코드, 상태메시지 (예: "매수완료")
     sig_trade_event = pyqtSignal() # 매매 발생 (보유목록/자산 갱신 요청)
 
-    def __init__(self, kiwoom, db, asset_manager, strategy):
+    BUY_RETRY_SEC = 5.0  # 매수 보류/실패 후 트리거 재장전까지 대기 (초)
+
+    def __init__(self, kiwoom, db, asset_manager, strategy, tick_archive=None, connect_signals=True):
         super().__init__()
         self.kiwoom = kiwoom
         self.db = db
@@ -24,8 +28,43 @@ class TradingManager(QObject):
         # 실시간 가격 캐시 (shared with MainWindow via getter if needed)
         self.price_cache = {}
         
-        # 이벤트 연결
-        self._connect_signals()
+        # [NEW] 틱 아카이브 (None이면 저장 안 함)
+        self.tick_archive = tick_archive
+        
+        # 보유 종목 색인 (잔고 조회 시 재구성, 봇 매수 종목은 재구성 시 1회 조회)
+        self.positions = kiwoom.positions
+        if self.positions.bot_source is None:
+            self.positions.bot_source = db.get_bot_stock_codes
+            self.positions.bot_codes = set(db.get_bot_stock_codes())
+        
+        # 보유 종목별 손절/익절 가격 {code: (매입가, params_version, 손절가, 익절가)}
+        self.exit_levels = {}
+        
+        # 종목 매매 가능 판정 may_trade(code, buying) (None이면 전체, StrategyRuntime이 전략별 소유 종목으로 설정)
+        self.may_trade = None
+        # 롤링 지표 갱신 여부 (공유 지표 캐시는 StrategyRuntime의 기본 전략만 갱신)
+        self.update_indicators = True
+        
+        # 매수/매도 실행 위임 dispatch(manager, key, fn, args) (None이면 즉시 실행)
+        # TradingEngine이 설정: 엔진 스레드는 판정만, 주문/DB/자산 반영은 GUI 스레드에서 실행
+        self.dispatch = None
+        self.in_flight = set()  # 실행 대기 중인 (구분, 종목코드)
+        
+        # 매수 보류 종목 {code: 재장전 시각} (체결강도/자금 미달·주문 실패 시 트리거 해제 후 대기)
+        # 모의 매매는 재생 시계(kiwoom.clock) 기준
+        self.buy_retry_at = {}
+        clock = getattr(kiwoom, 'clock', None)
+        self.now = clock.now if clock is not None else time.monotonic
+        self.stock_names = {}  # 종목명 캐시 (GetMasterCodeName은 종목당 1회)
+        self.tick_errors = {}  # 시세 처리 오류 {(종목코드, 오류 종류): 횟수} (종목/오류별 첫 1회만 로그)
+        
+        # 주문 저널 (TradeJournal, None이면 기록 안 함) - 주문 전송 전 의도 기록, 재시작 시 상태 복원용
+        self.journal = None
+        self.name = ""  # 전략명 (StrategyRuntime이 설정, 저널의 주문 전략 구분)
+        
+        # 이벤트 연결 (StrategyRuntime에서 생성 시 런타임이 대신 분배)
+        if connect_signals:
+            self._connect_signals()
         
     def _connect_signals(self):
         """Kiwoom 시그널 연결"""
@@ -35,70 +74,116 @@ class TradingManager(QObject):
     @pyqtSlot(str, dict)
     def on_real_data(self, code, data):
         """실시간 시세 수신 (캐시 업데이트 + 이벤트 드리븐 감시)"""
+        if tracer.enabled:
+            tracer.on_eval(code, data)
         # 1. 캐시 업데이트
         self.price_cache[code] = data
+        if self.tick_archive is not None:
+            self.tick_archive.append(code, data)
         
         # 2. 이벤트 드리븐 매도 감시 (익절/손절)
         try:
             current_price = int(data.get('current_price', 0))
             if current_price == 0: return
+            
+            # 롤링 지표 상태 갱신 (검증된 종목만, O(1))
+            if self.update_indicators:
+                self.strategy.indicator_book.on_tick(code, current_price, data.get('volume'))
+            
+            # 장전 계산된 변동폭에 당일 시가 반영 (종목당 첫 체결 1회)
+            if data.get('open') and self.strategy.needs_open(code):
+                self.strategy.on_open_price(code, data['open'])
+            
+            # 매수 보류 종목은 대기 시간이 지나면 트리거 재장전
+            if self.buy_retry_at and code in self.buy_retry_at and self.now() >= self.buy_retry_at[code]:
+                del self.buy_retry_at[code]
+                self.strategy.arm_trigger(code)
+            
+            # 이벤트 드리븐 매수 (돌파 틱에서 즉시 판정, 트리거 인덱스 O(1))
+            if self.strategy.check_trigger(code, current_price):
+                self._dispatch('buy', code, self.on_buy_trigger, code, current_price, data)
 
-            # 보유 종목인지 확인
-            holdings = self.kiwoom.account_holdings
-            target_holding = None
-            for h in holdings:
-                h_code = h['종목코드'].strip()
-                if len(h_code) > 6: h_code = h_code[-6:]
-                if h_code == code:
-                    target_holding = h
-                    break
+            # 보유 종목인지 확인 (6자리 코드 색인, O(1))
+            target_holding = self.positions.get(code)
             
-            if target_holding:
-                buy_price = int(target_holding['매입가'])
-                qty = int(target_holding['보유수량'])
-                
+            if target_holding and not self.positions.is_exiting(code) and (self.may_trade is None or self.may_trade(code)):
                 # [NEW] 봇 매수 종목인지 확인 (사용자 보유분 매도 방지)
-                bot_stocks = self.db.get_bot_stock_codes()
-                # code: A, Q... 접두사 제거 등 정규화 필요할 수 있음 (보통 6자리)
-                clean_code = code.strip()
-                if len(clean_code) > 6: clean_code = clean_code[-6:]
-
-                if clean_code not in bot_stocks:
+                if not self.positions.is_bot(code):
                     # 봇이 산 종목이 아니면 건너뜀 (로그 생략 or 디버그용)
                     return
 
-                if qty > 0 and buy_price > 0:
-                    profit_rate = (current_price - buy_price) / buy_price * 100
+                buy_price = target_holding['매입가']
+                qty = target_holding['보유수량']
+
+                if qty > 0:
+                    # 손절/익절 가격 (호가 단위 정수, 매입가/파라미터 변경 시에만 재계산)
+                    levels = self.exit_levels.get(code)
+                    if levels is None or levels[0] != buy_price or levels[1] != self.strategy.params_version:
+                        levels = self.exit_levels[code] = ((buy_price, self.strategy.params_version)
+                                                           + self.strategy.exit_prices(int(buy_price)))
+                    stop_price, take_price = levels[2], levels[3]
                     
                     # 1) 익절 (Take Profit)
-                    target_rate = self.strategy.params.get('take_profit', 5.0)
-                    
-                    # 개별 목표가 우선 확인
-                    if code in self.strategy.target_prices:
-                         target_one = self.strategy.target_prices[code]
-                         if current_price >= target_one:
-                             self.sig_log.emit(f"⚡ [즉시익절] {code} 목표가({target_one}) 도달! (현재: {current_price}) -> 매도실행")
-                             if self.kiwoom.account_list:
-                                acc = self.kiwoom.account_list[0]
-                                self.kiwoom.send_order(2, code, qty, 0, acc)
-                             del self.strategy.target_prices[code]
-                             return
-
-                    if profit_rate >= target_rate:
-                        self.sig_log.emit(f"⚡ [즉시익절] {code} 목표수익률({target_rate}%) 달성! (현재: {profit_rate:.2f}%) -> 매도실행")
-                        if self.kiwoom.account_list:
-                            self.kiwoom.send_order(2, code, qty, 0, self.kiwoom.account_list[0])
+                    if current_price >= take_price:
+                        profit_rate = (current_price - buy_price) / buy_price * 100
+                        msg = f"⚡ [즉시익절] {code} 익절가({take_price:,}) 도달! (현재: {current_price:,}, {profit_rate:.2f}%) -> 매도실행"
+                        self._dispatch('sell', code, self.send_exit, code, qty, msg, True)
                         return
 
                     # 2) 손절 (Stop Loss)
-                    stop_rate = self.strategy.params.get('stop_loss', 3.0)
-                    if profit_rate <= -stop_rate:
-                         self.sig_log.emit(f"⚡ [즉시손절] {code} 손절라인(-{stop_rate}%) 이탈! (현재: {profit_rate:.2f}%) -> 매도실행")
-                         if self.kiwoom.account_list:
-                            self.kiwoom.send_order(2, code, qty, 0, self.kiwoom.account_list[0])
-                         return
+                    if current_price <= stop_price:
+                        profit_rate = (current_price - buy_price) / buy_price * 100
+                        msg = f"⚡ [즉시손절] {code} 손절가({stop_price:,}) 이탈! (현재: {current_price:,}, {profit_rate:.2f}%) -> 매도실행"
+                        self._dispatch('sell', code, self.send_exit, code, qty, msg, False)
+                        return
         except Exception as e:
-            pass
+            key = (code, type(e).__name__)
+            if key not in self.tick_errors:
+                self.tick_errors[key] = 0
+                self.sig_log.emit(f"❌ [시세 처리 오류] {code}: {type(e).__name__}: {e}")
+            self.tick_errors[key] += 1
+
+    def _dispatch(self, kind, code, fn, *args):
+        """매수/매도 실행 (엔진 모드에서는 GUI 스레드로 위임, 같은 종목의 중복 요청은 실행 전까지 무시)"""
+        key = (kind, code)
+        if self.dispatch is not None:
+            if key in self.in_flight:
+                return
+            self.in_flight.add(key)
+        if tracer.enabled:
+            tracer.on_signal(code, kind)
+        if self.dispatch is None:
+            fn(*args)
+        else:
+            self.dispatch(self, key, fn, args)
+
+    def send_exit(self, code, qty, msg, take_profit):
+        """보유 종목 시장가 매도 (체결/잔고 갱신 전까지 같은 종목 매도 판정 중지)"""
+        # 판정 후 실행 전에 다른 경로(전략 주기 등)에서 이미 매도했으면 중복 주문 금지
+        if code not in self.positions or self.positions.is_exiting(code):
+            return
+        self.sig_log.emit(msg)
+        if not self.kiwoom.account_list:
+            return
+        intent = None
+        if self.journal is not None:
+            intent = self.journal.append('intent', code=code, side='sell', qty=int(qty),
+                                         held=self.positions.qty(code), strategy=self.name)
+        ret = self.kiwoom.send_order(2, code, qty, 0, self.kiwoom.account_list[0])
+        if ret != 0 and intent is not None:
+            self.journal.append('reject', oid=intent['seq'], code=code, side='sell')
+        if ret == 0:
+            self.positions.mark_exiting(code)
+            if take_profit:
+                self.strategy.target_prices.pop(code, None)
+        else:
+            self.sig_log.emit(f"❌ [주문실패] {code} 매도 주문 실패 (에러코드: {ret})")
+
+    @staticmethod
+    def _unit_fill_qty(data) -> int:
+        """이번 체결 수량 (체결수량 FID 911은 주문별 누적이라 분할 체결 시 중복 반영됨 → 단위체결량 FID 915 사용)"""
+        qty = str(data.get('단위체결량', data.get('체결수량', '0'))).strip()
+        return int(qty) if qty else 0
 
     @pyqtSlot(str, dict)
     def on_chejan_data(self, gubun, data):
@@ -112,34 +197,33 @@ class TradingManager(QObject):
                 try:
                     # [FIX] 접수 vs 체결 구분
                     order_status = data.get('주문상태', '')
-                    filled_qty_str = str(data.get('체결수량', '0')).strip()
-                    if not filled_qty_str: filled_qty_str = "0"
-                    
-                    qty = int(filled_qty_str)
+                    qty = self._unit_fill_qty(data)
                     buy_price = abs(int(data.get('체결가격', '0')))
 
-                    if qty <= 0: return # 접수 단계 무시
+                    if qty <= 0: # 접수 단계 (주문번호만 저널에 기록)
+                        if self.journal is not None and order_status.strip() == "접수":
+                            self.journal.append('ack', code=stock_code, side='buy', order_no=data.get('주문번호', '').strip())
+                        return
 
-                    # 전략: 익절 목표가 자동 설정
-                    target_rate = self.strategy.params.get('take_profit', 5.0)
-                    target_price = int(buy_price * (1 + target_rate / 100))
-                    
-                    # 호가 보정
-                    if target_price < 1000: target_price = (target_price // 1) * 1
-                    elif target_price < 5000: target_price = (target_price // 5) * 5
-                    elif target_price < 10000: target_price = (target_price // 10) * 10
-                    elif target_price < 50000: target_price = (target_price // 50) * 50
-                    else: target_price = (target_price // 100) * 100
+                    # 전략: 익절 목표가 자동 설정 (호가 단위 보정, 매도 감시 익절가와 동일)
+                    _, target_price = self.strategy.exit_prices(buy_price)
                     
                     self.sig_log.emit(f"⚡ [자동예약] {data['종목명']} {qty}주 매수체결! 목표가 {target_price:,}원 설정")
+                    # 보유 종목 색인 반영 (다음 잔고 조회 전에도 즉시 매도 감시)
+                    self.positions.apply_buy(stock_code, qty, buy_price, data['종목명'].strip())
                     self.strategy.target_prices[stock_code] = target_price
+                    self.asset_manager.lots.buy(stock_code, qty, buy_price)
+                    if self.journal is not None:
+                        self.journal.append('fill', code=stock_code, side='buy', qty=qty, price=buy_price,
+                                            order_no=data.get('주문번호', '').strip())
                     
                     # UI 상태 업데이트 요청
                     self.sig_update_status.emit(stock_code, "매수완료")
                     
                     # DB 저장 & 자산 갱신
                     name_for_db = data['종목명'].strip()
-                    self.db.save_trade(stock_code, name_for_db, "매수", buy_price, qty)
+                    profile = self.strategy.universe.source(stock_code, "")
+                    self.db.save_trade(stock_code, name_for_db, "매수", buy_price, qty, strategy=profile)
                     self.sig_trade_event.emit()
 
                 except Exception as e:
@@ -148,33 +232,33 @@ class TradingManager(QObject):
             elif "매도" in order_type:
                 # 매도 체결 시 처리
                 try:
-                    filled_qty = int(data.get('체결수량', 0))
+                    filled_qty = self._unit_fill_qty(data)
+                    if filled_qty <= 0 and self.journal is not None and str(data.get('주문상태', '')).strip() == "접수":
+                        self.journal.append('ack', code=stock_code, side='sell', order_no=data.get('주문번호', '').strip())
                     if filled_qty > 0:
                         sell_price = abs(int(data.get('체결가격', 0)))
                         name = data['종목명'].strip()
                         
-                        # [FIX] 매수 단가 추적 (수익 산출용)
-                        buy_price = 0
+                        # 1. 보유 종목 색인에서 차감 (평균 매입가는 로트 장부에 없는 수량의 대체값)
+                        avg_price = self.positions.apply_sell(stock_code, filled_qty)
+                        if self.journal is not None:
+                            self.journal.append('fill', code=stock_code, side='sell', qty=filled_qty, price=sell_price,
+                                                order_no=data.get('주문번호', '').strip())
                         
-                        # 1. Kiwoom 보유 종목에서 찾기
-                        if self.kiwoom.account_holdings:
-                            for h in self.kiwoom.account_holdings:
-                                h_code = h['종목코드'].strip()
-                                if len(h_code) > 6: h_code = h_code[-6:]
-                                if h_code == stock_code:
-                                    buy_price = int(h.get('매입가', 0))
-                                    break
-                                    
-                        # 2. 못 찾으면 DB나 추정치 사용 (fallback) -> 여기선 안전하게 0이면 sell_price로 가정 (수익 0)
-                        if buy_price == 0:
-                            self.sig_log.emit(f"⚠️ [주의] {name} 매입가를 찾을 수 없어 수익 0원으로 가정합니다.")
-                            buy_price = sell_price
-
-                        buy_amount = buy_price * filled_qty
+                        # 2. 로트 장부 FIFO 차감 → 정확한 매입 원금 (종목별 실현손익 누적)
+                        buy_amount, unmatched = self.asset_manager.lots.sell(stock_code, filled_qty, sell_price)
+                        if unmatched:
+                            # 장부에도 보유 색인에도 없으면 수익 0원으로 가정
+                            if avg_price == 0:
+                                self.sig_log.emit(f"⚠️ [주의] {name} 매입가를 찾을 수 없어 수익 0원으로 가정합니다.")
+                                avg_price = sell_price
+                            buy_amount += avg_price * unmatched
+
                         sell_amount = sell_price * filled_qty
                         
-                        # DB 저장
-                        self.db.save_trade(stock_code, name, "매도", sell_price, filled_qty)
+                        # DB 저장 (실현손익 롤업 포함)
+                        self.db.save_trade(stock_code, name, "매도", sell_price, filled_qty,
+                                           realized_profit=sell_amount - buy_amount)
                         
                         # 자산 환원 (AssetManager)
                         # [FIX] register_sell(원금, 매도금액) 호출 -> 이익/손실 자동 계산 및 재투자 재원으로 환원
@@ -188,10 +272,38 @@ class TradingManager(QObject):
                 except Exception as e:
                     self.sig_log.emit(f"❌ 매도 체결 처리 오류: {e}")
 
+    def on_buy_trigger(self, code, current_price, data):
+        """매수 트리거 발동 (돌파 틱) → 매수 전략 실행 및 상태 반영"""
+        name = self.stock_names.get(code)
+        if name is None:
+            name = self.stock_names[code] = self.kiwoom.ocx.dynamicCall("GetMasterCodeName(QString)", code) or code
+        result = self.process_buy_strategy(code, current_price, data.get('rate', 0.0),
+                                           data.get('strength', 0.0), name)
+        if result == "ORDERING":
+            self.buy_retry_at.pop(code, None)
+            self.sig_update_status.emit(code, "주문중")
+        elif result == "REMOVE":
+            self.buy_retry_at.pop(code, None)
+            self.strategy.remove_stock(code)
+            self.sig_update_status.emit(code, "감시종료")
+        elif result == "RETRY":
+            # 체결강도/자금 미달, 주문 실패 → 트리거 해제 후 대기 (매 틱 재주문/로그 반복 방지)
+            self.strategy.disarm_trigger(code)
+            self.buy_retry_at[code] = self.now() + self.BUY_RETRY_SEC
+
     def process_buy_strategy(self, code, current_price, rate, strength, name):
-        """매수 전략 확인 및 실행 (MainWindow에서 호출)"""
+        """
+        매수 전략 확인 및 실행 (실시간 트리거에서 호출)
+        
+        Returns:
+            "ORDERING" 주문 전송 / "REMOVE" 감시 제외 / "RETRY" 조건 미달·주문 실패 (대기 후 재장전) / None
+        """
         # 캐시가 없거나 가격 0이면 스킵
         if current_price == 0: return None
+        # 이미 주문을 낸 종목은 체결 전까지 재주문 금지
+        if code in self.strategy.ordered_codes: return None
+        # 다른 전략이 보유/주문 중인 종목은 매수 금지 (StrategyRuntime)
+        if self.may_trade is not None and not self.may_trade(code, True): return None
         
         # 1. 매수 신호 확인
         if self.strategy.check_buy_signal(code, current_price):
@@ -206,26 +318,35 @@ class TradingManager(QObject):
             # [FIX] 하드코딩된 100.0 대신 사용자 설정값 사용
             min_intensity = self.strategy.params.get('min_intensity', 100.0)
             if strength < min_intensity: 
-                return None # 체결강도 약함 (사용자 설정 기준 미달)
+                return "RETRY" # 체결강도 약함 (사용자 설정 기준 미달)
 
             # 2. 주문 실행
             account = self.kiwoom.account_list[0] if self.kiwoom.account_list else ""
-            if not account: return None
+            if not account: return "RETRY"
             
             qty = self.calculate_order_qty(current_price)
             if qty <= 0:
                 self.sig_log.emit(f"⚠️ [자산부족] {name} 매수 수량 0")
-                return None
+                return "RETRY"
                 
             total_amt = current_price * qty
             can_buy, msg = self.asset_manager.can_buy(total_amt)
-            if not can_buy: return None
+            if not can_buy: return "RETRY"
             
             self.sig_log.emit(f"💰 [매수시도] {name} {qty}주")
+            intent = None
+            if self.journal is not None:
+                intent = self.journal.append('intent', code=code, side='buy', qty=qty, price=int(current_price),
+                                             held=self.positions.qty(code), strategy=self.name, reserve=total_amt)
             ret = self.kiwoom.send_order(1, code, qty, 0, account)
+            if ret != 0 and intent is not None:
+                self.journal.append('reject', oid=intent['seq'], code=code, side='buy')
             if ret == 0:
                 self.asset_manager.reserve_cash(total_amt)
+                self.strategy.mark_ordered(code)
                 return "ORDERING" # 주문 중 상태로 변경
+            self.sig_log.emit(f"❌ [주문실패] {name} 매수 주문 실패 (에러코드: {ret})")
+            return "RETRY" # 대기 후 재시도
                 
         return None
 
@@ -233,3 +354,143 @@ class TradingManager(QObject):
         """주문 수량 계산 (AssetManager 위임)"""
         if price <= 0: return 0
         return self.asset_manager.calculate_order_qty(price)
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import random
+
+    from core.database import Database
+    from logic.asset_manager import AssetManager
+    from logic.simulator import SimKiwoom
+    from logic.strategy import VolatilityBreakoutStrategy
+
+    print("=" * 50)
+    print("보유 종목 틱 처리 벤치마크 (보유 100종목, 50만 틱)")
+    print("=" * 50)
+
+    db = Database(":memory:", read_workers=1, query_cache=True)
+    kiwoom = SimKiwoom()
+    asset_manager = AssetManager(db=None)
+    strategy = VolatilityBreakoutStrategy(kiwoom, asset_manager, db)
+    strategy.params.update({'stop_loss': 2.0, 'take_profit': 5.0})
+    manager = TradingManager(kiwoom, db, asset_manager, strategy)
+
+    rng = random.Random(0)
+    codes = [f"{i:06d}" for i in range(100)]
+    buy_prices = {code: rng.choice((1450, 3870, 12350, 48700, 152000, 612000)) for code in codes}
+    for code, price in buy_prices.items():
+        kiwoom.positions.apply_buy(code, 10, price, code)
+
+    # 손절/익절 범위 안에서 움직이는 틱 (매도 주문 없이 판정 경로만 측정)
+    n_ticks = 500_000
+    ticks = []
+    for i in range(n_ticks):
+        code = codes[i % len(codes)]
+        ticks.append((code, {'current_price': int(buy_prices[code] * rng.uniform(0.985, 1.04)),
+                             'volume': i, 'strength': 100.0, 'rate': 0.0}))
+
+    def baseline_on_real_data(self, code, data):
+        """최초 버전(baseline 커밋)의 on_real_data 그대로: 틱마다 보유 목록 순회 + 봇 매수 종목 DB 조회"""
+        # 1. 캐시 업데이트
+        self.price_cache[code] = data
+        
+        # 2. 이벤트 드리븐 매도 감시 (익절/손절)
+        try:
+            current_price = int(data.get('current_price', 0))
+            if current_price == 0: return
+
+            # 보유 종목인지 확인
+            holdings = self.kiwoom.account_holdings
+            target_holding = None
+            for h in holdings:
+                h_code = h['종목코드'].strip()
+                if len(h_code) > 6: h_code = h_code[-6:]
+                if h_code == code:
+                    target_holding = h
+                    break
+            
+            if target_holding:
+                buy_price = int(target_holding['매입가'])
+                qty = int(target_holding['보유수량'])
+                
+                # [NEW] 봇 매수 종목인지 확인 (사용자 보유분 매도 방지)
+                bot_stocks = self.db.get_bot_stock_codes()
+                # code: A, Q... 접두사 제거 등 정규화 필요할 수 있음 (보통 6자리)
+                clean_code = code.strip()
+                if len(clean_code) > 6: clean_code = clean_code[-6:]
+
+                if clean_code not in bot_stocks:
+                    # 봇이 산 종목이 아니면 건너뜀 (로그 생략 or 디버그용)
+                    return
+
+                if qty > 0 and buy_price > 0:
+                    profit_rate = (current_price - buy_price) / buy_price * 100
+                    
+                    # 1) 익절 (Take Profit)
+                    target_rate = self.strategy.params.get('take_profit', 5.0)
+                    
+                    # 개별 목표가 우선 확인
+                    if code in self.strategy.target_prices:
+                         target_one = self.strategy.target_prices[code]
+                         if current_price >= target_one:
+                             self.sig_log.emit(f"⚡ [즉시익절] {code} 목표가({target_one}) 도달! (현재: {current_price}) -> 매도실행")
+                             if self.kiwoom.account_list:
+                                acc = self.kiwoom.account_list[0]
+                                self.kiwoom.send_order(2, code, qty, 0, acc)
+                             del self.strategy.target_prices[code]
+                             return
+
+                    if profit_rate >= target_rate:
+                        self.sig_log.emit(f"⚡ [즉시익절] {code} 목표수익률({target_rate}%) 달성! (현재: {profit_rate:.2f}%) -> 매도실행")
+                        if self.kiwoom.account_list:
+                            self.kiwoom.send_order(2, code, qty, 0, self.kiwoom.account_list[0])
+                        return
+
+                    # 2) 손절 (Stop Loss)
+                    stop_rate = self.strategy.params.get('stop_loss', 3.0)
+                    if profit_rate <= -stop_rate:
+                         self.sig_log.emit(f"⚡ [즉시손절] {code} 손절라인(-{stop_rate}%) 이탈! (현재: {profit_rate:.2f}%) -> 매도실행")
+                         if self.kiwoom.account_list:
+                            self.kiwoom.send_order(2, code, qty, 0, self.kiwoom.account_list[0])
+                         return
+        except Exception as e:
+            pass
+
+    # 봇 매수 기록 (최초 버전의 봇 종목 확인이 DB 조회로 통과하도록, 조회는 현재 DB 구현 사용)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for code, price in buy_prices.items():
+            db.save_trade(code, code, "매수", price, 10)
+
+    # 최초 버전은 틱마다 DB를 조회하므로 앞쪽 5만 틱만 측정 (틱당 시간으로 비교)
+    for label, on_real_data, sample in (("최초 버전", baseline_on_real_data.__get__(manager), ticks[:50_000]),
+                                        ("현재", manager.on_real_data, ticks)):
+        t0 = time.perf_counter()
+        for code, data in sample:
+            on_real_data(code, data)
+        elapsed = time.perf_counter() - t0
+        print(f"  on_real_data ({label}): {len(sample) / elapsed:,.0f}틱/초 ({elapsed / len(sample) * 1e6:.2f}us/틱)")
+    print(f"  매도 주문: {kiwoom.engine.stats['orders']}건, 시세 처리 오류: {sum(manager.tick_errors.values())}건")
+
+    # 매도 판정만 비교: 틱마다 수익률/파라미터 재계산 (이전 방식) vs 정수 가격 비교 2회
+    params = strategy.params
+    t0 = time.perf_counter()
+    for code, data in ticks:
+        buy_price = buy_prices[code]
+        profit_rate = (int(data['current_price']) - buy_price) / buy_price * 100
+        if profit_rate >= params.get('take_profit', 5.0) or profit_rate <= -abs(params.get('stop_loss', 3.0)):
+            pass
+    legacy = time.perf_counter() - t0
+    exit_levels = manager.exit_levels
+    t0 = time.perf_counter()
+    for code, data in ticks:
+        levels = exit_levels[code]
+        price = data['current_price']
+        if price >= levels[3] or price <= levels[2]:
+            pass
+    current = time.perf_counter() - t0
+    print(f"  매도 판정: 수익률 계산 {n_ticks / legacy:,.0f}틱/초 → 가격 비교 {n_ticks / current:,.0f}틱/초")
+    db.close()
@@ -0,0 +1,126 @@
+"""
+감시 종목 유니버스 모듈 (Universe)
+종목코드 → 메타데이터(등록 출처, 등록 시각, 목표가, 미검출 횟수)를
+삽입 순서대로 보관하는 집합형 구조입니다.
+
+- 포함 여부/추가/제거: O(1) (dict 기반)
+- 순회 순서: 등록 순서 (기존 리스트와 동일)
+- auto_universe({code: 전략명}) / auto_stock_hits({code: 미검출 횟수})를 함께 대체
+"""
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class Universe:
+    """
+    감시 대상 종목 집합 (종목별 메타데이터 포함)
+
+    사용 예:
+        universe = Universe()
+        universe.add("005930", source="급등주")
+        if "005930" in universe: ...
+        universe.bump_hits("005930")
+    """
+
+    def __init__(self, codes: Iterable[str] = None):
+        self._entries: Dict[str, Dict] = {}
+        for code in codes or ():
+            self.add(code)
+
+    # ---------- 집합 연산 ----------
+
+    def __contains__(self, code) -> bool:
+        return code in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"Universe({list(self._entries)})"
+
+    def add(self, code: str, source: str = None) -> bool:
+        """
+        종목 등록
+
+        Args:
+            source: 자동 발굴 출처(전략/프로필명), 수동·기타 등록은 None
+
+        Returns:
+            새로 등록되었으면 True (이미 있으면 출처만 갱신하고 False)
+        """
+        entry = self._entries.get(code)
+        if entry is not None:
+            if source:
+                entry['source'] = source
+            return False
+        self._entries[code] = {
+            'source': source,
+            'added_at': time.time(),
+            'target_price': None,
+            'hits': 0,
+        }
+        return True
+
+    def discard(self, code: str) -> bool:
+        """종목 제거 (없으면 무시), 제거되었으면 True"""
+        return self._entries.pop(code, None) is not None
+
+    def clear(self):
+        self._entries.clear()
+
+    def codes(self):
+        """등록 순서의 종목코드 리스트"""
+        return list(self._entries)
+
+    # ---------- 메타데이터 ----------
+
+    def get(self, code: str) -> Optional[Dict]:
+        """종목 메타데이터 (없으면 None)"""
+        return self._entries.get(code)
+
+    def source(self, code: str, default: str = "") -> str:
+        """자동 발굴 출처 (전략/프로필명)"""
+        entry = self._entries.get(code)
+        return entry['source'] or default if entry else default
+
+    def is_auto(self, code: str) -> bool:
+        """자동 발굴로 등록된 종목인지"""
+        entry = self._entries.get(code)
+        return bool(entry and entry['source'])
+
+    def auto_sources(self) -> Dict[str, str]:
+        """자동 발굴 종목 {code: 출처} (설정 저장 형식, 기존 auto_universe와 동일)"""
+        return {code: e['source'] for code, e in self._entries.items() if e['source']}
+
+    def set_target(self, code: str, price):
+        entry = self._entries.get(code)
+        if entry is not None:
+            entry['target_price'] = price
+
+    def target(self, code: str):
+        entry = self._entries.get(code)
+        return entry['target_price'] if entry else None
+
+    # ---------- 미검출 TTL ----------
+
+    def hits(self, code: str) -> int:
+        """연속 미검출 횟수 (자동 목록 정리용)"""
+        entry = self._entries.get(code)
+        return entry['hits'] if entry else 0
+
+    def bump_hits(self, code: str) -> int:
+        """미검출 횟수 1 증가 후 반환"""
+        entry = self._entries.get(code)
+        if entry is None:
+            return 0
+        entry['hits'] += 1
+        return entry['hits']
+
+    def reset_hits(self, code: str):
+        """재검출 시 미검출 횟수 초기화"""
+        entry = self._entries.get(code)
+        if entry is not None:
+            entry['hits'] = 0
@@ -0,0 +1,201 @@
+"""
+워크포워드 검증 모듈 (Walk-Forward)
+학습 구간에서 파라미터를 고르고 바로 다음 구간(표본 외)에서 평가하는 과정을
+구간을 밀어가며 반복해 발굴 프로필별 실제 성능을 비교합니다.
+
+    |---- 학습 ----|-- 검증 --|
+              |---- 학습 ----|-- 검증 --|
+                        |---- 학습 ----|-- 검증 --|
+
+- 모든 구간 × 프로필 × 후보 조합을 한 번에 작업 프로세스 풀로 실행 (ParamSearch 재사용)
+- 지표 마스크는 전 구간으로 1회 계산 후 공유 → 구간마다 재계산 없음
+"""
+import csv
+from typing import Dict, List, Sequence
+
+from .indicators import BarPanel
+from .optimizer import ParamSearch
+
+
+# MainWindow 발굴 프로필
+DEFAULT_PROFILES = (
+    "전고점 돌파 (Breakout)",
+    "정배열 & 골클 (Trend)",
+    "볼린저 밴드 돌파 (Vola)",
+    "사용자 정의",
+)
+
+
+class WalkForward:
+    """
+    워크포워드 검증기
+
+    사용 예:
+        with WalkForward(panel, {'k': [0.3, 0.5, 0.7]}, train_days=250, test_days=60) as wf:
+            report = wf.run()
+            wf.write_csv("walkforward.csv")
+    """
+
+    def __init__(self, panel: BarPanel, space: Dict, profiles: Sequence[str] = DEFAULT_PROFILES,
+                 train_days: int = 250, test_days: int = 60, step: int = None,
+                 base_params: Dict = None, metric: str = 'return_pct',
+                 workers: int = None, **bt_kwargs):
+        """
+        Args:
+            space: 학습 구간 파라미터 탐색 공간 (ParamSearch 형식, 그리드)
+            profiles: 비교할 발굴 프로필
+            train_days / test_days: 학습 / 검증 구간 길이 (거래일)
+            step: 구간 이동 간격 (기본: test_days, 검증 구간이 겹치지 않음)
+        """
+        self.panel = panel
+        self.profiles = list(profiles)
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step = step or test_days
+        self.metric = metric
+        self.search = ParamSearch(panel, space, base_params=base_params, metric=metric,
+                                  workers=workers, cache_profiles=self.profiles, **bt_kwargs)
+        self.folds = self._make_folds()
+        self.results: List[Dict] = []
+
+    def _make_folds(self) -> List[tuple]:
+        """(학습 시작, 검증 시작, 검증 끝) 열 인덱스 목록"""
+        n_days = self.panel.close.shape[1]
+        folds = []
+        start = 0
+        while start + self.train_days + self.test_days <= n_days:
+            split = start + self.train_days
+            folds.append((start, split, split + self.test_days))
+            start += self.step
+        return folds
+
+    def close(self):
+        self.search.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _date(self, t: int) -> str:
+        return self.panel.dates[t] if self.panel.dates else str(t)
+
+    def run(self) -> Dict[str, Dict]:
+        """
+        워크포워드 실행
+
+        Returns:
+            {프로필: {'folds', 'oos_return_pct', 'avg_return_pct', 'worst_drawdown', 'trades', 'params'}}
+        """
+        if not self.folds:
+            raise ValueError(f"기간이 부족합니다 (학습 {self.train_days} + 검증 {self.test_days}일 필요)")
+        search = self.search
+        candidates = search.grid()
+        base = search.base_params
+
+        # 1. 학습: 구간 × 프로필 × 후보 일괄 실행
+        keys = [(f, profile) for f in range(len(self.folds)) for profile in self.profiles]
+        tasks = [({**base, **params}, profile, self.folds[f][0], self.folds[f][1])
+                 for f, profile in keys for params in candidates]
+        summaries = search.evaluate(tasks)
+
+        best = {}
+        for i, key in enumerate(keys):
+            scored = summaries[i * len(candidates):(i + 1) * len(candidates)]
+            j = max(range(len(candidates)), key=lambda c: scored[c][self.metric])
+            best[key] = (candidates[j], scored[j])
+
+        # 2. 검증: 학습 최적 파라미터로 다음 구간 실행
+        tasks = [({**base, **best[key][0]}, key[1], self.folds[key[0]][1], self.folds[key[0]][2])
+                 for key in keys]
+        tests = search.evaluate(tasks)
+
+        self.results = []
+        for key, test in zip(keys, tests):
+            f, profile = key
+            params, train = best[key]
+            start, split, end = self.folds[f]
+            self.results.append({
+                'fold': f + 1,
+                'profile': profile,
+                'train': f"{self._date(start)}~{self._date(split - 1)}",
+                'test': f"{self._date(split)}~{self._date(end - 1)}",
+                'params': params,
+                'train_return_pct': train['return_pct'],
+                'test_return_pct': test['return_pct'],
+                'test_max_drawdown': test['max_drawdown'],
+                'test_trades': test['trades'],
+            })
+        return self.report()
+
+    def report(self) -> Dict[str, Dict]:
+        """프로필별 표본 외 성과 요약 (검증 구간 수익률을 이어 붙인 복리 수익률 포함)"""
+        report = {}
+        for profile in self.profiles:
+            rows = [r for r in self.results if r['profile'] == profile]
+            if not rows:
+                continue
+            growth = 1.0
+            for r in rows:
+                growth *= 1 + r['test_return_pct'] / 100
+            report[profile] = {
+                'folds': len(rows),
+                'oos_return_pct': round((growth - 1) * 100, 2),
+                'avg_return_pct': round(sum(r['test_return_pct'] for r in rows) / len(rows), 2),
+                'worst_drawdown': min(r['test_max_drawdown'] for r in rows),
+                'trades': sum(r['test_trades'] for r in rows),
+                'params': rows[-1]['params'],  # 최근 학습 구간의 최적 파라미터
+            }
+        return report
+
+    def write_csv(self, path: str) -> str:
+        """구간별 결과 CSV 저장"""
+        param_names = list(self.search.space)
+        columns = ['fold', 'profile', 'train', 'test', 'train_return_pct', 'test_return_pct',
+                   'test_max_drawdown', 'test_trades']
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns + param_names)
+            for row in self.results:
+                writer.writerow([row[c] for c in columns] + [row['params'].get(n) for n in param_names])
+        return path
+
+
+# ========== 벤치마크 ==========
+
+if __name__ == "__main__":
+    import time
+
+    import numpy as np
+
+    # 작업 프로세스가 찾을 수 있도록 모듈 경로로 사용
+    from logic.walkforward import WalkForward
+
+    print("=" * 50)
+    print("워크포워드 벤치마크 (300종목 × 4년 일봉, 4프로필)")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    n_codes, n_days = 300, 1000
+    close = 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.025, (n_codes, n_days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    columns = {
+        'open': np.floor(open_), 'close': np.floor(close),
+        'high': np.floor(np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, close.shape))),
+        'low': np.floor(np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, close.shape))),
+        'volume': rng.integers(50_000, 2_000_000, close.shape).astype(np.float64),
+    }
+    panel = BarPanel([f"{i:06d}" for i in range(n_codes)], columns,
+                     [f"D{t:04d}" for t in range(n_days)])
+    space = {'k': [0.3, 0.5, 0.7], 'stop_loss': [-2.0, -3.0], 'take_profit': [5.0, 8.0]}
+
+    t0 = time.perf_counter()
+    with WalkForward(panel, space, train_days=250, test_days=125, base_params={'min_vol': 100000},
+                     capital=100_000_000, max_stock_amount=2_000_000) as wf:
+        report = wf.run()
+    elapsed = time.perf_counter() - t0
+    n_runs = len(wf.folds) * len(wf.profiles) * (len(wf.search.grid()) + 1)
+    print(f"  구간 {len(wf.folds)}개 × 프로필 {len(wf.profiles)}개, 백테스트 {n_runs}회: {elapsed:.2f}초")
+    for profile, summary in report.items():
+        print(f"  {profile:<22} 표본외 {summary['oos_return_pct']:8.2f}%  최악낙폭 {summary['worst_drawdown']:7.2f}%")
@@ -6,31 +6,51 @@ from PyQt5.QtWidgets import (
     QPushButton, QLabel, QLineEdit, QTextEdit, QTableWidget, 
     QTableWidgetItem, QGroupBox, QMessageBox, QHeaderView, QTabWidget,
     QFormLayout, QFrame, QComboBox, QStackedWidget, QSpacerItem, QSizePolicy,
-    QCheckBox, QCompleter, QFileDialog
+    QCheckBox, QCompleter, QFileDialog, QProgressBar
 )
-from PyQt5.QtCore import Qt, pyqtSlot, QTimer, QTime, QEvent
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer, QTime, QDate, QEvent
 from PyQt5.QtGui import QFont, QColor
 from core.kiwoom import Kiwoom
 from core.database import Database
+from core.tick_archive import TickArchive
+from core.position_book import normalize_code
+from core.latency import tracer
+from core.journal import TradeJournal
 from logic.asset_manager import AssetManager
 from logic.strategy import Strategy, VolatilityBreakoutStrategy
-from logic.trading_manager import TradingManager
+from logic.runtime import StrategyRuntime
+from logic.engine import TradingEngine
+from logic.profiles import (VerificationQueue, compile_profile,
+                            STAGE_QUOTE, STAGE_DAILY, STAGE_MINUTE)
 from core.version import VERSION, APP_NAME
 import sqlite3
 
 class MainWindow(QMainWindow):
     """메인 윈도우 클래스"""
     
+    # [NEW] DB 백업 작업 스레드 → GUI 스레드 전달용 시그널
+    sig_backup_progress = pyqtSignal(int, int)  # 복사한 페이지, 전체 페이지
+    sig_backup_done = pyqtSignal(bool, str)     # 성공 여부, 경로 또는 오류 메시지
+    sig_history_loaded = pyqtSignal(object)     # 내역 조회 결과 dict 또는 Exception
+    sig_bulk_done = pyqtSignal(bool, str)       # 거래내역 가져오기/내보내기 완료 (성공 여부, 메시지)
+    
     def __init__(self):
         super().__init__()
         
         # 키움 API 객체
         self.kiwoom = None
+        self.runtime = None  # 전략 런타임 (로그인 시 생성)
+        self.engine = None   # 매매 엔진 스레드 (틱 판정 전담)
+        self.journal = None  # 주문/포지션 저널 (로그인 시 사용자별로 열림, 재시작 복원용)
         
         # 자산 관리자 및 데이터베이스
         self.db = Database()
+        self.trade_log_month = QDate.currentDate().toString("yyyyMM")  # 당월 (시작 시 지난 달 기록은 아카이브됨)
         self.asset_manager = AssetManager(db=self.db)
         
+        # [NEW] 실시간 틱 아카이브 (백그라운드 스레드에서 압축 저장)
+        self.tick_archive = TickArchive()
+        
         # 전략 초기화
         self.strategy = VolatilityBreakoutStrategy(self.kiwoom, self.asset_manager, db=self.db)
         self.strategy.log_msg.connect(self.log)
@@ -42,12 +62,14 @@ class MainWindow(QMainWindow):
         # [FIX] 타이머 초기화 (시작은 하지 않음, 로그인 성공 후 순차 시작)
         self.status_timer = QTimer(self)
         self.status_timer.timeout.connect(self.update_market_status)
+        self.status_timer.timeout.connect(self.update_latency_label)
         
         self.verify_timer = QTimer(self)
         self.verify_timer.timeout.connect(self.process_verification_queue)
         
         self.cleanup_timer = QTimer(self)
         self.cleanup_timer.timeout.connect(self.cleanup_auto_watchlist)
+        self.cleanup_timer.timeout.connect(self.snapshot_journal)
         
         self.scan_timer = QTimer(self)
         self.scan_timer.timeout.connect(self.request_smart_scan)
@@ -58,17 +80,35 @@ class MainWindow(QMainWindow):
         self.holdings_timer = QTimer(self)
         self.holdings_timer.timeout.connect(self.refresh_holdings)
         
+        self.archive_timer = QTimer(self)
+        self.archive_timer.timeout.connect(self.flush_tick_archive)
+        self.archive_timer.timeout.connect(self.asset_manager.lots.flush)  # 로트 장부 변경분 일괄 저장
+        self.archive_timer.timeout.connect(self.rollover_trade_log)
+        
+        self.target_timer = QTimer(self)
+        self.target_timer.timeout.connect(self.run_target_job)
+        
         # 종목 코드/명 맵핑 (자동완성용)
         self.stock_dict = {}     # {code: name}
         self.name_to_code = {}  # {name: code}
         
         # 발굴 검증 큐 및 자동 발굴 관리
-        self.verification_queue = []
-        self.auto_stock_hits = {} # {code: hit_count}
+        # 프로필 파이프라인 단계별 대기열 (비용 낮은 단계부터 배치 처리)
+        # 자동 발굴 종목의 미검출 횟수(TTL)는 strategy.universe가 관리
+        self.verification_queue = VerificationQueue({
+            STAGE_QUOTE: self._fetch_quote,
+            STAGE_DAILY: self._fetch_daily,
+            STAGE_MINUTE: self._fetch_minutes,
+        }, self.strategy.params, batch_fetchers={STAGE_QUOTE: self._fetch_quotes})
         
         # [NEW] 파일 로깅 초기화
         self.setup_file_logging()
         
+        self.sig_backup_progress.connect(self.on_backup_progress)
+        self.sig_backup_done.connect(self.on_backup_done)
+        self.sig_history_loaded.connect(self.apply_history)
+        self.sig_bulk_done.connect(self.on_bulk_trades_done)
+        
         # UI 초기화
         self.init_ui()
         
@@ -500,6 +540,11 @@ class MainWindow(QMainWindow):
         btn_refresh_history = QPushButton("내역 새로고침")
         btn_refresh_history.clicked.connect(self.refresh_history)
         option_layout.addWidget(btn_refresh_history)
+        
+        # [NEW] 실현손익 통계 (롤업 테이블 기반)
+        self.lbl_history_stats = QLabel("누적 실현손익: - | 총 거래: -")
+        self.lbl_history_stats.setStyleSheet("font-weight: bold; color: #333; margin-left: 10px;")
+        option_layout.addWidget(self.lbl_history_stats)
         option_layout.addStretch()
         
         option_group.setLayout(option_layout)
@@ -824,7 +869,7 @@ class MainWindow(QMainWindow):
         A (총 추정자산) = API d+2추정예수금 + API 총평가금액
         B (봇 운용자금) = AssetManager current_capital
         C (여유 자금) = A - B
-        D (현재 운용자산) = AssetManager invested_amount
+        D (현재 운용자산) = 로트 장부 매입 원금 합계 + 미체결 매수 예약 현금 (저널)
         E (매수 가능현금) = AssetManager available_cash
         """
         # 로그인체크
@@ -847,8 +892,7 @@ class MainWindow(QMainWindow):
                 raw_eval = str(self.kiwoom.data.get('총평가금액', '0')).strip().replace(',', '')
                 total_eval = int(raw_eval) if raw_eval else 0
                 
-                # [SYNC] 현재 보유 종목의 총 매입금액 계산 (D값 동기화) & 평가액 합산 (Fallback)
-                total_purchase_sum = 0
+                # 봇 보유 종목 평가액 합산 (API 총평가금액 Fallback)
                 calc_total_eval = 0 # 테이블 기반 평가액 합계
                 
                 # [FIX] 봇 매수 종목 리스트 미리 조회
@@ -865,17 +909,14 @@ class MainWindow(QMainWindow):
                             if code.startswith('A'): code = code[1:]
                             
                             qty_item = self.table_holdings.item(r, 2)
-                            buy_item = self.table_holdings.item(r, 3)
                             curr_item = self.table_holdings.item(r, 5) # [Check] 5번이 현재가 맞나?
                             
-                            if qty_item and buy_item and curr_item:
+                            if qty_item and curr_item:
                                 qty = int(qty_item.text().replace(',', ''))
-                                buy_price = int(buy_item.text().replace(',', ''))
                                 curr_price = int(curr_item.text().replace(',', ''))
                                 
-                                # [NEW] 봇 매수 종목일 경우에만 [D] 합산에 포함
+                                # [NEW] 봇 매수 종목만 합산
                                 if code in bot_stocks:
-                                    total_purchase_sum += (qty * buy_price)
                                     calc_total_eval += (qty * curr_price)
                         except: pass
                 
@@ -883,15 +924,14 @@ class MainWindow(QMainWindow):
                 if total_eval == 0:
                     total_eval = calc_total_eval
                 
-                # [FIX] 단순 합산이 아니라, 봇 관리 종목만 필터링한 값을 [D]로 설정
-                self.asset_manager.sync_invested_amount(total_purchase_sum)
-                
-                # [OLD] 전체 합산 로직 (주석 처리)
-                # if total_eval == 0: total_eval = calc_total_eval
-                # self.asset_manager.sync_invested_amount(total_purchase_sum)
-                
-                # trade_history = self.db.get_trade_history()
-                # self.asset_manager.smart_sync_invested_amount(holdings_list, trade_history)
+                # [D] 로트 장부(체결마다 FIFO 갱신, 로그인 시 잔고와 대사)의 매입 원금 합계
+                # (미체결 매수 주문의 예약 현금은 저널 기준으로 유지)
+                invested = self.asset_manager.lots.total_cost
+                if self.journal is not None:
+                    invested += self.journal.state.reserved_total()
+                self.asset_manager.sync_invested_amount(invested)
+                if self.runtime is not None:
+                    self.runtime.sync_capital()  # 전략별 배정분 사용액도 같은 기준으로
 
         except Exception as e:
             self.log(f"⚠️ 자산 조회 중 오류: {e}")
@@ -958,10 +998,42 @@ class MainWindow(QMainWindow):
 
     @pyqtSlot()
     def refresh_history(self):
-        """거래 내역 및 리포트 조회 (자동 갱신)"""
+        """거래 내역 및 리포트 조회 (자동 갱신) - 조회는 읽기 전용 연결로 백그라운드 실행"""
+        if getattr(self, '_history_loading', False):
+            return  # 이전 조회가 아직 진행 중
+        self._history_loading = True
+        future = self.db.submit_read(self._fetch_history)
+        future.add_done_callback(self._on_history_fetched)
+    
+    def _fetch_history(self):
+        """[조회 스레드] 내역 탭에 필요한 데이터 일괄 조회"""
+        return {
+            'summaries': self.db.get_summary_history(),
+            'trades': self.db.get_trade_history(),
+            'total_profit': self.db.get_total_realized_profit(),
+            'total_trades': self.db.get_total_trades(),
+            'strategy_pnl': self.db.get_strategy_pnl(),
+        }
+    
+    def _on_history_fetched(self, future):
+        """[조회 스레드] 결과를 GUI 스레드로 전달"""
         try:
-            # 1. 일일 요약 조회
-            summaries = self.db.get_summary_history()
+            result = future.result()
+        except Exception as e:
+            result = e
+        self.sig_history_loaded.emit(result)
+    
+    @pyqtSlot(object)
+    def apply_history(self, result):
+        """[GUI 스레드] 조회 결과를 테이블에 반영"""
+        self._history_loading = False
+        if isinstance(result, Exception):
+            self.log(f"❌ 내역 조회 실패: {str(result)}")
+            return
+        
+        try:
+            # 1. 일일 요약
+            summaries = result['summaries']
             self.table_summary.setRowCount(0)
             
             for i, item in enumerate(summaries):
@@ -973,8 +1045,8 @@ class MainWindow(QMainWindow):
                 self.table_summary.setItem(i, 4, QTableWidgetItem(f"{item.get('profit_rate', 0):.2f}%"))
                 self.table_summary.setItem(i, 5, QTableWidgetItem(str(item.get('trade_count', 0))))
             
-            # 2. 상세 매매 기록 조회
-            trades = self.db.get_trade_history()
+            # 2. 상세 매매 기록
+            trades = result['trades']
             self.table_trade_log.setRowCount(0)
             
             for i, item in enumerate(trades):
@@ -994,6 +1066,14 @@ class MainWindow(QMainWindow):
                 self.table_trade_log.setItem(i, 4, QTableWidgetItem(f"{item.get('quantity', 0):,}"))
                 self.table_trade_log.setItem(i, 5, QTableWidgetItem(f"{item.get('total_amount', 0):,}"))
                 self.table_trade_log.setItem(i, 6, QTableWidgetItem(item.get('order_number', '-')))
+            
+            # 3. 실현손익 통계 (롤업 테이블)
+            stats_text = f"누적 실현손익: {result['total_profit']:,}원 | 총 거래: {result['total_trades']:,}회"
+            by_strategy = [f"{row['strategy'] or '미분류'} {row['realized_profit']:,}원"
+                           for row in result['strategy_pnl'] if row['sell_count'] > 0]
+            if by_strategy:
+                stats_text += " | " + ", ".join(by_strategy)
+            self.lbl_history_stats.setText(stats_text)
             self.log("거래 내역 조회 완료")
             
         except Exception as e:
@@ -1012,8 +1092,8 @@ class MainWindow(QMainWindow):
             profit = current - initial
             profit_rate = (profit / initial * 100) if initial > 0 else 0
             
-            # 오늘 거래 횟수
-            trade_count = self.db.get_trade_count(start_date=today)
+            # 오늘 거래 횟수 (롤업 테이블 조회)
+            trade_count = self.db.get_daily_trade_count(today)
             
             self.db.save_daily_summary(
                 target_date=today,
@@ -1211,15 +1291,20 @@ class MainWindow(QMainWindow):
             # 키움 API 객체 생성
             if self.kiwoom is None:
                 self.kiwoom = Kiwoom()
-                # 전략에 키움 객체 연결
-                self.strategy.kiwoom = self.kiwoom
                 
-                # [NEW] TradingManager 초기화 (매매 로직 전담)
-                # Kiwoom 객체 생성 직후에 초기화해야 함
-                self.trading_manager = TradingManager(self.kiwoom, self.db, self.asset_manager, self.strategy)
-                self.trading_manager.sig_log.connect(self.log)
-                self.trading_manager.sig_trade_event.connect(self.handle_trade_event)
-                self.trading_manager.sig_update_status.connect(self.update_status_slot)
+                # [NEW] 전략 런타임 (공용 시세 피드/지표 캐시 위에서 전략별 TradingManager 실행)
+                # Kiwoom 객체 생성 직후에 초기화해야 함, 전략의 키움 객체는 공용 피드로 연결됨
+                self.runtime = StrategyRuntime(self.kiwoom, self.db, self.asset_manager,
+                                               tick_archive=self.tick_archive)
+                self.trading_manager = self.runtime.add_strategy("변동성 돌파", self.strategy)
+                
+                # [NEW] 매매 엔진 스레드: 틱 판정은 엔진, 주문/UI 갱신은 GUI 스레드 (로그/상태는 묶음 전달)
+                self.engine = TradingEngine(self.runtime)
+                self.engine.sig_logs.connect(self.on_engine_logs)
+                self.engine.sig_statuses.connect(self.on_engine_statuses)
+                self.engine.sig_trade_event.connect(self.handle_trade_event)
+                self.runtime.start(ticks=False)
+                self.engine.start_engine()
                 
             # 시그널 연결 (중복 방지를 위해 안전하게 처리)
             try:
@@ -1263,7 +1348,7 @@ class MainWindow(QMainWindow):
                 
                 # [NEW] 저장된 자동 발굴 목록 UI 복원
                 self.table_watchlist_auto.setRowCount(0)
-                for code, s_name in self.strategy.auto_universe.items():
+                for code, s_name in self.strategy.universe.auto_sources().items():
                     name = self.kiwoom.ocx.dynamicCall("GetMasterCodeName(QString)", code)
                     self.add_watch_stock_auto(code, name, s_name, save=False)
                     
@@ -1271,12 +1356,30 @@ class MainWindow(QMainWindow):
                 
                 self.log(f"📂 사용자 설정 로드 완료: {user_id}")
                 
+                # [NEW] 주문 저널 복원 (비정상 종료 시 미체결 주문/당일 주문 종목/시세 캐시)
+                if self.journal is None:
+                    self.journal = TradeJournal(name=user_id_str)
+                    restored = self.runtime.restore(self.journal)
+                    self.log(f"📒 [저널] {self.journal.summary()} | 주문 종목 {restored['ordered']}개, "
+                             f"시세 {restored['prices']}개 복원")
+                
                 self.log("✅ 로그인 성공!")
                 # 메인 화면으로 전환
                 self.stack.setCurrentIndex(1)
                 
                 # 예수금 및 보유종목 조회
                 self.refresh_holdings()
+                # 저널 미완료 주문 대사 (방금 조회한 잔고 기준, 추가 TR 없음)
+                result = self.runtime.reconcile()
+                if result['filled'] or result['expired'] or result['open']:
+                    self.log(f"📒 [저널] 대사 완료: 누락 체결 {result['filled']}건, "
+                             f"만료 {result['expired']}건, 미체결 유지 {result['open']}건")
+                # 로트 장부를 잔고에 맞춤 (최초 실행 시 봇 보유분으로 장부 생성)
+                positions = self.kiwoom.positions
+                lot_result = self.asset_manager.lots.reconcile(positions, positions.bot_codes)
+                self.asset_manager.lots.flush()
+                if lot_result['added'] or lot_result['removed']:
+                    self.log(f"📒 [로트 장부] 잔고 기준 보정: 추가 {lot_result['added']}종목, 차감 {lot_result['removed']}종목")
                 self.refresh_asset_status()
                 
                 # 저장된 Max Stock Amount UI 반영
@@ -1298,6 +1401,8 @@ class MainWindow(QMainWindow):
                 QTimer.singleShot(4000, lambda: self.trading_timer.start(1000))  # [FIX] 2초 -> 1초 (최적화와 시너지)
                 QTimer.singleShot(5000, lambda: self.verify_timer.start(5000))
                 QTimer.singleShot(6000, lambda: self.cleanup_timer.start(60000))
+                QTimer.singleShot(7000, lambda: self.archive_timer.start(10000))
+                QTimer.singleShot(8000, lambda: self.target_timer.start(1000))
 
             else:
                 self.log("❌ 로그인 실패")
@@ -1429,16 +1534,17 @@ class MainWindow(QMainWindow):
             # 테이블 초기화
             self.table_holdings.setRowCount(0)
             
-            # [NEW] 봇 매수 종목 리스트 조회
-            bot_stocks = self.db.get_bot_stock_codes()
+            # [NEW] 봇 매수 종목 리스트 (잔고 조회 시 보유 종목 색인에 함께 갱신됨)
+            positions = self.kiwoom.positions
+            bot_stocks = positions.bot_codes
             
             for i, item in enumerate(holdings):
                 self.table_holdings.insertRow(i)
                 
                 # 데이터 파싱
-                code = item['종목코드'].strip()
-                if code.startswith('A'): code = code[1:]
+                code = normalize_code(item['종목코드'])
                 name = item['종목명'].strip()
+                positions.set_row(code, i) # 실시간 갱신용 행 색인
                 
                 # [NEW] 봇 매수 종목 표시
                 if code in bot_stocks:
@@ -1583,7 +1689,7 @@ class MainWindow(QMainWindow):
                 
                 # DB에 매매 기록 저장
                 stock_name = self.kiwoom.data.get('종목명', '알수없음')
-                self.db.save_trade(stock_code, stock_name, "매수", order_price, qty)
+                self.db.save_trade(stock_code, stock_name, "매수", order_price, qty, strategy="수동")
                 self.handle_trade_event()
                 
                 QMessageBox.information(self, "성공", "매수 주문이 전송되었습니다.")
@@ -1616,6 +1722,7 @@ class MainWindow(QMainWindow):
             qty = int(target['보유수량'])
             name = target['종목명']
             current_price = abs(int(target['현재가']))
+            buy_price = int(target.get('매입가', 0)) or current_price
             
             if qty <= 0:
                 self.log(f"⚠️ [긴급매도] {name}({code}) 보유 수량이 0입니다.")
@@ -1629,7 +1736,8 @@ class MainWindow(QMainWindow):
                 # 3. 자산 즉시 환원
                 self.asset_manager.release_cash_after_sell(current_price * qty)
                 # 4. 기록 저장
-                self.db.save_trade(code, name, "매도(긴급)", current_price, qty)
+                self.db.save_trade(code, name, "매도(긴급)", current_price, qty,
+                                   realized_profit=(current_price - buy_price) * qty)
                 self.handle_trade_event()
                 self.log(f"✅ [긴급매도성공] {name} 매도 주문 전송 및 자산 {current_price*qty:,}원 환원 완료")
                 
@@ -1915,10 +2023,58 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(btn_import_db)
         
         db_layout.addLayout(btn_layout)
+        
+        # [NEW] 거래내역 대량 내보내기/가져오기 (외부 분석/이관용)
+        bulk_layout = QHBoxLayout()
+        
+        btn_export_trades = QPushButton("📄 거래내역 내보내기 (CSV/DDTL)")
+        btn_export_trades.setStyleSheet("height: 32px;")
+        btn_export_trades.clicked.connect(self.export_trades)
+        bulk_layout.addWidget(btn_export_trades)
+        
+        btn_import_trades = QPushButton("📂 거래내역 가져오기")
+        btn_import_trades.setStyleSheet("height: 32px;")
+        btn_import_trades.clicked.connect(self.import_trades)
+        bulk_layout.addWidget(btn_import_trades)
+        
+        db_layout.addLayout(bulk_layout)
+        
+        # [NEW] 온라인 백업 진행률
+        self.progress_db_backup = QProgressBar()
+        self.progress_db_backup.setVisible(False)
+        db_layout.addWidget(self.progress_db_backup)
         db_group.setLayout(db_layout)
         layout.addWidget(db_group)
 
-        # 5. 설정 저장 버튼
+        # 5. 주문 지연 측정 (틱 → 주문 → 체결)
+        latency_group = QGroupBox("주문 지연 측정")
+        latency_box = QVBoxLayout()
+        latency_layout = QHBoxLayout()
+        
+        self.chk_latency = QCheckBox("측정 켜기")
+        self.chk_latency.setToolTip("실시간 틱 수신부터 주문 전송, 접수, 체결까지 구간별 지연을 누적합니다.")
+        self.chk_latency.toggled.connect(tracer.set_enabled)
+        latency_layout.addWidget(self.chk_latency)
+        
+        btn_latency_view = QPushButton("⏱️ 지연 통계 보기")
+        btn_latency_view.clicked.connect(self.show_latency_stats)
+        latency_layout.addWidget(btn_latency_view)
+        
+        btn_latency_export = QPushButton("📄 내보내기")
+        btn_latency_export.clicked.connect(self.export_latency_stats)
+        latency_layout.addWidget(btn_latency_export)
+        latency_box.addLayout(latency_layout)
+        
+        # 엔진 지연 요약 (status_timer 1초 주기 갱신)
+        self.lbl_latency = QLabel("엔진 대기 중")
+        self.lbl_latency.setWordWrap(True)
+        self.lbl_latency.setStyleSheet("color: gray;")
+        latency_box.addWidget(self.lbl_latency)
+        
+        latency_group.setLayout(latency_box)
+        layout.addWidget(latency_group)
+
+        # 6. 설정 저장 버튼
         btn_save_settings = QPushButton("설정 저장 (Save Settings)")
         btn_save_settings.setStyleSheet("height: 45px; background-color: #007bff; color: white; font-weight: bold; font-size: 14px;")
         btn_save_settings.clicked.connect(self.save_settings)
@@ -2077,7 +2233,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "오류", "유효한 숫자를 입력해주세요.")
     
     def export_database(self):
-        """데이터베이스 백업 (DB + 설정)"""
+        """데이터베이스 백업 (DB 온라인 백업 + 설정)"""
         import shutil
         import os
         from datetime import datetime
@@ -2099,27 +2255,134 @@ class MainWindow(QMainWindow):
                 backup_folder = os.path.join(folder_path, default_name)
                 os.makedirs(backup_folder, exist_ok=True)
                 
-                # trading.db 복사
-                if os.path.exists("trading.db"):
-                    shutil.copy2("trading.db", os.path.join(backup_folder, "trading.db"))
-                
                 # strategy.json 복사 (모든 파일)
                 for filename in os.listdir("."):
                     if filename.startswith("strategy") and filename.endswith(".json"):
                         shutil.copy2(filename, os.path.join(backup_folder, filename))
                 
-                self.log(f"[BACKUP] 백업 완료: {backup_folder}")
-                QMessageBox.information(
-                    self, 
-                    "백업 성공", 
-                    f"데이터베이스와 설정이 성공적으로 백업되었습니다.\n\n폴더: {backup_folder}"
+                # trading.db 온라인 백업 (작업 스레드, 매매 중에도 일관된 스냅샷)
+                self.progress_db_backup.setValue(0)
+                self.progress_db_backup.setVisible(True)
+                self.log(f"[BACKUP] 백업 시작: {backup_folder}")
+                self.db.start_backup(
+                    os.path.join(backup_folder, "trading.db"),
+                    progress=self.sig_backup_progress.emit,
+                    done=self.sig_backup_done.emit
                 )
         except Exception as e:
             self.log(f"[ERROR] 백업 실패: {e}")
             QMessageBox.critical(self, "백업 실패", f"백업 중 오류가 발생했습니다:\n{e}")
     
+    @pyqtSlot(int, int)
+    def on_backup_progress(self, copied, total):
+        """백업 진행률 표시"""
+        self.progress_db_backup.setMaximum(max(total, 1))
+        self.progress_db_backup.setValue(copied)
+    
+    @pyqtSlot(bool, str)
+    def on_backup_done(self, ok, message):
+        """백업 완료 처리"""
+        self.progress_db_backup.setVisible(False)
+        if ok:
+            self.log(f"[BACKUP] 백업 완료: {message}")
+            QMessageBox.information(
+                self, 
+                "백업 성공", 
+                f"데이터베이스와 설정이 성공적으로 백업되었습니다.\n\n파일: {message}"
+            )
+        else:
+            self.log(f"[ERROR] 백업 실패: {message}")
+            QMessageBox.critical(self, "백업 실패", f"백업 중 오류가 발생했습니다:\n{message}")
+    
+    def export_trades(self):
+        """거래내역 내보내기 (조회 스레드에서 스트리밍 기록)"""
+        from datetime import datetime
+        
+        default_name = datetime.now().strftime("trades_%Y%m%d.csv")
+        path, _ = QFileDialog.getSaveFileName(
+            self, "거래내역 내보내기", default_name,
+            "CSV (*.csv);;컬럼형 바이너리 (*.ddtl)"
+        )
+        if not path:
+            return
+        
+        self.progress_db_backup.setValue(0)
+        self.progress_db_backup.setVisible(True)
+        self.log(f"[EXPORT] 거래내역 내보내기 시작: {path}")
+        self.db.start_export(path, progress=self.sig_backup_progress.emit, done=self.sig_bulk_done.emit)
+    
+    def show_latency_stats(self):
+        """구간별 주문 지연 통계 (p50/p99/max) + 전략별 틱 처리 시간"""
+        lines = tracer.summary_lines()
+        if self.runtime is not None:
+            lines += [f"[{name}] 틱 {s['ticks']:,}건 | 평균 {s['avg_us']}us | 최대 {s['max_us']}us | 합계 {s['total_ms']}ms"
+                      for name, s in self.runtime.cpu_stats().items() if s['ticks']]
+        if not lines:
+            QMessageBox.information(self, "주문 지연", "측정된 구간이 없습니다.\n(측정을 켠 뒤 실시간 시세/주문이 있어야 기록됩니다)")
+            return
+        for line in lines:
+            self.log(f"⏱️ [지연] {line}")
+        QMessageBox.information(self, "주문 지연", "\n".join(lines))
+    
+    def update_latency_label(self):
+        """엔진 지연 요약 라벨 갱신 (틱→판정, 신호→GUI 실행/주문 전송 p99, GUI 정체)"""
+        if self.engine is not None and hasattr(self, 'lbl_latency'):
+            self.lbl_latency.setText(self.engine.summary())
+    
+    def export_latency_stats(self):
+        """구간별 주문 지연 통계 파일 저장 (CSV 요약 / JSON 분포 포함)"""
+        from datetime import datetime
+        
+        default_name = datetime.now().strftime("latency_%Y%m%d_%H%M.json")
+        path, _ = QFileDialog.getSaveFileName(
+            self, "주문 지연 내보내기", default_name,
+            "JSON (*.json);;CSV (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            tracer.export(path)
+            self.log(f"[EXPORT] 주문 지연 통계 저장: {path}")
+        except OSError as e:
+            QMessageBox.warning(self, "오류", f"저장 실패: {e}")
+    
+    def import_trades(self):
+        """거래내역 가져오기 (작업 스레드에서 배치 저장)"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "거래내역 가져오기", "",
+            "거래내역 (*.csv *.ddtl)"
+        )
+        if not path:
+            return
+        
+        reply = QMessageBox.question(
+            self, "거래내역 가져오기",
+            "선택한 파일의 거래내역을 기존 기록에 추가합니다.\n(중복 여부는 확인하지 않습니다)\n\n계속하시겠습니까?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        # 전체 건수를 미리 알 수 없으므로 진행 표시줄은 바쁨 표시
+        self.progress_db_backup.setRange(0, 0)
+        self.progress_db_backup.setVisible(True)
+        self.log(f"[IMPORT] 거래내역 가져오기 시작: {path}")
+        self.db.start_import(path, done=self.sig_bulk_done.emit)
+    
+    @pyqtSlot(bool, str)
+    def on_bulk_trades_done(self, ok, message):
+        """거래내역 가져오기/내보내기 완료 처리"""
+        self.progress_db_backup.setRange(0, 100)
+        self.progress_db_backup.setVisible(False)
+        if ok:
+            self.log(f"[BULK] 거래내역 처리 완료: {message}")
+            self.refresh_history()
+            QMessageBox.information(self, "완료", f"거래내역 처리가 완료되었습니다.\n\n{message}")
+        else:
+            self.log(f"[ERROR] 거래내역 처리 실패: {message}")
+            QMessageBox.critical(self, "실패", f"거래내역 처리 중 오류가 발생했습니다:\n{message}")
+    
     def import_database(self):
-        """데이터베이스 복원"""
         """데이터베이스 복원"""
         import shutil
         
@@ -2146,10 +2409,10 @@ class MainWindow(QMainWindow):
             )
             
             if folder_path:
-                # trading.db 복원
+                # trading.db 복원 (검증 후 현재 연결에 원자적으로 반영)
                 db_path = os.path.join(folder_path, "trading.db")
                 if os.path.exists(db_path):
-                    shutil.copy2(db_path, "trading.db")
+                    self.db.restore_from(db_path)
                 
                 # strategy.json 파일들 복원
                 for filename in os.listdir(folder_path):
@@ -2157,12 +2420,20 @@ class MainWindow(QMainWindow):
                         src = os.path.join(folder_path, filename)
                         shutil.copy2(src, filename)
                 
+                # 로그인 상태라면 복원된 설정 즉시 재적용
+                user_id = self.label_user_id.text().strip()
+                if user_id and user_id != "-":
+                    self.asset_manager.load_user_config(user_id)
+                    self.strategy.load_config(user_id)
+                    self.refresh_settings_ui()
+                    self.refresh_strategy_info()
+                self.refresh_history()
+                
                 self.log(f"[RESTORE] 복원 완료: {folder_path}")
                 QMessageBox.information(
                     self,
                     "복원 성공",
-                    "데이터베이스와 설정이 성공적으로 복원되었습니다.\n\n"
-                    "프로그램을 다시 시작하면 복원된 데이터를 사용할 수 있습니다."
+                    "데이터베이스와 설정이 성공적으로 복원되었습니다."
                 )
         except Exception as e:
             self.log(f"[ERROR] 복원 실패: {e}")
@@ -2447,39 +2718,21 @@ class MainWindow(QMainWindow):
         self.log(f"🔎 [HTS포착] {len(codes)}개 종목 분석 대기열 추가")
         profile = self.combo_scan_profile.currentText()
         for code in codes:
-            # [NEW] 등락률 즉시 확인 (고점 진입 방산)
-            price_data = self.kiwoom.get_current_price(code)
-            try:
-                rate = float(price_data.get('등락율', '0').strip())
-            except: rate = 0
-            
-            if rate > 20.0:
-                self.log(f"🚫 [HTS제외] {code} 등락률 {rate}% 초과로 제외")
-                continue
-
-            if code not in self.strategy.universe and code not in [c[0] for c in self.verification_queue]:
+            # 등락률 상한(고점 진입 방지)은 검증 현재가 단계에서 확인 (콜백에서 TR 조회 없음)
+            if code not in self.strategy.universe and code not in self.verification_queue:
                 name = self.kiwoom.ocx.dynamicCall("GetMasterCodeName(QString)", code)
-                self.verification_queue.append((code, name, f"HTS 조건({profile})"))
+                self.verification_queue.push(code, name, f"HTS 조건({profile})")
 
     @pyqtSlot(str, str, str)
     def on_real_condition(self, code, type_str, index):
         """실시간 HTS 조건 편입/이탈 처리"""
         if type_str == "I": # 편입
-            # [NEW] 등락률 즉시 확인 (고점 진입 방지)
-            price_data = self.kiwoom.get_current_price(code)
-            try:
-                rate = float(price_data.get('등락율', '0').strip())
-            except: rate = 0
-            
-            if rate > 20.0:
-                self.log(f"🚫 [실시간HTS제외] {code} 등락률 {rate}% 초과로 제외")
-                return
-
-            if code not in self.strategy.universe and code not in [c[0] for c in self.verification_queue]:
+            # 등락률 상한(고점 진입 방지)은 검증 현재가 단계에서 확인
+            if code not in self.strategy.universe and code not in self.verification_queue:
                 name = self.kiwoom.ocx.dynamicCall("GetMasterCodeName(QString)", code)
                 self.log(f"⚡ [HTS편입] {name}({code}) 검증 시작")
                 profile = self.combo_scan_profile.currentText()
-                self.verification_queue.append((code, name, f"실시간HTS({profile})"))
+                self.verification_queue.push(code, name, f"실시간HTS({profile})")
 
     def update_condition_combo(self, conditions):
         """HTS 조건식 목록 업데이트 (기존 유지)"""
@@ -2493,165 +2746,103 @@ class MainWindow(QMainWindow):
         try:
             profile = self.combo_scan_profile.currentText()
             type_name = "거래량급증" if trcode == "opt10032" else "가격급발동"
-            # [FIX] 프로필별 1차 필터 기준값 (UI 설명과 일치)
-            min_vol_rate = 100.0
-            min_price_rate = 0.0
-            
-            if "전고점 돌파" in profile:
-                min_vol_rate = 500.0
-                min_price_rate = 5.0
-            elif "정배열" in profile:
-                min_vol_rate = 150.0
-                min_price_rate = 2.0
-            elif "볼린저" in profile:
-                min_vol_rate = 200.0
-                min_price_rate = 3.0
+            # 프로필 파이프라인 (프로필별 1차 기준값은 logic/profiles.py 선언)
+            pipeline = compile_profile(profile)
             
             passed_count = 0
             for item in results:
                 code = item['code']
                 name = item['name']
-                price_rate = float(item.get('price_rate', 0))
-                volume_rate = float(item.get('volume_rate', 0))
                 
-                # 1. 제외 종목 필터링 (스팩, ETF, ETN, 우선주, 관리종목 등)
-                exclude_keywords = ["스팩", "ETF", "ETN", "리츠", "부동산투자신탁", " (W)", "선물", "인버스", "레버리지"]
-                if any(kw in name for kw in exclude_keywords):
-                    continue
-                
-                # 2. 프로필별 등락률 및 거래량 필터 (UI 준수)
-                if price_rate < min_price_rate or volume_rate < min_vol_rate:
-                    continue
-                
-                # 3. 고점 매수 방지 (20% 초과 종목 제외)
-                if price_rate > 20.0:
+                # 1. 스캔 단계 필터: 제외 종목, 프로필별 등락률/거래량 기준, 고점 매수 방지
+                if pipeline.check_scan(item) is not None:
                     continue
                 
                 # 2. 이미 감시 중이면 TTL 초기화
-                if code in self.auto_stock_hits:
-                    self.auto_stock_hits[code] = 0
+                if self.strategy.universe.is_auto(code):
+                    self.strategy.universe.reset_hits(code)
                     continue
                     
-                # 3. 신규 후보 검증 큐 추가
-                if code not in self.strategy.universe and code not in [c[0] for c in self.verification_queue]:
-                    self.verification_queue.append((code, name, profile))
-                    passed_count += 1
+                # 3. 신규 후보 검증 큐 추가 (스캔 응답 값은 대기열 순위 점수에 사용)
+                if code not in self.strategy.universe and code not in self.verification_queue:
+                    if self.verification_queue.push(code, name, profile, item):
+                        passed_count += 1
             
             if passed_count > 0:
                 self.log(f"📥 [{type_name}] {len(results)}개 수신 -> {passed_count}개 선별 (필터링 완료)")
         except Exception as e:
             self.log(f"❌ [스캔오류] {e}")
 
-    def process_verification_queue(self):
-        """큐에서 종목을 꺼내 정밀 검증 (차트 분석)"""
-        if not self.verification_queue or self.kiwoom.get_connect_state() != 1:
+    def run_target_job(self):
+        """[장전 작업] 거래일 변경 시 목표가 일괄 재계산, 일봉 캐시 없는 종목은 1초에 1개씩 TR 조회"""
+        if self.kiwoom.get_connect_state() != 1:
             return
-            
-        code, name, profile = self.verification_queue.pop(0)
-        self.log(f"🔎 [검증대기] {name}({code}) 전략 적합성 분석 중...")
-        
-        # 1. 일봉 데이터 조회 (QEventLoop로 동기적 대기)
-        daily_data = self.kiwoom.get_daily_data(code)
-        if not daily_data: return
-        
-        # [NEW] 거래량 필터 (설정된 최소 거래량 기준)
-        current_vol = daily_data[0].get('거래량', 0)
-        min_vol_limit = self.strategy.params.get('min_vol', 100000)
-        
-        # 최근 5일 평균 거래량도 체크
-        avg_vol_5d = sum(d.get('거래량', 0) for d in daily_data[:5]) / 5 if len(daily_data) >= 5 else 0
-        
-        if current_vol < min_vol_limit or avg_vol_5d < (min_vol_limit / 2):
-            self.log(f"📉 [조건미달] {name}({code}) 유동성 부족 (현재: {current_vol:,}, 기준: {min_vol_limit:,})")
+        from datetime import datetime
+        if self.strategy.plan_date != datetime.now().strftime('%Y%m%d'):
+            self.strategy.prepare_targets()
             return
+        self.strategy.fetch_next_missing()
 
-        # [NEW] 분봉 상승세 필터 (설정된 확인 횟수만큼 검증)
-        confirm_count = int(self.strategy.params.get('confirm_count', 3))
-        # 1분봉 데이터 사용 (사용자 요청: 1분 봉을 N분 확인)
-        min_data = self.kiwoom.get_minute_data(code, interval=1) 
-        
-        if len(min_data) >= confirm_count:
-            # 설정된 횟수만큼 분봉이 추세를 유지하는지 확인
-            # c[0]: 현재, c[1]: 1분전...
-            trend_passed = True
-            for i in range(confirm_count - 1):
-                if min_data[i]['종가'] < min_data[i+1]['종가']:
-                    trend_passed = False
-                    break
-            
-            if not trend_passed:
-                 self.log(f"📉 [추세미달] {name}({code}) {confirm_count}분봉 연속 상승세 아님")
-                 return
-        else:
-            self.log(f"⚠️ [데이터부족] {name}({code}) 분봉 데이터가 부족하여 분석 제외")
+    def process_verification_queue(self):
+        """검증 대기열 진행 (낮은 비용 단계부터, 타이머 1회당 TR 한도까지)"""
+        if not self.verification_queue or self.kiwoom.get_connect_state() != 1:
             return
-
-        # [NEW] 고점 매수 방지 필터 (20% 이상 급등한 종목은 제외)
-        curr_price = 0
-        if len(daily_data) >= 2:
-             curr_price = daily_data[0]['종가']
-             prev_price = daily_data[1]['종가']
-             rise_rate = (curr_price - prev_price) / prev_price * 100
-             
-             if rise_rate > 20.0:
-                 self.log(f"🚫 [고점경고] {name}({code}) 현재 {rise_rate:.2f}% 급등 중 - 추격매수 방지를 위해 제외")
-                 return
-
-        # [NEW] 체결강도 필터 (매수세 확인)
-        min_intensity = self.strategy.params.get('min_intensity', 100.0)
-        # 실시간 체결 정보 조회 (현재 체결강도 포함)
-        price_info = self.kiwoom.get_current_price(code)
-        try:
-            current_intensity = float(price_info.get('체결강도', '0').strip())
-            if current_intensity < min_intensity:
-                self.log(f"📉 [조건미달] {name}({code}) 매수세 약함 (체결강도: {current_intensity:.1f}%, 기준: {min_intensity:.1f}%)")
-                return
-        except Exception as e:
-            self.log(f"⚠️ [분석경고] {name}({code}) 체결강도 확인 불가 ({e})")
         
-        # 2. 프로필별 정밀 검증
-        passed = False
-        if "전고점 돌파" in profile:
-            is_break, target = self.strategy.check_breakout(daily_data, 20)
-            if is_break: passed = True
-        elif "정배열" in profile:
-            if self.strategy.check_trend_alignment(daily_data) and self.strategy.check_golden_cross(daily_data):
-                passed = True
-        elif "볼린저" in profile:
-            upper, avg, lower = self.strategy.calculate_bollinger_bands(daily_data)
-            if upper and daily_data[0]['종가'] > upper:
-                passed = True
-        elif "사용자 정의" in profile:
-            passed = True # 사용자 정의는 1차 필터만 통과하면 바로 추가
-            
-        # 3. 최종 통과 시 자동 리스트에 추가
-        if passed:
-            self.log(f"✨ [전략일치] {name}({code}) 포착! 자동 감시를 시작합니다.")
-            self.add_watch_stock_auto(code, name, profile)
-        else:
-            # self.log(f"❌ [조건미달] {name}({code}")
-            pass
+        for result, candidate, reason in self.verification_queue.step():
+            if reason:
+                self.log(reason)
+            
+            # 최종 통과 시 자동 리스트에 추가
+            if result == "pass":
+                self.log(f"✨ [전략일치] {candidate.label} 포착! 자동 감시를 시작합니다.")
+                self.add_watch_stock_auto(candidate.code, candidate.name, candidate.profile)
+    
+    def _fetch_quote(self, candidate):
+        """[검증 1단계] 현재가 조회 (체결강도/등락률)"""
+        candidate.quote = self.kiwoom.get_current_price(candidate.code)
+        return bool(candidate.quote)
+    
+    def _fetch_quotes(self, candidates):
+        """[검증 1단계] 복수 종목 현재가 조회 (TR 1회, 체결강도/등락률)"""
+        quotes = self.kiwoom.get_current_prices([c.code for c in candidates])
+        for candidate in candidates:
+            candidate.quote = quotes.get(candidate.code)
+        return [bool(c.quote) for c in candidates]
+    
+    def _fetch_daily(self, candidate):
+        """[검증 2단계] 일봉 조회 → 롤링 지표 상태 + 일봉 캐시/목표가 계획"""
+        self.log(f"🔎 [검증대기] {candidate.label} 전략 적합성 분석 중...")
+        daily_data = self.kiwoom.get_daily_data(candidate.code)
+        if not daily_data:
+            return False
+        # 완성 봉이 이미 반영된 종목은 당일 봉만 갱신, 이후 판정은 O(1)
+        candidate.state = self.strategy.indicator_book.seed(candidate.code, daily_data)
+        # 편입 시 add_stock에서 TR 재조회 없음
+        self.strategy.cache_daily_bars(candidate.code, daily_data)
+        return True
+    
+    def _fetch_minutes(self, candidate):
+        """[검증 3단계] 1분봉 조회 → 분봉 추세 상태"""
+        candidate.minutes = self.kiwoom.get_minute_data(candidate.code, interval=1)
+        if candidate.minutes and candidate.state is not None:
+            # 지표 상태는 엔진 스레드가 틱으로 갱신하므로 시드도 지표 캐시를 통해 엔진에서 실행
+            candidate.state = self.strategy.indicator_book.seed_minutes(candidate.code, candidate.minutes)
+        return candidate.state is not None
 
     def add_watch_stock_auto(self, code, name, strategy_name, save=True):
         """자동 발굴 종목 편입 로직 (Dedicated Table)"""
-        # [NEW] auto_universe 동기화
-        if not hasattr(self.strategy, 'auto_universe'):
-            self.strategy.auto_universe = {}
-            
-        if code in self.strategy.universe and code not in self.strategy.auto_universe:
+        universe = self.strategy.universe
+        if code in universe and not universe.is_auto(code):
             # 이미 수동 감시 중이면 추가 안 함
             return
         
-        # 전략에 추가
-        if code not in self.strategy.universe:
-            self.strategy.add_stock(code)
-            
-        self.strategy.auto_universe[code] = strategy_name
-        self.auto_stock_hits[code] = 0 # TTL 초기화
+        # 전략에 추가 (이미 자동 감시 중이면 출처만 갱신)
+        self.strategy.add_stock(code, strategy_name)
+        universe.reset_hits(code) # TTL 초기화
         
-        # [NEW] 실시간 시세 등록 (필수)
+        # [NEW] 실시간 시세 등록 (필수, 공용 피드에서 종목당 1회만 등록)
         if self.kiwoom.get_connect_state() == 1:
-            self.kiwoom.set_real_reg(code, "10;12;13;228", "1") # 추가등록
+            self.runtime.subscribe(self.runtime.primary, code) # 추가등록 (16: 시가)
             
             # [FIX] 등록 직후 현재가 한 번 조회하여 캐시 초기화 (UI 조회중 방지)
             # set_real_reg는 변동 시에만 데이터를 주므로, 초기값이 없으면 계속 '조회중'으로 남음
@@ -2688,7 +2879,12 @@ class MainWindow(QMainWindow):
         self.table_watchlist_auto.setItem(row, 7, QTableWidgetItem("감시중"))
 
     def run_strategy_cycle(self):
-        """자동매매 주기적 실행 (수동/자동 리스트 모두 감시)"""
+        """
+        자동매매 주기적 실행 (감시 목록 UI 갱신 + 보유 종목 매도 감시)
+        
+        매수 판정은 TradingManager.on_real_data의 트리거 인덱스에서 틱 단위로 처리되므로
+        여기서는 감시 목록 표시만 순차 갱신합니다.
+        """
         # 1. 대상 종목 리스트 (자동 발굴 리스트만 사용)
         total_rows = self.table_watchlist_auto.rowCount()
         
@@ -2744,7 +2940,6 @@ class MainWindow(QMainWindow):
                     if rate_val > 25.0:
                         self.log(f"✂️ [목록정리] {name}({code}) {rate_val}% 도달 - 목표 범위 초과로 감시 종료")
                         self.strategy.remove_stock(code)
-                        if code in self.auto_stock_hits: del self.auto_stock_hits[code]
                         target_table.removeRow(row_idx)
                         # 행이 삭제되었으므로 total_rows 업데이트 및 인덱스 조정 필요하지만, 
                         # 루프 내에서는 continue로 넘어가고 다음 사이클에서 반영됨
@@ -2766,35 +2961,17 @@ class MainWindow(QMainWindow):
                         elif float(rate) < 0: rate_item.setForeground(Qt.blue)
                     except: pass
                 
-                # 매수 감시 및 실행 (TradingManager 위임)
-                status_item = target_table.item(row_idx, status_col)
-                current_status = status_item.text() if status_item else ""
-                
-                if "매수완료" not in current_status and "주문중" not in current_status:
-                    result = self.trading_manager.process_buy_strategy(code, current_price, rate, strength, name)
-                    
-                    if result == "ORDERING":
-                        target_table.setItem(row_idx, status_col, QTableWidgetItem("주문중"))
-                    elif result == "REMOVE":
-                         self.strategy.remove_stock(code)
-                         target_table.removeRow(row_idx)
-                         total_rows = target_table.rowCount()
-                         if total_rows == 0: break
+                # 매수 감시는 실시간 트리거(TradingManager.on_buy_trigger)가 담당
                 
             except Exception as e:
                 self.log(f"⚠️ 사이클 매수대기 에러 ({code}): {e}")
 
         # 2. 보유 종목 순회 (매도 - 손절/익절)
         try:
-            holdings = self.kiwoom.account_holdings # [FIX] 데이터 유실 방지를 위해 지속성 있는 변수 사용
-            if not holdings:
-                # self.log("ℹ️ 감시 중인 보유 종목이 없습니다.") # 로그 너무 많아지므로 생략 가능
-                pass
+            positions = self.kiwoom.positions # [FIX] 보유 종목 색인 (잔고 조회/체결 통보로 갱신)
             
-            for item in holdings:
-                raw_code = item['종목코드']
-                code = raw_code.strip()
-                if len(code) > 6: code = code[-6:]
+            for item in positions:
+                code = normalize_code(item['종목코드'])
                 
                 # [FIX] 보유 종목은 refresh_holdings(10초 주기)에서 가져온 가격 사용 (API 과부하 -200 방지)
                 current_price = abs(int(item['현재가']))
@@ -2802,31 +2979,29 @@ class MainWindow(QMainWindow):
                 buy_price = int(item['매입가'])
                 qty = int(item['보유수량'])
                 
-                if qty <= 0: continue
+                if qty <= 0 or positions.is_exiting(code): continue
                     
                 # [NEW] 실시간 UI 업데이트 (보유종목 테이블)
-                # 테이블에서 해당 종목 행 찾기
-                for r in range(self.table_holdings.rowCount()):
-                    t_code = self.table_holdings.item(r, 0).text()
-                    if t_code == code:
-                        # 현재가 갱신
-                        self.table_holdings.setItem(r, 4, QTableWidgetItem(f"{current_price:,}"))
-                        
-                        # 평가손익/수익률 재계산
-                        total_buy = buy_price * qty
-                        total_curr = current_price * qty
-                        eval_profit = total_curr - total_buy
-                        profit_rate = (eval_profit / total_buy) * 100 if total_buy > 0 else 0
-                        
-                        # 손익 색상 업데이트
-                        item_profit = QTableWidgetItem(f"{eval_profit:,}")
-                        item_profit.setForeground(Qt.red if eval_profit > 0 else Qt.blue if eval_profit < 0 else Qt.black)
-                        self.table_holdings.setItem(r, 5, item_profit)
-                        
-                        item_rate = QTableWidgetItem(f"{profit_rate:.2f}%")
-                        item_rate.setForeground(Qt.red if profit_rate > 0 else Qt.blue if profit_rate < 0 else Qt.black)
-                        self.table_holdings.setItem(r, 6, item_rate)
-                        break
+                # 테이블 행 (잔고 조회 시 색인에 기록, 체결로 새로 생긴 종목은 다음 조회에서 표시)
+                r = positions.row(code)
+                if r is not None and r < self.table_holdings.rowCount():
+                    # 현재가 갱신
+                    self.table_holdings.setItem(r, 4, QTableWidgetItem(f"{current_price:,}"))
+                    
+                    # 평가손익/수익률 재계산
+                    total_buy = buy_price * qty
+                    total_curr = current_price * qty
+                    eval_profit = total_curr - total_buy
+                    profit_rate = (eval_profit / total_buy) * 100 if total_buy > 0 else 0
+                    
+                    # 손익 색상 업데이트
+                    item_profit = QTableWidgetItem(f"{eval_profit:,}")
+                    item_profit.setForeground(Qt.red if eval_profit > 0 else Qt.blue if eval_profit < 0 else Qt.black)
+                    self.table_holdings.setItem(r, 5, item_profit)
+                    
+                    item_rate = QTableWidgetItem(f"{profit_rate:.2f}%")
+                    item_rate.setForeground(Qt.red if profit_rate > 0 else Qt.blue if profit_rate < 0 else Qt.black)
+                    self.table_holdings.setItem(r, 6, item_rate)
                 
                 should_sell, msg = self.strategy.check_sell_signal(code, current_price, buy_price)
                 
@@ -2852,8 +3027,10 @@ class MainWindow(QMainWindow):
                         self.log(f"✅ [주문성공] {item['종목명']} 매도 주문이 접수되었습니다.")
                         # 매도 주문 성공 시 보유 수량 즉시 0으로 처리하여 중복 매도 방지
                         item['보유수량'] = 0
+                        positions.mark_exiting(code)
                         # [FIX] 매도 기록 저장 및 UI 즉시 갱신
-                        self.db.save_trade(code, item['종목명'], "매도", current_price, qty)
+                        self.db.save_trade(code, item['종목명'], "매도", current_price, qty,
+                                           realized_profit=(current_price - buy_price) * qty)
                         self.handle_trade_event()
                         
                         # [NEW] 즉시 현금 환원 (재투자 가능하도록)
@@ -2899,21 +3076,18 @@ class MainWindow(QMainWindow):
             # 1. 보유 중인 종목인 경우 자동 발굴 리스트에서 제거 (보유종목 테이블에서 관리하도록 유도)
             if code in holding_codes:
                 self.strategy.remove_stock(code)
-                if code in self.strategy.auto_universe: del self.strategy.auto_universe[code]
                 self.table_watchlist_auto.removeRow(i)
-                if code in self.auto_stock_hits: del self.auto_stock_hits[code]
                 removed_count += 1
                 continue
                 
             # 2. 보유 중이 아니고 매수완료 상태가 아니면 TTL 상승
             if "매수완료" not in status:
-                self.auto_stock_hits[code] = self.auto_stock_hits.get(code, 0) + 1
-                if self.auto_stock_hits[code] >= 3:
+                if self.strategy.universe.bump_hits(code) >= 3:
                     self.log(f"🧹 [자동청소] 도태된 종목 제거: {code}")
                     self.strategy.remove_stock(code)
-                    if code in self.strategy.auto_universe: del self.strategy.auto_universe[code]
+                    if self.runtime is not None:
+                        self.runtime.feed.unsubscribe(self.runtime.primary, code) # 실시간 해제
                     self.table_watchlist_auto.removeRow(i)
-                    if code in self.auto_stock_hits: del self.auto_stock_hits[code]
                     removed_count += 1
         
         if removed_count > 0:
@@ -2926,6 +3100,49 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(500, self.refresh_holdings)
         QTimer.singleShot(1000, self.refresh_asset_status)
         
+    @pyqtSlot(list)
+    def on_engine_logs(self, messages):
+        """매매 엔진 로그 묶음 수신"""
+        for message in messages:
+            self.log(message)
+    
+    @pyqtSlot(dict)
+    def on_engine_statuses(self, statuses):
+        """매매 엔진 상태 묶음 수신 (종목별 마지막 상태)"""
+        for code, status in statuses.items():
+            self.update_status_slot(code, status)
+    
+    def flush_tick_archive(self):
+        """틱 아카이브 버퍼 교체 (엔진 동작 중이면 틱 기록과 같은 엔진 스레드에서 실행)"""
+        if self.engine is not None:
+            self.engine.call(self.tick_archive.flush)
+        else:
+            self.tick_archive.flush()
+    
+    def rollover_trade_log(self):
+        """월이 바뀌면 지난 달 매매 기록을 아카이브로 이동 (프로그램을 계속 켜 둔 채 월을 넘겨도 당월 테이블 유지)"""
+        month = QDate.currentDate().toString("yyyyMM")
+        if month == self.trade_log_month:
+            return
+        self.trade_log_month = month
+        moved = self.db.rollover_trade_log()
+        if moved:
+            self.log(f"📦 [아카이브] 월 변경: 지난 달 매매 기록 {moved:,}건 이동")
+    
+    def snapshot_journal(self):
+        """
+        저널 스냅샷 요청 (시세 캐시 포함)
+        시세 캐시 복사만 엔진 스레드(시세 갱신과 같은 스레드)에서 하고, 파일 기록/fsync는 저널 작업 스레드가 수행
+        """
+        if self.journal is None:
+            return
+        manager = self.runtime.manager() if self.runtime else None
+        snapshot = lambda: self.journal.request_snapshot(prices=dict(manager.price_cache) if manager else None)
+        if self.engine is not None:
+            self.engine.call(snapshot)
+        else:
+            snapshot()
+    
     @pyqtSlot(str, str)
     def update_status_slot(self, code, status):
         """TradingManager로부터 상태 업데이트 요청 수신"""
@@ -2934,6 +3151,12 @@ class MainWindow(QMainWindow):
         # 자동 목록 검색
         for r in range(self.table_watchlist_auto.rowCount()):
             if self.table_watchlist_auto.item(r, 0).text() == code:
+                if status == "감시종료":
+                    # 매수 차단(등락률 과다) 종목은 목록에서 제거
+                    self.table_watchlist_auto.removeRow(r)
+                    self.strategy.remove_stock(code)
+                    self.strategy.save_config()
+                    return
                 self.table_watchlist_auto.setItem(r, 7, QTableWidgetItem(status))
                 return
     
@@ -2947,6 +3170,34 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'scan_timer') and self.scan_timer.isActive(): self.scan_timer.stop()
         if hasattr(self, 'trading_timer') and self.trading_timer.isActive(): self.trading_timer.stop()
         if hasattr(self, 'holdings_timer') and self.holdings_timer.isActive(): self.holdings_timer.stop()
+        if hasattr(self, 'archive_timer') and self.archive_timer.isActive(): self.archive_timer.stop()
+        if hasattr(self, 'target_timer') and self.target_timer.isActive(): self.target_timer.stop()
+        
+        # 매매 엔진 종료 (남은 틱 처리 후, 틱 아카이브 정리 전에)
+        if self.engine is not None:
+            try:
+                self.engine.stop()
+                print(f"⏱️ [엔진] {self.engine.summary()}")
+            except: pass
+        for line in tracer.summary_lines():
+            print(f"⏱️ [지연] {line}")
+        
+        # 주문 저널 스냅샷 (다음 실행 시 재적용 없이 복원)
+        if self.journal is not None:
+            try:
+                manager = self.runtime.manager()
+                self.journal.close(prices=dict(manager.price_cache) if manager else None)
+            except Exception as e:
+                print(f"⚠️ [저널] 종료 스냅샷 실패: {e}")
+        
+        # 틱 아카이브 잔여 버퍼 기록 (장 마감 후 종료 시 일자 병합)
+        if hasattr(self, 'tick_archive'):
+            try: self.tick_archive.close(seal=QTime.currentTime() > QTime(15, 30))
+            except: pass
+        
+        # 로트 장부 잔여 변경분 저장 (DB 종료 전에)
+        try: self.asset_manager.lots.flush()
+        except: pass
         
         # 데이터베이스 연결 종료
         if hasattr(self, 'db'):